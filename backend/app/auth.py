@@ -23,6 +23,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.config import settings
 from app.database import db
+from app.storage.routing import current_request_user
 import jwt
 import logging
 
@@ -64,6 +65,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Remember who this request acts for so their own writes are read back from the primary
+        current_request_user.set(user_id)
+        
         # Get user from database
         user = await db.get_user_by_id(user_id)
         
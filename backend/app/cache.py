@@ -0,0 +1,158 @@
+"""
+Cache Module
+Bounded in-process caches with LRU eviction and time-to-live, and
+coalescing of identical in-flight calls
+"""
+
+from app.metrics import metrics
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+import hashlib
+import time
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries also expire after a TTL
+
+    Hits, misses and evictions are counted in the metrics registry as
+    "cache.<name>.hits" / ".misses" / ".evictions".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value for key, or None if missing or expired"""
+        entry = self.entries.get(key)
+        if entry is None:
+            metrics.increment(f"cache.{self.name}.misses")
+            return None
+
+        value, expires_at = entry
+        if self.clock() >= expires_at:
+            del self.entries[key]
+            metrics.increment(f"cache.{self.name}.misses")
+            return None
+
+        self.entries.move_to_end(key)
+        metrics.increment(f"cache.{self.name}.hits")
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a value, evicting the least recently used entries beyond max_entries"""
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.entries[key] = (value, self.clock() + ttl)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            metrics.increment(f"cache.{self.name}.evictions")
+
+    def delete(self, key: Hashable):
+        """Drop an entry if present"""
+        self.entries.pop(key, None)
+
+    def clear(self):
+        """Drop all entries"""
+        self.entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether an unexpired entry exists, without touching LRU order or hit counts"""
+        entry = self.entries.get(key)
+        return entry is not None and self.clock() < entry[1]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Size, limits and hit rate for diagnostics"""
+        hits = metrics.counters.get(f"cache.{self.name}.hits", 0)
+        misses = metrics.counters.get(f"cache.{self.name}.misses", 0)
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "evictions": metrics.counters.get(f"cache.{self.name}.evictions", 0),
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None
+        }
+
+
+class _Flight:
+    """A shared call in progress and how many callers are waiting on it"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same result (or exception). A cancelled caller only
+    stops waiting; the shared call is cancelled once nobody waits for it.
+    At most max_waiters callers share one call, and later ones run their own.
+    Counted as "singleflight.<name>.calls" / ".coalesced" / ".overflow".
+    """
+
+    def __init__(self, name: str, max_waiters: int = 100):
+        self.name = name
+        self.max_waiters = max_waiters
+        self.flights: Dict[Hashable, _Flight] = {}
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self.flights.get(key) is flight:
+            del self.flights[key]
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of call(), shared with any identical call already in flight"""
+        flight = self.flights.get(key)
+        if flight is not None and flight.waiters >= self.max_waiters:
+            metrics.increment(f"singleflight.{self.name}.overflow")
+            return await call()
+
+        if flight is None:
+            flight = self.flights[key] = _Flight(asyncio.ensure_future(call()))
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            metrics.increment(f"singleflight.{self.name}.calls")
+        else:
+            metrics.increment(f"singleflight.{self.name}.coalesced")
+
+        flight.waiters += 1
+        try:
+            # Shielded so one caller's cancellation doesn't cancel the others' call
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def __len__(self) -> int:
+        return len(self.flights)
+
+
+def content_hash(*parts: Any) -> str:
+    """Stable SHA-256 key for cache lookups on (possibly sensitive) content"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
@@ -4,18 +4,32 @@ Loads environment variables and provides application settings
 """
 
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
     
-    # Supabase
-    supabase_url: str
-    supabase_key: str
-    supabase_service_key: str
+    # Storage backend: "supabase" or "memory" (offline benchmarking/tests)
+    storage_backend: str = "supabase"
     
+    # Supabase (required when storage_backend is "supabase")
+    supabase_url: str = ""
+    supabase_key: str = ""
+    supabase_service_key: str = ""
+
+    # Read replica (optional; leave the URL empty to send every read to the primary)
+    supabase_read_url: str = ""
+    replica_read_methods: str = (
+        "get_user_matches,get_user_sessions,get_upcoming_sessions,get_sessions_in_range,"
+        "find_similar_skills,find_reciprocal_users,get_match_messages"
+    )
+    replica_sticky_seconds: float = 5.0
+    replica_max_lag_seconds: float = 10.0
+    replica_lag_check_interval: float = 5.0
+    replica_retry_after_seconds: float = 30.0
+
     # OpenRouter (for embeddings)
     openrouter_api_key: str
     
@@ -43,17 +57,119 @@ class Settings(BaseSettings):
     weight_availability: float = 0.15
     weight_preference: float = 0.10
     
+    # Candidate filters applied inside the vector search: teachers must be at
+    # least this many levels above the learner, and optionally share the
+    # learner's language / an availability slot
+    match_min_teach_level_gap: int = 0
+    match_same_language_only: bool = False
+    match_require_availability_overlap: bool = False
+    
+    # Candidates fetched per learn skill in discover: about limit * factor in
+    # total, split across the user's learn skills, and widened (doubling, up to
+    # the max) while more candidates could still change the top matches
+    match_fanout_factor: float = 3.0
+    match_fanout_min: int = 5
+    match_fanout_max: int = 100
+    
+    # Candidate generation: "skill" runs one vector search per learn skill;
+    # "centroid" shortlists about limit * shortlist_factor users with one
+    # reciprocal search over user skill centroids (opt-in until measured on Supabase)
+    match_candidate_generation: str = "skill"
+    match_shortlist_factor: int = 5
+    
     # AI Configuration
     max_code_lines: int = 20
     max_explanation_length: int = 1000
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
     embedding_dimension: int = 384
     
+    # OpenAI client (pooling, concurrency, timeouts, retries)
+    openai_timeout_seconds: float = 30.0
+    openai_connect_timeout_seconds: float = 5.0
+    openai_max_connections: int = 20
+    openai_max_concurrency: int = 8
+    openai_model_concurrency: str = ""
+    openai_max_retries: int = 2
+    openai_retry_base_delay: float = 0.5
+    openai_retry_max_delay: float = 8.0
+    
+    # Moderation verdicts cached by content hash
+    moderation_cache_max_entries: int = 10000
+    moderation_cache_ttl_seconds: float = 86400.0
+    
+    # Semantic answer cache for the assistant (opt-in)
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_max_entries: int = 1000
+    semantic_cache_ttl_seconds: float = 86400.0
+    semantic_cache_max_user_turns: int = 1
+    
+    # Server-held assistant conversations
+    conversation_max_entries: int = 10000
+    conversation_ttl_seconds: float = 3600.0
+    conversation_prompt_token_budget: int = 1500
+    conversation_summarize_after_tokens: int = 2000
+    conversation_keep_recent_turns: int = 4
+    conversation_summary_model: str = "gpt-3.5-turbo"
+    
+    # Session agendas cached by (skill, level, duration), optionally pre-generated
+    # for the most common teach skills (0 disables pre-generation)
+    agenda_cache_max_entries: int = 5000
+    agenda_cache_ttl_seconds: float = 604800.0
+    agenda_pregenerate_top_skills: int = 0
+    agenda_pregenerate_interval_seconds: float = 21600.0
+    agenda_pregenerate_concurrency: int = 2
+    
+    # Callers that may share one in-flight identical LLM request
+    llm_coalesce_max_waiters: int = 100
+    
+    # Memoized scores of skill pairings; keys include record versions, so the
+    # TTL only bounds how long unused entries hold memory
+    score_memo_max_entries: int = 200000
+    score_memo_ttl_seconds: float = 86400.0
+    
+    # Background job queue
+    job_workers: int = 2
+    job_max_attempts: int = 3
+    job_retry_base_delay: float = 2.0
+    job_stale_seconds: float = 300.0
+    job_recovery_limit: int = 500
+    
+    # LLM provider: "openai" or "fake" (local stand-in for load tests, no network)
+    llm_provider: str = "openai"
+    fake_llm_latency_distribution: str = "lognormal"  # fixed | uniform | lognormal
+    fake_llm_latency_ms: float = 800.0  # median time to first token
+    fake_llm_latency_spread: float = 0.5  # lognormal sigma, or +/- fraction for uniform
+    fake_llm_token_interval_ms: float = 15.0
+    fake_llm_moderation_latency_ms: float = 80.0
+    fake_llm_error_rate: float = 0.0
+    fake_llm_seed: int = 0
+    
+    # Observability
+    slow_query_threshold_ms: float = 500.0
+    metrics_api_enabled: bool = False  # serve /api/metrics/* (authenticated users only)
+    metrics_measure_payload_bytes: bool = False  # JSON-encode each result to size it (debug only)
+    
     @property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS origins from comma-separated string"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
-    
+
+    @property
+    def openai_model_concurrency_map(self) -> Dict[str, int]:
+        """Parse per-model concurrency overrides from comma-separated model=limit pairs"""
+        limits = {}
+        for entry in self.openai_model_concurrency.split(","):
+            if "=" in entry:
+                model, limit = entry.split("=", 1)
+                limits[model.strip()] = int(limit)
+        return limits
+
+    @property
+    def replica_read_methods_list(self) -> List[str]:
+        """Parse replica-routed Database method names from comma-separated string"""
+        return [method.strip() for method in self.replica_read_methods.split(",") if method.strip()]
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -4,15 +4,56 @@ Provides connection and query utilities for Supabase PostgreSQL
 """
 
 from supabase import create_client, Client
+from postgrest.exceptions import APIError
 from app.config import settings
-from typing import Optional, Dict, Any, List
+from app.metrics import instrument_methods, metrics
+from app.storage.base import (
+    StorageEngine,
+    dedupe_rows,
+    USER_COLUMNS,
+    SKILL_COLUMNS,
+    SKILL_COLUMNS_WITH_EMBEDDING,
+    MATCH_COLUMNS,
+    MATCH_PARTICIPANT_COLUMNS,
+    MATCH_EXPLANATION_COLUMNS,
+    MESSAGE_COLUMNS,
+    SESSION_COLUMNS,
+)
+from app.storage.routing import ReplicaRouter, write_operation
+from datetime import datetime, timezone
+from typing import Callable, Optional, Dict, Any, List, Tuple
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class Database:
-    """Supabase database client wrapper"""
+def _parse_vectors(rows: List[Dict[str, Any]], *keys: str) -> List[Dict[str, Any]]:
+    """
+    Turn pgvector columns into float lists, in place
+    
+    PostgREST returns vector columns as text ("[0.1,0.2,...]"), which is
+    also valid JSON.
+    """
+    for row in rows:
+        for key in keys or ("embedding",):
+            if isinstance(row.get(key), str):
+                row[key] = json.loads(row[key])
+    return rows
+
+
+@instrument_methods("db")
+class Database(StorageEngine):
+    """
+    Supabase database client wrapper
+    
+    Every public method is timed into the metrics registry under "db.<method>".
+    
+    When settings.supabase_read_url is set, reads of the methods listed in
+    settings.replica_read_methods go to that replica unless the requesting
+    user wrote recently, the replica lags, or it is unreachable.
+    """
     
     def __init__(self):
         self.client: Client = create_client(
@@ -23,27 +64,125 @@ class Database:
             settings.supabase_url,
             settings.supabase_service_key
         )
+        
+        self.router: Optional[ReplicaRouter] = None
+        if settings.supabase_read_url:
+            self.replica_client: Client = create_client(
+                settings.supabase_read_url,
+                settings.supabase_key
+            )
+            self.replica_service_client: Client = create_client(
+                settings.supabase_read_url,
+                settings.supabase_service_key
+            )
+            self.router = ReplicaRouter(
+                routed_methods=settings.replica_read_methods_list,
+                sticky_seconds=settings.replica_sticky_seconds,
+                max_lag_seconds=settings.replica_max_lag_seconds,
+                lag_check_interval=settings.replica_lag_check_interval,
+                retry_after_seconds=settings.replica_retry_after_seconds,
+                lag_probe=self._replica_lag
+            )
+    
+    # ==================== READ ROUTING ====================
+    
+    def _replica_lag(self) -> float:
+        """Seconds the replica is behind the primary (replication_lag_seconds SQL function)"""
+        response = self.replica_service_client.rpc("replication_lag_seconds", {}).execute()
+        return float(response.data or 0)
+    
+    async def _read(self, method: str, build: Callable[[Client], Any], service: bool = False):
+        """
+        Execute a read-only query on the replica when routing allows, else the primary
+        
+        The supabase client is synchronous, so the request runs in a worker
+        thread; concurrent reads (asyncio.gather) then overlap instead of
+        blocking the event loop one after another.
+        
+        Args:
+            method: Database method name, checked against the routed methods
+            build: Builds the query from a client (called once per attempt)
+            service: Use the service-role client instead of the anon client
+        
+        Returns:
+            The executed PostgREST response
+        """
+        if self.router and self.router.use_replica(method):
+            replica = self.replica_service_client if service else self.replica_client
+            try:
+                response = await asyncio.to_thread(build(replica).execute)
+                metrics.increment(f"db.replica.{method}")
+                return response
+            except APIError:
+                # The replica answered; the query itself is bad and would fail on the primary too
+                raise
+            except Exception as e:
+                self.router.mark_unavailable(e)
+                metrics.increment("db.replica.fallbacks")
+        
+        primary = self.service_client if service else self.client
+        return await asyncio.to_thread(build(primary).execute)
     
     # ==================== USER OPERATIONS ====================
     
-    async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_id(self, user_id: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
         try:
-            response = self.client.table("users").select("*").eq("id", user_id).execute()
+            response = await self._read(
+                "get_user_by_id",
+                lambda client: client.table("users").select(columns).eq("id", user_id)
+            )
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error fetching user {user_id}: {e}")
             return None
     
-    async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    async def get_user_by_email(self, email: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
         """Get user by email"""
         try:
-            response = self.client.table("users").select("*").eq("email", email).execute()
+            response = await self._read(
+                "get_user_by_email",
+                lambda client: client.table("users").select(columns).eq("email", email)
+            )
             return response.data[0] if response.data else None
         except Exception as e:
             logger.error(f"Error fetching user by email {email}: {e}")
             return None
     
+    async def get_users_with_skills(
+        self,
+        user_ids: List[str],
+        skill_ids: Optional[List[str]] = None,
+        columns: str = USER_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """
+        Get users in one read, each with a "skills" list (with embeddings) holding
+        only the listed skills plus their LEARN skills (all skills if skill_ids is None)
+        
+        The skill filter applies to the embedded relation, so users are returned
+        even when none of their skills match.
+        """
+        try:
+            def build(client: Client):
+                query = (
+                    client.table("users")
+                    .select(f"{columns}, skills({SKILL_COLUMNS_WITH_EMBEDDING})")
+                    .in_("id", user_ids)
+                )
+                if skill_ids is not None:
+                    query = query.or_(f"id.in.({','.join(skill_ids)}),mode.eq.LEARN", reference_table="skills")
+                return query
+            
+            response = await self._read("get_users_with_skills", build)
+            users = response.data or []
+            for user in users:
+                _parse_vectors(user.get("skills") or [])
+            return users
+        except Exception as e:
+            logger.error(f"Error fetching users {user_ids} with skills: {e}")
+            return []
+    
+    @write_operation
     async def create_user(self, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create new user"""
         try:
@@ -54,6 +193,7 @@ class Database:
             logger.error(f"Error creating user: {e}")
             return None
     
+    @write_operation
     async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update user profile"""
         try:
@@ -64,20 +204,52 @@ class Database:
             logger.error(f"Error updating user {user_id}: {e}")
             return None
     
+    @write_operation
+    async def bulk_upsert_users(
+        self,
+        users_data: List[Dict[str, Any]],
+        on_conflict: str = "email"
+    ) -> List[Dict[str, Any]]:
+        """Insert or update many users in a single request (seeding/admin use)"""
+        if not users_data:
+            return []
+        
+        try:
+            rows = dedupe_rows(users_data, on_conflict)
+            response = self.service_client.table("users").upsert(rows, on_conflict=on_conflict).execute()
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error bulk upserting {len(users_data)} users: {e}")
+            return []
+    
     # ==================== SKILL OPERATIONS ====================
     
-    async def get_user_skills(self, user_id: str, mode: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all skills for a user, optionally filtered by mode (TEACH/LEARN)"""
+    async def get_user_skills(
+        self,
+        user_id: str,
+        mode: Optional[str] = None,
+        columns: str = SKILL_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all skills for a user, optionally filtered by mode (TEACH/LEARN)
+        
+        Embeddings are left out by default; pass SKILL_COLUMNS_WITH_EMBEDDING
+        when the vectors are actually needed (matching).
+        """
         try:
-            query = self.client.table("skills").select("*").eq("user_id", user_id)
-            if mode:
-                query = query.eq("mode", mode)
-            response = query.execute()
-            return response.data or []
+            def build(client: Client):
+                query = client.table("skills").select(columns).eq("user_id", user_id)
+                if mode:
+                    query = query.eq("mode", mode)
+                return query
+            
+            response = await self._read("get_user_skills", build)
+            return _parse_vectors(response.data or [])
         except Exception as e:
             logger.error(f"Error fetching skills for user {user_id}: {e}")
             return []
     
+    @write_operation
     async def create_skill(self, skill_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create new skill with embedding"""
         try:
@@ -87,6 +259,40 @@ class Database:
             logger.error(f"Error creating skill: {e}")
             return None
     
+    @write_operation
+    async def bulk_upsert_skills(
+        self,
+        skills_data: List[Dict[str, Any]],
+        on_conflict: str = "user_id,name,mode",
+        bypass_rls: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Insert or update many skills in a single request
+        
+        Rows that collide on the conflict key are updated in place. Duplicate
+        keys within the batch are collapsed (last one wins), since Postgres
+        rejects an upsert that touches the same row twice. Pass bypass_rls
+        when writing skills for several users at once (seeding). The returned
+        rows are projected to SKILL_COLUMNS, so embeddings are not sent back.
+        """
+        if not skills_data:
+            return []
+        
+        try:
+            rows = dedupe_rows(skills_data, on_conflict)
+            client = self.service_client if bypass_rls else self.client
+            response = (
+                client.table("skills")
+                .upsert(rows, on_conflict=on_conflict)
+                .select(SKILL_COLUMNS)
+                .execute()
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error bulk upserting {len(skills_data)} skills: {e}")
+            return []
+    
+    @write_operation
     async def update_skill(self, skill_id: str, skill_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update skill"""
         try:
@@ -96,6 +302,7 @@ class Database:
             logger.error(f"Error updating skill {skill_id}: {e}")
             return None
     
+    @write_operation
     async def delete_skill(self, skill_id: str, user_id: str) -> bool:
         """Delete skill (with ownership check)"""
         try:
@@ -110,46 +317,160 @@ class Database:
         embedding: List[float], 
         mode: str, 
         limit: int = 10,
-        exclude_user_id: Optional[str] = None
+        exclude_user_id: Optional[str] = None,
+        min_level: Optional[int] = None,
+        require_learn_skill: bool = False,
+        language: Optional[str] = None,
+        availability: Optional[List[Dict[str, Any]]] = None
     ) -> List[Dict[str, Any]]:
-        """Find similar skills using vector similarity"""
-        try:
-            # Use the SQL function we created
-            query = f"""
-                SELECT s.*, 
-                       1 - (s.embedding <=> '[{','.join(map(str, embedding))}]'::vector) as similarity
-                FROM skills s
-                WHERE s.mode = '{mode}'
-                AND s.embedding IS NOT NULL
-                {f"AND s.user_id != '{exclude_user_id}'" if exclude_user_id else ""}
-                ORDER BY s.embedding <=> '[{','.join(map(str, embedding))}]'::vector
-                LIMIT {limit}
-            """
-            response = self.service_client.rpc("exec_sql", {"query": query}).execute()
-            return response.data or []
+        """
+        Find similar skills using vector similarity, filtered inside the search
+        
+        Backed by the find_similar_skills SQL function, which applies the
+        filters to the HNSW candidates and widens the candidate pool until
+        `limit` skills pass (see the function for the filter semantics).
+        """
+        try:
+            response = await self._read(
+                "find_similar_skills",
+                lambda client: client.rpc("find_similar_skills", {
+                    "p_embedding": embedding,
+                    "p_mode": mode,
+                    "p_limit": limit,
+                    "p_exclude_user_id": exclude_user_id,
+                    "p_min_level": min_level,
+                    "p_require_learn_skill": require_learn_skill,
+                    "p_language": language,
+                    "p_availability": availability
+                }),
+                service=True
+            )
+            return _parse_vectors(response.data or [])
         except Exception as e:
             logger.error(f"Error finding similar skills: {e}")
             return []
     
+    async def get_user_vectors(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Precomputed TEACH / LEARN skill centroids of a user
+        
+        Read from user_vectors, which a trigger on skills keeps up to date.
+        """
+        try:
+            response = await self._read(
+                "get_user_vectors",
+                lambda client: (
+                    client.table("user_vectors")
+                    .select("user_id, teach_centroid, learn_centroid")
+                    .eq("user_id", user_id)
+                    .not_.is_("teach_centroid", "null")
+                    .not_.is_("learn_centroid", "null")
+                ),
+                service=True
+            )
+            rows = _parse_vectors(response.data or [], "teach_centroid", "learn_centroid")
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error fetching vectors for user {user_id}: {e}")
+            return None
+    
+    async def find_reciprocal_users(
+        self,
+        teach_centroid: List[float],
+        learn_centroid: List[float],
+        limit: int = 50,
+        exclude_user_id: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Users whose skills complement a pair of centroids, best first
+        
+        Backed by the find_reciprocal_users SQL function: one HNSW search on
+        each side of user_vectors (kept up to date by a trigger on skills).
+        """
+        try:
+            response = await self._read(
+                "find_reciprocal_users",
+                lambda client: client.rpc("find_reciprocal_users", {
+                    "p_teach_centroid": teach_centroid,
+                    "p_learn_centroid": learn_centroid,
+                    "p_limit": limit,
+                    "p_exclude_user_id": exclude_user_id,
+                    "p_language": language
+                }),
+                service=True
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error finding reciprocal users: {e}")
+            return []
+    
+    async def get_popular_skills(self, mode: str = "TEACH", limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get the most common skills for a mode
+        
+        Backed by the get_popular_skills SQL function, which groups by
+        lower-cased, trimmed name and level.
+        """
+        try:
+            response = await self._read(
+                "get_popular_skills",
+                lambda client: client.rpc("get_popular_skills", {"p_mode": mode, "p_limit": limit})
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error fetching popular skills: {e}")
+            return []
+    
     # ==================== MATCH OPERATIONS ====================
     
-    async def get_user_matches(self, user_id: str, status: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get all matches for a user"""
+    async def get_match(self, match_id: str, user_id: str, columns: str = MATCH_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get one match, only if the user takes part in it"""
         try:
-            query = self.client.table("matches").select(
-                "*, user1:users!matches_user1_id_fkey(*), user2:users!matches_user2_id_fkey(*), "
-                "skill1:skills!matches_skill1_id_fkey(*), skill2:skills!matches_skill2_id_fkey(*)"
-            ).or_(f"user1_id.eq.{user_id},user2_id.eq.{user_id}")
-            
-            if status:
-                query = query.eq("status", status)
+            response = await self._read(
+                "get_match",
+                lambda client: (
+                    client.table("matches")
+                    .select(columns)
+                    .eq("id", match_id)
+                    .or_(f"user1_id.eq.{user_id},user2_id.eq.{user_id}")
+                )
+            )
+            return response.data[0] if response.data else None
+        except Exception as e:
+            logger.error(f"Error fetching match {match_id}: {e}")
+            return None
+    
+    async def get_user_matches(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        columns: str = MATCH_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all matches for a user
+        
+        By default joins both users and skills (without embeddings). Pass
+        MATCH_PARTICIPANT_COLUMNS for membership checks that need no joins.
+        """
+        try:
+            def build(client: Client):
+                query = client.table("matches").select(columns).or_(
+                    f"user1_id.eq.{user_id},user2_id.eq.{user_id}"
+                )
+                
+                if status:
+                    query = query.eq("status", status)
+                
+                return query.order("total_score", desc=True)
             
-            response = query.order("total_score", desc=True).execute()
+            response = await self._read("get_user_matches", build)
             return response.data or []
         except Exception as e:
             logger.error(f"Error fetching matches for user {user_id}: {e}")
             return []
     
+    @write_operation
     async def create_match(self, match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create new match"""
         try:
@@ -159,6 +480,7 @@ class Database:
             logger.error(f"Error creating match: {e}")
             return None
     
+    @write_operation
     async def update_match(self, match_id: str, match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update match status"""
         try:
@@ -173,12 +495,16 @@ class Database:
     async def get_match_sessions(self, match_id: str) -> List[Dict[str, Any]]:
         """Get all sessions for a match"""
         try:
-            response = self.client.table("sessions").select("*").eq("match_id", match_id).order("scheduled_at").execute()
+            response = await self._read(
+                "get_match_sessions",
+                lambda client: client.table("sessions").select(SESSION_COLUMNS).eq("match_id", match_id).order("scheduled_at")
+            )
             return response.data or []
         except Exception as e:
             logger.error(f"Error fetching sessions for match {match_id}: {e}")
             return []
     
+    @write_operation
     async def create_session(self, session_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create new session"""
         try:
@@ -188,6 +514,7 @@ class Database:
             logger.error(f"Error creating session: {e}")
             return None
     
+    @write_operation
     async def update_session(self, session_id: str, session_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update session"""
         try:
@@ -200,34 +527,128 @@ class Database:
     async def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
         """Get all sessions for a user across all their matches"""
         try:
-            # Join with matches to filter by user participation
-            # Note: the foreign key syntax matches!inner ensures we only get sessions linked to matches valid for this user
-            response = self.client.table("sessions").select(
-                "*, match:matches!inner(user1_id, user2_id, user1:users!matches_user1_id_fkey(name, email), user2:users!matches_user2_id_fkey(name, email))"
-            ).or_(f"user1_id.eq.{user_id},user2_id.eq.{user_id}", foreign_table="match").order("scheduled_at").execute()
+            # Participants are denormalized onto sessions, so no join with matches is needed
+            response = await self._read(
+                "get_user_sessions",
+                lambda client: client.table("sessions").select(SESSION_COLUMNS).or_(f"user1_id.eq.{user_id},user2_id.eq.{user_id}").order("scheduled_at")
+            )
             return response.data or []
         except Exception as e:
             logger.error(f"Error fetching user sessions {user_id}: {e}")
             return []
     
-    # ==================== MESSAGE OPERATIONS ====================
+    async def get_upcoming_sessions(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get a user's scheduled sessions that have not started yet, earliest first
+        
+        Served by the get_user_sessions_in_range SQL function (two ordered
+        index range scans on idx_sessions_user{1,2}_scheduled).
+        """
+        try:
+            response = await self._read(
+                "get_upcoming_sessions",
+                lambda client: client.rpc("get_user_sessions_in_range", {
+                    "p_user_id": user_id,
+                    "p_from": datetime.now(timezone.utc).isoformat(),
+                    "p_status": "SCHEDULED",
+                    "p_limit": limit
+                })
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error fetching upcoming sessions for user {user_id}: {e}")
+            return []
     
-    async def get_match_messages(self, match_id: str, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get messages for a match"""
+    async def get_sessions_in_range(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get a user's sessions scheduled in [start, end), earliest first"""
         try:
-            response = (
-                self.client.table("messages")
-                .select("*, sender:users!messages_sender_id_fkey(id, name, avatar_url)")
-                .eq("match_id", match_id)
-                .order("created_at", desc=False)
-                .limit(limit)
-                .execute()
+            response = await self._read(
+                "get_sessions_in_range",
+                lambda client: client.rpc("get_user_sessions_in_range", {
+                    "p_user_id": user_id,
+                    "p_from": start.isoformat(),
+                    "p_to": end.isoformat(),
+                    "p_limit": limit
+                })
             )
             return response.data or []
+        except Exception as e:
+            logger.error(f"Error fetching sessions in range for user {user_id}: {e}")
+            return []
+    
+    # ==================== MESSAGE OPERATIONS ====================
+    
+    async def get_match_messages(
+        self,
+        match_id: str,
+        limit: int = 50,
+        before: Optional[Tuple[str, str]] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a page of messages for a match, newest first
+
+        Pages are keyset-paginated on (created_at, id) so every page costs a
+        single index range scan on idx_messages_match_created, regardless of
+        how long the thread is.
+
+        Args:
+            match_id: Match to read messages from
+            limit: Maximum number of messages to return
+            before: (created_at, id) cursor - return messages older than it
+            after: (created_at, id) cursor - return messages newer than it
+
+        Returns:
+            Messages ordered newest first
+        """
+        try:
+            # Walking forward from an `after` cursor reads the index ascending so the
+            # page starts right at the cursor; it is flipped back to newest first below
+            ascending = after is not None and before is None
+
+            def build(client: Client):
+                query = (
+                    client.table("messages")
+                    .select(f"{MESSAGE_COLUMNS}, sender:users!messages_sender_id_fkey(id, name, avatar_url)")
+                    .eq("match_id", match_id)
+                )
+
+                if before:
+                    created_at, message_id = before
+                    query = query.or_(
+                        f'created_at.lt."{created_at}",'
+                        f'and(created_at.eq."{created_at}",id.lt.{message_id})'
+                    )
+                if after:
+                    created_at, message_id = after
+                    query = query.or_(
+                        f'created_at.gt."{created_at}",'
+                        f'and(created_at.eq."{created_at}",id.gt.{message_id})'
+                    )
+
+                return (
+                    query
+                    .order("created_at", desc=not ascending)
+                    .order("id", desc=not ascending)
+                    .limit(limit)
+                )
+
+            response = await self._read("get_match_messages", build)
+            messages = response.data or []
+            if ascending:
+                messages.reverse()
+            return messages
         except Exception as e:
             logger.error(f"Error fetching messages for match {match_id}: {e}")
             return []
     
+    @write_operation
     async def create_message(self, message_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create new message"""
         try:
@@ -237,21 +658,158 @@ class Database:
             logger.error(f"Error creating message: {e}")
             return None
     
-    async def mark_messages_read(self, match_id: str, user_id: str) -> bool:
-        """Mark all messages in a match as read for a user"""
+    async def get_user_inbox(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Get every conversation for a user with last message and unread count
+        
+        Backed by the get_user_inbox SQL function, so the whole inbox is a
+        single query ordered by most recent activity.
+        """
         try:
-            response = (
-                self.client.table("messages")
-                .update({"is_read": True})
-                .eq("match_id", match_id)
-                .neq("sender_id", user_id)
-                .execute()
+            response = await self._read(
+                "get_user_inbox",
+                lambda client: client.rpc("get_user_inbox", {"p_user_id": user_id})
             )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error fetching inbox for user {user_id}: {e}")
+            return []
+    
+    # ==================== READ MARKER OPERATIONS ====================
+    
+    async def get_read_markers(self, match_id: str) -> Dict[str, str]:
+        """Get each participant's last_read_at marker for a match, keyed by user ID"""
+        try:
+            response = await self._read(
+                "get_read_markers",
+                lambda client: (
+                    client.table("message_reads")
+                    .select("user_id, last_read_at")
+                    .eq("match_id", match_id)
+                )
+            )
+            return {row["user_id"]: row["last_read_at"] for row in response.data or []}
+        except Exception as e:
+            logger.error(f"Error fetching read markers for match {match_id}: {e}")
+            return {}
+    
+    @write_operation
+    async def advance_read_marker(self, match_id: str, user_id: str, read_at: str) -> bool:
+        """
+        Move a user's read marker for a match forward to read_at
+        
+        Single upsert via the advance_read_marker SQL function; the marker
+        never moves backwards, so replayed or out-of-order calls are no-ops.
+        """
+        try:
+            self.client.rpc("advance_read_marker", {
+                "p_user_id": user_id,
+                "p_match_id": match_id,
+                "p_read_at": read_at
+            }).execute()
             return True
         except Exception as e:
-            logger.error(f"Error marking messages read: {e}")
+            logger.error(f"Error advancing read marker for match {match_id}: {e}")
             return False
+    
+    async def count_unread_messages(
+        self,
+        match_id: str,
+        user_id: str,
+        last_read_at: Optional[str] = None
+    ) -> int:
+        """Count messages from the other participant newer than the user's read marker"""
+        try:
+            def build(client: Client):
+                query = (
+                    client.table("messages")
+                    .select("id", count="exact", head=True)
+                    .eq("match_id", match_id)
+                    .neq("sender_id", user_id)
+                )
+                if last_read_at:
+                    query = query.gt("created_at", last_read_at)
+                return query
+            
+            response = await self._read("count_unread_messages", build)
+            return response.count or 0
+        except Exception as e:
+            logger.error(f"Error counting unread messages for match {match_id}: {e}")
+            return 0
+
+    
+    # ==================== JOB OPERATIONS ====================
+    # Jobs are internal, so they go through the service client
+    
+    @write_operation
+    async def create_job(self, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Record a new background job"""
+        try:
+            response = self.service_client.table("jobs").insert(job_data).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            logger.error(f"Error creating job: {e}")
+            return None
+    
+    @write_operation
+    async def claim_job(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Mark a job RUNNING and count the attempt, unless it changed since it was read
+        
+        The update is conditional on the status and updated_at the caller saw,
+        so when several processes recover the same job only one claims it.
+        """
+        try:
+            response = (
+                self.service_client.table("jobs")
+                .update({"status": "RUNNING", "attempts": job["attempts"] + 1})
+                .eq("id", job["id"])
+                .eq("status", job["status"])
+                .eq("updated_at", job["updated_at"])
+                .execute()
+            )
+            return response.data[0] if response.data else None
+        except Exception as e:
+            logger.error(f"Error claiming job {job['id']}: {e}")
+            return None
+    
+    @write_operation
+    async def update_job(self, job_id: str, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a job's status or error"""
+        try:
+            response = self.service_client.table("jobs").update(job_data).eq("id", job_id).execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            logger.error(f"Error updating job {job_id}: {e}")
+            return None
+    
+    async def get_runnable_jobs(self, stale_before: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """Get PENDING jobs plus RUNNING ones not touched since stale_before, oldest first"""
+        try:
+            response = await self._read(
+                "get_runnable_jobs",
+                lambda client: (
+                    client.table("jobs")
+                    .select("*")
+                    .or_(f"status.eq.PENDING,and(status.eq.RUNNING,updated_at.lt.{stale_before})")
+                    .order("created_at")
+                    .limit(limit)
+                ),
+                service=True
+            )
+            return response.data or []
+        except Exception as e:
+            logger.error(f"Error fetching runnable jobs: {e}")
+            return []
+
+
+def create_database() -> StorageEngine:
+    """Create the storage engine selected by settings.storage_backend"""
+    if settings.storage_backend == "memory":
+        from app.storage.memory import InMemoryDatabase
+        return InMemoryDatabase()
+    return Database()
 
 
 # Global database instance
-db = Database()
+db = create_database()
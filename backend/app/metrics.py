@@ -0,0 +1,216 @@
+"""
+Metrics Module
+In-process latency histograms, counters and slow-call logging
+"""
+
+from app.config import settings
+from typing import Any, Callable, Dict, Optional
+from functools import wraps
+import bisect
+import inspect
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with row and payload totals"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.total_rows = 0
+        self.total_bytes = 0
+
+    def observe(self, duration_ms: float, rows: int = 0, payload_bytes: int = 0):
+        """Record one call"""
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.total_rows += rows
+        self.total_bytes += payload_bytes
+
+    def percentile(self, q: float) -> float:
+        """
+        Estimate a percentile from the buckets
+
+        Returns the upper bound of the bucket containing the q-th call
+        (or the observed max for the open-ended bucket).
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(float(LATENCY_BUCKETS_MS[index]), self.max_ms)
+                return self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summary suitable for JSON output"""
+        avg_ms = self.total_ms / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "avg_ms": round(avg_ms, 3),
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets_ms": {
+                **{str(bound): count for bound, count in zip(LATENCY_BUCKETS_MS, self.bucket_counts)},
+                "+Inf": self.bucket_counts[-1]
+            },
+            "total_rows": self.total_rows,
+            "avg_rows": round(self.total_rows / self.count, 2) if self.count else 0,
+            "total_bytes": self.total_bytes,
+            "avg_bytes": round(self.total_bytes / self.count) if self.count else 0
+        }
+
+
+class MetricsRegistry:
+    """Named latency histograms and counters for the whole process"""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe(self, name: str, duration_ms: float, rows: int = 0, payload_bytes: int = 0):
+        """Record a timed call under the given operation name"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.observe(duration_ms, rows, payload_bytes)
+
+    def increment(self, name: str, amount: int = 1):
+        """Increment a counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, Any]:
+        """All metrics, optionally restricted to names starting with prefix"""
+        def selected(name: str) -> bool:
+            return prefix is None or name.startswith(prefix)
+
+        return {
+            "operations": {
+                name: histogram.snapshot()
+                for name, histogram in sorted(self.histograms.items()) if selected(name)
+            },
+            "counters": {
+                name: value for name, value in sorted(self.counters.items()) if selected(name)
+            }
+        }
+
+    def reset(self):
+        """Drop all recorded metrics"""
+        self.histograms.clear()
+        self.counters.clear()
+
+
+def _count_rows(result: Any) -> int:
+    """Number of rows in a Database method result"""
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return 1
+    return 0
+
+
+def _payload_bytes(result: Any) -> int:
+    """Approximate JSON size of a Database method result"""
+    if not isinstance(result, (list, dict)):
+        return 0
+    try:
+        return len(json.dumps(result, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _redact(value: Any) -> str:
+    """Describe an argument's shape without revealing its contents"""
+    if isinstance(value, (list, tuple, dict, str, bytes)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    if value is None or isinstance(value, (bool, int, float)):
+        # Limits, flags and thresholds are safe and useful when diagnosing
+        return repr(value)
+    return f"<{type(value).__name__}>"
+
+
+def _redacted_arguments(signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """Format call arguments with their values redacted"""
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return "<unbound>"
+    return ", ".join(
+        f"{name}={_redact(value)}"
+        for name, value in bound.arguments.items() if name != "self"
+    )
+
+
+def instrument(name: str) -> Callable:
+    """
+    Decorator timing an async method into the metrics registry
+
+    Records latency and row count of the result (plus its payload bytes when
+    settings.metrics_measure_payload_bytes is on), and logs calls slower than
+    settings.slow_query_threshold_ms with redacted arguments.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = await func(*args, **kwargs)
+            duration_ms = (time.perf_counter() - start) * 1000
+
+            metrics.observe(
+                name,
+                duration_ms,
+                rows=_count_rows(result),
+                payload_bytes=_payload_bytes(result) if settings.metrics_measure_payload_bytes else 0
+            )
+
+            if duration_ms >= settings.slow_query_threshold_ms:
+                logger.warning(
+                    f"Slow call {name} took {duration_ms:.1f}ms "
+                    f"({_redacted_arguments(signature, args, kwargs)})"
+                )
+
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(prefix: str) -> Callable:
+    """
+    Class decorator applying instrument() to every public async method
+
+    Operations are named "<prefix>.<method name>".
+    """
+    def decorator(cls):
+        for attr_name, attr in list(vars(cls).items()):
+            if attr_name.startswith("_") or not inspect.iscoroutinefunction(attr):
+                continue
+            setattr(cls, attr_name, instrument(f"{prefix}.{attr_name}")(attr))
+        return cls
+
+    return decorator
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
@@ -99,6 +99,10 @@ class SkillCreate(BaseModel):
         return v.strip()
 
 
+class SkillBulkCreate(BaseModel):
+    skills: List[SkillCreate] = Field(..., min_length=1, max_length=50)
+
+
 class SkillUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=2, max_length=255)
     level: Optional[int] = Field(None, ge=1, le=5)
@@ -202,6 +206,8 @@ class SessionUpdate(BaseModel):
 class SessionResponse(BaseModel):
     id: str
     match_id: str
+    user1_id: Optional[str] = None
+    user2_id: Optional[str] = None
     agenda: str
     scheduled_at: datetime
     duration_minutes: int
@@ -233,7 +239,7 @@ class MessageResponse(BaseModel):
     match_id: str
     sender_id: str
     content: str
-    is_read: bool
+    is_read: bool = False  # Derived from the recipient's read marker
     created_at: datetime
     
     # Populated from join
@@ -243,6 +249,37 @@ class MessageResponse(BaseModel):
         from_attributes = True
 
 
+class InboxEntry(BaseModel):
+    match_id: str
+    match_status: MatchStatus
+    other_user_id: str
+    other_user_name: str
+    other_user_avatar_url: Optional[str] = None
+    last_message_id: Optional[str] = None
+    last_message_preview: Optional[str] = None
+    last_message_sender_id: Optional[str] = None
+    last_message_at: Optional[datetime] = None
+    unread_count: int = 0
+
+
+# ==================== DASHBOARD MODELS ====================
+
+class DashboardUnread(BaseModel):
+    total: int = 0
+    by_match: Dict[str, int] = {}
+
+
+class DashboardResponse(BaseModel):
+    # Sections are None when the client's If-None-Match already covers them
+    profile: Optional[UserResponse] = None
+    skills: Optional[List[SkillResponse]] = None
+    matches: Optional[List[MatchResponse]] = None
+    upcoming_sessions: Optional[List[SessionResponse]] = None
+    unread: Optional[DashboardUnread] = None
+    etags: Dict[str, str]
+    unchanged: List[str] = []
+
+
 # ==================== AI ASSISTANT MODELS ====================
 
 class ChatMessage(BaseModel):
@@ -257,12 +294,17 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    messages: List[ChatMessage] = Field(..., min_items=1)
+    # Send either the new message (history is kept server-side under conversation_id)
+    # or the full messages list
+    message: Optional[str] = Field(None, min_length=1, max_length=2000)
+    conversation_id: Optional[str] = None
+    messages: Optional[List[ChatMessage]] = Field(None, min_length=1)
     context: Optional[Dict[str, Any]] = None
 
 
 class ChatResponse(BaseModel):
     response: str
+    conversation_id: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.now)
 
 
@@ -4,9 +4,13 @@ Handles AI chat and assistance features
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from app.models import ChatRequest, ChatResponse
-from app.services.ai_assistant import ai_assistant
+from app.services.ai_assistant import ai_assistant, ERROR_MESSAGE, REFUSAL_MESSAGE, SUMMARY_CONTEXT_KEY
+from app.services.conversations import Conversation, conversation_store
 from app.auth import get_current_user
+from typing import Any, Dict, List, Optional, Tuple
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,6 +18,45 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/assistant", tags=["assistant"])
 
 
+def build_chat_inputs(
+    chat_request: ChatRequest,
+    current_user: dict
+) -> Tuple[List[Dict[str, str]], Dict[str, Any], Optional[Conversation]]:
+    """
+    Prompt messages, request context (with the current user added) and conversation
+    
+    With `message`, the history comes from the server-held conversation (a
+    new one when no conversation_id is given). With `messages`, the client's
+    full history is used and there is no conversation.
+    """
+    context = chat_request.context or {}
+    context["user_id"] = current_user["id"]
+    context["user_name"] = current_user.get("name", "User")
+    
+    if chat_request.message is None:
+        if not chat_request.messages:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Either message or messages is required"
+            )
+        return [msg.model_dump() for msg in chat_request.messages], context, None
+    
+    if chat_request.conversation_id:
+        conversation = conversation_store.get(chat_request.conversation_id, current_user["id"])
+        if not conversation:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Conversation not found or expired"
+            )
+    else:
+        conversation = conversation_store.create(current_user["id"])
+    
+    if conversation.summary:
+        context[SUMMARY_CONTEXT_KEY] = conversation.summary
+    
+    return conversation_store.build_prompt(conversation, chat_request.message), context, conversation
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_assistant(
     chat_request: ChatRequest,
@@ -22,21 +65,60 @@ async def chat_with_assistant(
     """
     Chat with AI assistant
     Provides technical help, code snippets, and learning guidance
+    
+    Send `message` (plus the `conversation_id` from the previous response)
+    and the history is kept server-side; sending the full `messages` list
+    still works.
     """
+    messages, context, conversation = build_chat_inputs(chat_request, current_user)
+    
     try:
-        # Convert Pydantic models to dicts
-        messages = [msg.model_dump() for msg in chat_request.messages]
-        
-        # Add user context
-        context = chat_request.context or {}
-        context["user_id"] = current_user["id"]
-        context["user_name"] = current_user.get("name", "User")
-        
         # Get AI response
         response = await ai_assistant.chat_completion(messages, context)
         
-        return ChatResponse(response=response)
+        if conversation and response not in (REFUSAL_MESSAGE, ERROR_MESSAGE):
+            conversation_store.record_turn(conversation, chat_request.message, response)
+        
+        return ChatResponse(response=response, conversation_id=conversation.id if conversation else None)
     
     except Exception as e:
         logger.error(f"Error in AI chat: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get AI response: {str(e)}")
+
+
+@router.post("/chat/stream")
+async def stream_chat_with_assistant(
+    chat_request: ChatRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Chat with AI assistant, streaming the answer as Server-Sent Events
+    
+    Events: `token` for each text delta, `trailer` for the code disclaimer
+    (sent after the answer when it contains code), `error` when the request
+    is refused or fails, and a final `done`. Each data line is JSON with a
+    `content` field. For server-held conversations the conversation ID is
+    returned in the X-Conversation-Id header.
+    """
+    messages, context, conversation = build_chat_inputs(chat_request, current_user)
+    
+    async def event_stream():
+        parts = []
+        failed = False
+        async for event in ai_assistant.stream_chat_completion(messages, context):
+            if event["type"] == "token":
+                parts.append(event["content"])
+            elif event["type"] == "error":
+                failed = True
+            yield f"event: {event['type']}\ndata: {json.dumps({'content': event['content']})}\n\n"
+        
+        # Only complete answers become part of the conversation
+        if conversation and not failed:
+            conversation_store.record_turn(conversation, chat_request.message, "".join(parts).strip())
+        yield "event: done\ndata: {}\n\n"
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if conversation:
+        headers["X-Conversation-Id"] = conversation.id
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=headers)
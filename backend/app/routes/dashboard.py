@@ -0,0 +1,93 @@
+"""
+Dashboard API Routes
+Aggregates everything the dashboard needs into a single request
+"""
+
+from fastapi import APIRouter, Depends, Header, Response, status
+from app.models import DashboardResponse
+from app.database import db
+from app.auth import get_current_user
+from app.utils import compute_etag
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+SECTIONS = ("profile", "skills", "matches", "upcoming_sessions", "unread")
+
+
+def parse_if_none_match(header: Optional[str]) -> set:
+    """Split an If-None-Match header into its entity tags (weak prefixes dropped)"""
+    if not header:
+        return set()
+    tags = set()
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag)
+    return tags
+
+
+def summarize_unread(inbox: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Per-match and total unread counts from inbox rows"""
+    by_match = {entry["match_id"]: entry["unread_count"] for entry in inbox if entry.get("unread_count")}
+    return {"total": sum(by_match.values()), "by_match": by_match}
+
+
+@router.get("/", response_model=DashboardResponse)
+async def get_dashboard(
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get profile, skills, matches, upcoming sessions and unread counts in one call
+
+    The user is looked up once (by authentication) and the remaining sections
+    are fetched concurrently. Every section carries its own ETag in `etags`;
+    send the ones you hold back in If-None-Match and unchanged sections come
+    back as null and are listed in `unchanged`. If nothing changed the
+    response is 304 Not Modified.
+    """
+    user_id = current_user["id"]
+
+    # get_current_user falls back to token claims when there is no profile yet
+    profile = current_user if "created_at" in current_user else None
+
+    if profile:
+        skills, matches, upcoming_sessions, inbox = await asyncio.gather(
+            db.get_user_skills(user_id),
+            db.get_user_matches(user_id),
+            db.get_upcoming_sessions(user_id),
+            db.get_user_inbox(user_id)
+        )
+    else:
+        skills, matches, upcoming_sessions, inbox = [], [], [], []
+
+    sections = {
+        "profile": profile,
+        "skills": skills,
+        "matches": matches,
+        "upcoming_sessions": upcoming_sessions,
+        "unread": summarize_unread(inbox)
+    }
+    # The section name is part of the tag so equal payloads in different sections never collide
+    etags = {name: compute_etag([name, sections[name]]) for name in SECTIONS}
+
+    combined_etag = compute_etag(etags)
+    response.headers["ETag"] = combined_etag
+
+    known = parse_if_none_match(if_none_match)
+    if combined_etag in known or all(etags[name] in known for name in SECTIONS):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": combined_etag})
+
+    unchanged = [name for name in SECTIONS if etags[name] in known]
+    for name in unchanged:
+        sections[name] = None
+
+    return {**sections, "etags": etags, "unchanged": unchanged}
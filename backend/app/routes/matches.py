@@ -5,11 +5,12 @@ Handles match discovery, creation, and management
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from app.models import MatchCreate, MatchUpdate, MatchResponse
-from app.database import db
-from app.services.matching import matching_service
+from app.database import db, MATCH_PARTICIPANT_COLUMNS, MATCH_EXPLANATION_COLUMNS
+from app.services.matching import matching_service, SCORE_KEYS
 from app.services.ai_assistant import ai_assistant
+from app.services.match_jobs import enqueue_explanation_upgrade
 from app.auth import get_current_user
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,11 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/matches", tags=["matches"])
 
 
+def match_key(match: Dict[str, Any]) -> frozenset:
+    """Identify a match by its two (user, teach skill) sides, whichever side is user1"""
+    return frozenset([(match["user1_id"], match["skill1_id"]), (match["user2_id"], match["skill2_id"])])
+
+
 @router.get("/", response_model=List[MatchResponse])
 async def get_matches(
     status_filter: Optional[str] = None,
@@ -35,6 +41,7 @@ async def discover_matches(
     """
     Discover potential matches using AI-powered matching algorithm
     Returns matches with scores and AI-generated explanations
+    (stored explanations are reused for matches that already exist)
     """
     try:
         # Find matches using hybrid algorithm
@@ -46,8 +53,12 @@ async def discover_matches(
         if not potential_matches:
             return []
         
-        # Enrich matches with user and skill data + generate explanations
+        stored_matches = await db.get_user_matches(current_user["id"], columns=MATCH_EXPLANATION_COLUMNS)
+        stored_explanations = {match_key(m): m["explanation"] for m in stored_matches if m.get("explanation")}
+        
+        # Enrich matches with user and skill data, then explain the new ones in one LLM call
         enriched_matches = []
+        explanation_inputs = []
         
         for match in potential_matches:
             # Get user data
@@ -66,30 +77,37 @@ async def discover_matches(
             if not all([user1, user2, skill1_teach, skill2_teach]):
                 continue
             
-            # Generate AI explanation
-            explanation = await ai_assistant.generate_match_explanation(
-                user1_name=user1["name"],
-                user2_name=user2["name"],
-                skill1_teach=skill1_teach["name"],
-                skill1_learn=skill1_learn["name"] if skill1_learn else "new skills",
-                skill2_teach=skill2_teach["name"],
-                skill2_learn=skill2_learn["name"] if skill2_learn else "new skills",
-                scores={
-                    "semantic_score": match["semantic_score"],
-                    "reciprocity_score": match["reciprocity_score"],
-                    "availability_score": match["availability_score"]
-                }
-            )
-            
-            enriched_matches.append({
+            enriched = {
                 **match,
                 "user1": user1,
                 "user2": user2,
                 "skill1_teach": skill1_teach,
                 "skill2_teach": skill2_teach,
-                "explanation": explanation
+                "explanation": stored_explanations.get(match_key(match))
+            }
+            enriched_matches.append(enriched)
+            if enriched["explanation"]:
+                continue
+            
+            explanation_inputs.append({
+                "user1_name": user1["name"],
+                "user2_name": user2["name"],
+                "skill1_teach": skill1_teach["name"],
+                "skill1_learn": skill1_learn["name"] if skill1_learn else "new skills",
+                "skill2_teach": skill2_teach["name"],
+                "skill2_learn": skill2_learn["name"] if skill2_learn else "new skills",
+                "scores": {
+                    "semantic_score": match["semantic_score"],
+                    "reciprocity_score": match["reciprocity_score"],
+                    "availability_score": match["availability_score"]
+                }
             })
         
+        explanations = await ai_assistant.generate_match_explanations(explanation_inputs)
+        unexplained = [enriched for enriched in enriched_matches if not enriched["explanation"]]
+        for enriched, explanation in zip(unexplained, explanations):
+            enriched["explanation"] = explanation
+        
         return enriched_matches
     
     except Exception as e:
@@ -104,13 +122,25 @@ async def create_match(
 ):
     """
     Create a match (request skill exchange)
-    Automatically calculates scores and generates explanation
+    Scores the two TEACH skills against the best pairing of both users'
+    LEARN skills (reusing the score from discover when there is one). The
+    match is stored with a template explanation, which a background job
+    replaces with a generated one.
     """
     try:
-        # Verify skills exist and belong to correct users
-        user1_skills = await db.get_user_skills(current_user["id"])
-        user2_skills = await db.get_user_skills(match_data.user2_id)
+        # Both users with just the two TEACH skills and their LEARN skills, in one read
+        users = await db.get_users_with_skills(
+            [current_user["id"], match_data.user2_id],
+            [match_data.skill1_id, match_data.skill2_id]
+        )
+        user1 = next((u for u in users if u["id"] == current_user["id"]), None)
+        user2 = next((u for u in users if u["id"] == match_data.user2_id), None)
+        if not user1 or not user2:
+            raise HTTPException(status_code=404, detail="User not found")
+        user1_skills = user1.pop("skills")
+        user2_skills = user2.pop("skills")
         
+        # Verify skills exist and belong to correct users
         skill1 = next((s for s in user1_skills if s["id"] == match_data.skill1_id), None)
         skill2 = next((s for s in user2_skills if s["id"] == match_data.skill2_id), None)
         
@@ -126,30 +156,28 @@ async def create_match(
             raise HTTPException(status_code=400, detail="Skill 2 must be a TEACH skill")
         
         # Calculate match scores
-        user1 = await db.get_user_by_id(current_user["id"])
-        user2 = await db.get_user_by_id(match_data.user2_id)
+        user1_learn = [s for s in user1_skills if s["mode"] == "LEARN"]
+        user2_learn = [s for s in user2_skills if s["mode"] == "LEARN"]
+        scored = matching_service.score_pair(user1, user2, skill1, skill2, user1_learn, user2_learn)
+        if not scored:
+            raise HTTPException(
+                status_code=400,
+                detail="Both users need a LEARN skill (and indexed skills) to be matched"
+            )
+        scores = {key: scored[key] for key in SCORE_KEYS}
+        skill1_learn = next(s for s in user1_learn if s["id"] == scored["learn_skill_id"])
+        skill2_learn = next(s for s in user2_learn if s["id"] == scored["teacher_learn_skill_id"])
         
-        # For score calculation, we need the corresponding LEARN skills
-        # This is simplified - in production, you'd pass the actual learn skills
-        scores = {
-            "semantic_score": 0.8,  # Placeholder - would calculate from embeddings
-            "reciprocity_score": 0.7,
-            "availability_score": 0.6,
-            "preference_score": 0.9,
-            "total_score": 0.75
+        explanation_input = {
+            "user1_name": user1["name"],
+            "user2_name": user2["name"],
+            "skill1_teach": skill1["name"],
+            "skill1_learn": skill1_learn["name"],
+            "skill2_teach": skill2["name"],
+            "skill2_learn": skill2_learn["name"],
+            "scores": scores
         }
         
-        # Generate explanation
-        explanation = await ai_assistant.generate_match_explanation(
-            user1_name=user1["name"],
-            user2_name=user2["name"],
-            skill1_teach=skill1["name"],
-            skill1_learn="complementary skills",
-            skill2_teach=skill2["name"],
-            skill2_learn="complementary skills",
-            scores=scores
-        )
-        
         # Create match
         match_dict = {
             "user1_id": current_user["id"],
@@ -157,7 +185,7 @@ async def create_match(
             "skill1_id": match_data.skill1_id,
             "skill2_id": match_data.skill2_id,
             **scores,
-            "explanation": explanation,
+            "explanation": ai_assistant.template_explanation(user2["name"], skill1["name"], skill2["name"]),
             "status": "PENDING"
         }
         
@@ -165,6 +193,8 @@ async def create_match(
         if not match:
             raise HTTPException(status_code=500, detail="Failed to create match")
         
+        await enqueue_explanation_upgrade(match["id"], explanation_input)
+        
         return match
     
     except HTTPException:
@@ -182,9 +212,7 @@ async def update_match(
 ):
     """Update match status (accept/reject)"""
     # Verify user is part of this match
-    matches = await db.get_user_matches(current_user["id"])
-    match = next((m for m in matches if m["id"] == match_id), None)
-    
+    match = await db.get_match(match_id, current_user["id"], columns=MATCH_PARTICIPANT_COLUMNS)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
@@ -201,10 +229,8 @@ async def get_match(
     match_id: str,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get specific match details"""
-    matches = await db.get_user_matches(current_user["id"])
-    match = next((m for m in matches if m["id"] == match_id), None)
-    
+    """Get specific match details (with both users and skills)"""
+    match = await db.get_match(match_id, current_user["id"])
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
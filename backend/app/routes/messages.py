@@ -3,11 +3,12 @@ Messages API Routes
 Handles messaging between matched users
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from app.models import MessageCreate, MessageResponse
-from app.database import db
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from app.models import MessageCreate, MessageResponse, InboxEntry
+from app.database import db, MATCH_PARTICIPANT_COLUMNS
 from app.auth import get_current_user
-from typing import List
+from app.utils import decode_cursor, encode_cursor, parse_timestamp
+from typing import List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,28 +16,106 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/messages", tags=["messages"])
 
 
+@router.get("/inbox", response_model=List[InboxEntry])
+async def get_inbox(current_user: dict = Depends(get_current_user)):
+    """
+    Get all conversations for current user, most recent first
+    Each entry carries the last message preview and unread count
+    """
+    return await db.get_user_inbox(current_user["id"])
+
+
 @router.get("/match/{match_id}", response_model=List[MessageResponse])
 async def get_match_messages(
     match_id: str,
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(50, ge=1, le=100),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get all messages for a match"""
+    """
+    Get a page of messages for a match, newest first
+    
+    Without cursors the latest page is returned. Pass the X-Before-Cursor
+    header value as `before` to scroll back, or the X-After-Cursor value as
+    `after` to fetch only messages newer than the current page.
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+    
+    try:
+        before_key = decode_cursor(before) if before else None
+        after_key = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Verify user is part of this match
-    matches = await db.get_user_matches(current_user["id"])
-    match = next((m for m in matches if m["id"] == match_id), None)
+    match = await db.get_match(match_id, current_user["id"], columns=MATCH_PARTICIPANT_COLUMNS)
     
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
     
-    messages = await db.get_match_messages(match_id, limit=limit)
+    messages = await db.get_match_messages(
+        match_id,
+        limit=limit,
+        before=before_key,
+        after=after_key
+    )
+    markers = await db.get_read_markers(match_id)
     
-    # Mark messages as read
-    await db.mark_messages_read(match_id, current_user["id"])
+    user_id = current_user["id"]
+    other_id = match["user2_id"] if match["user1_id"] == user_id else match["user1_id"]
+    my_marker = markers.get(user_id)
+    other_marker = markers.get(other_id)
+    
+    # Move our read marker up to the newest message shown. Scrolling back through
+    # history or polling an unchanged thread leaves it where it is, so no write is sent.
+    if messages:
+        newest_at = messages[0]["created_at"]
+        if not my_marker or parse_timestamp(newest_at) > parse_timestamp(my_marker):
+            await db.advance_read_marker(match_id, user_id, newest_at)
+            my_marker = newest_at
+    
+    # Read status is derived from the recipient's marker rather than stored per message
+    my_read_at = parse_timestamp(my_marker) if my_marker else None
+    other_read_at = parse_timestamp(other_marker) if other_marker else None
+    for message in messages:
+        read_at = other_read_at if message["sender_id"] == user_id else my_read_at
+        message["is_read"] = bool(read_at and parse_timestamp(message["created_at"]) <= read_at)
+    
+    if messages:
+        newest, oldest = messages[0], messages[-1]
+        response.headers["X-After-Cursor"] = encode_cursor(newest["created_at"], newest["id"])
+        # A full page means there may be older messages to scroll back to
+        if len(messages) == limit and not after_key:
+            response.headers["X-Before-Cursor"] = encode_cursor(oldest["created_at"], oldest["id"])
     
     return messages
 
 
+@router.get("/match/{match_id}/unread", response_model=dict)
+async def get_unread_count(
+    match_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the number of unread messages in a match, derived from the read marker"""
+    # Verify user is part of this match
+    match = await db.get_match(match_id, current_user["id"], columns=MATCH_PARTICIPANT_COLUMNS)
+    
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+    
+    markers = await db.get_read_markers(match_id)
+    unread_count = await db.count_unread_messages(
+        match_id,
+        current_user["id"],
+        last_read_at=markers.get(current_user["id"])
+    )
+    
+    return {"match_id": match_id, "unread_count": unread_count}
+
+
 @router.post("/", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_message(
     message_data: MessageCreate,
@@ -44,8 +123,7 @@ async def send_message(
 ):
     """Send a message in a match"""
     # Verify user is part of this match
-    matches = await db.get_user_matches(current_user["id"])
-    match = next((m for m in matches if m["id"] == message_data.match_id), None)
+    match = await db.get_match(message_data.match_id, current_user["id"], columns=MATCH_PARTICIPANT_COLUMNS)
     
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
@@ -0,0 +1,59 @@
+"""
+Metrics API Routes
+Exposes in-process latency and throughput metrics
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.auth import get_current_user
+from app.config import settings
+from app.metrics import metrics
+from app.services.ai_assistant import ai_assistant
+from app.services.matching import matching_service
+from typing import Optional
+
+
+async def require_metrics_access(current_user: dict = Depends(get_current_user)) -> dict:
+    """Allow metrics only when enabled, and only to authenticated users"""
+    if not settings.metrics_api_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return current_user
+
+
+router = APIRouter(
+    prefix="/api/metrics",
+    tags=["metrics"],
+    dependencies=[Depends(require_metrics_access)]
+)
+
+
+@router.get("/", response_model=dict)
+async def get_metrics(prefix: Optional[str] = None):
+    """
+    Get latency histograms and counters for this worker
+    Filter with a name prefix, e.g. ?prefix=db. for database operations
+    """
+    return metrics.snapshot(prefix=prefix)
+
+
+@router.get("/db", response_model=dict)
+async def get_database_metrics():
+    """Get per-method database latency, row counts and payload sizes"""
+    return metrics.snapshot(prefix="db.")
+
+
+@router.get("/semantic-cache", response_model=dict)
+async def get_semantic_cache_metrics():
+    """Get assistant semantic cache size and per-entry hit counts"""
+    if ai_assistant.semantic_cache is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        **ai_assistant.semantic_cache.snapshot(),
+        "counters": metrics.snapshot(prefix="cache.semantic.")["counters"]
+    }
+
+
+@router.get("/match-scores", response_model=dict)
+async def get_match_score_metrics():
+    """Get size and hit rate of the match score memo"""
+    return {"score_memo": matching_service.score_memo.snapshot()}
@@ -3,12 +3,14 @@ Sessions API Routes
 Handles session scheduling and management
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from app.models import SessionCreate, SessionUpdate, SessionResponse
-from app.database import db
+from app.database import db, MATCH_PARTICIPANT_COLUMNS
 from app.services.ai_assistant import ai_assistant
 from app.auth import get_current_user
+from datetime import datetime
 from typing import List
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,6 +25,31 @@ async def get_my_sessions(current_user: dict = Depends(get_current_user)):
     return sessions
 
 
+@router.get("/upcoming", response_model=List[SessionResponse])
+async def get_upcoming_sessions(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get current user's scheduled sessions that have not started yet"""
+    sessions = await db.get_upcoming_sessions(current_user["id"], limit=limit)
+    return sessions
+
+
+@router.get("/range", response_model=List[SessionResponse])
+async def get_sessions_in_range(
+    start: datetime,
+    end: datetime,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get current user's sessions scheduled between start (inclusive) and end (exclusive)"""
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    
+    sessions = await db.get_sessions_in_range(current_user["id"], start, end, limit=limit)
+    return sessions
+
+
 @router.get("/match/{match_id}", response_model=List[SessionResponse])
 async def get_match_sessions(
     match_id: str,
@@ -30,7 +57,7 @@ async def get_match_sessions(
 ):
     """Get all sessions for a match"""
     # Verify user is part of this match
-    matches = await db.get_user_matches(current_user["id"])
+    matches = await db.get_user_matches(current_user["id"], columns=MATCH_PARTICIPANT_COLUMNS)
     match = next((m for m in matches if m["id"] == match_id), None)
     
     if not match:
@@ -47,7 +74,7 @@ async def create_session(
 ):
     """Create new session"""
     # Verify user is part of this match
-    matches = await db.get_user_matches(current_user["id"])
+    matches = await db.get_user_matches(current_user["id"], columns=MATCH_PARTICIPANT_COLUMNS)
     match = next((m for m in matches if m["id"] == session_data.match_id), None)
     
     if not match:
@@ -89,11 +116,13 @@ async def generate_session_agenda(
     duration_minutes: int,
     current_user: dict = Depends(get_current_user)
 ):
-    """Generate AI-powered session agenda for a match"""
+    """
+    Generate AI-powered session agenda for a match
+    Both teaching directions are generated concurrently; agendas are cached by skill, level and duration
+    """
     try:
-        # Verify user is part of this match
-        matches = await db.get_user_matches(current_user["id"])
-        match = next((m for m in matches if m["id"] == match_id), None)
+        # Fetching the match by ID also verifies the user is part of it
+        match = await db.get_match(match_id, current_user["id"])
         
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
@@ -106,20 +135,21 @@ async def generate_session_agenda(
         skill2 = match.get("skill2", {})
         
         # Generate agenda for both directions
-        agenda1 = await ai_assistant.generate_session_agenda(
-            teacher_name=user1.get("name", "Teacher"),
-            learner_name=user2.get("name", "Learner"),
-            skill_name=skill1.get("name", "Skill"),
-            skill_level=skill1.get("level", 3),
-            duration_minutes=duration_minutes
-        )
-        
-        agenda2 = await ai_assistant.generate_session_agenda(
-            teacher_name=user2.get("name", "Teacher"),
-            learner_name=user1.get("name", "Learner"),
-            skill_name=skill2.get("name", "Skill"),
-            skill_level=skill2.get("level", 3),
-            duration_minutes=duration_minutes
+        agenda1, agenda2 = await asyncio.gather(
+            ai_assistant.generate_session_agenda(
+                teacher_name=user1.get("name", "Teacher"),
+                learner_name=user2.get("name", "Learner"),
+                skill_name=skill1.get("name", "Skill"),
+                skill_level=skill1.get("level", 3),
+                duration_minutes=duration_minutes
+            ),
+            ai_assistant.generate_session_agenda(
+                teacher_name=user2.get("name", "Teacher"),
+                learner_name=user1.get("name", "Learner"),
+                skill_name=skill2.get("name", "Skill"),
+                skill_level=skill2.get("level", 3),
+                duration_minutes=duration_minutes
+            )
         )
         
         return {
@@ -4,7 +4,7 @@ Handles skill creation, updates, and retrieval with embedding generation
 """
 
 from fastapi import APIRouter, HTTPException, Depends, status
-from app.models import SkillCreate, SkillUpdate, SkillResponse
+from app.models import SkillCreate, SkillBulkCreate, SkillUpdate, SkillResponse
 from app.database import db
 from app.services.embeddings import embeddings_service
 from app.auth import get_current_user
@@ -58,6 +58,44 @@ async def create_skill(
         raise HTTPException(status_code=500, detail=f"Failed to create skill: {str(e)}")
 
 
+@router.post("/bulk", response_model=List[SkillResponse], status_code=status.HTTP_201_CREATED)
+async def create_skills_bulk(
+    bulk_data: SkillBulkCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create or update several skills at once
+    Embeddings are generated in one batch and rows are written in one upsert
+    """
+    try:
+        skill_dicts = []
+        for skill_data in bulk_data.skills:
+            skill_dict = skill_data.model_dump()
+            skill_dict["user_id"] = current_user["id"]
+            skill_dict["availability"] = [slot.model_dump() for slot in skill_data.availability]
+            skill_dicts.append(skill_dict)
+        
+        # Generate canonical texts and embeddings in a single model call
+        for skill_dict, (canonical_text, embedding) in zip(
+            skill_dicts, embeddings_service.generate_skill_embeddings(skill_dicts)
+        ):
+            skill_dict["canonical_text"] = canonical_text
+            skill_dict["embedding"] = embedding
+        
+        skills = await db.bulk_upsert_skills(skill_dicts)
+        if not skills:
+            raise HTTPException(status_code=500, detail="Failed to create skills")
+        
+        logger.info(f"Upserted {len(skills)} skills for user {current_user['id']}")
+        return skills
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error bulk creating skills: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to create skills: {str(e)}")
+
+
 @router.patch("/{skill_id}", response_model=SkillResponse)
 async def update_skill(
     skill_id: str,
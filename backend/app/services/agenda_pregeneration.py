@@ -0,0 +1,32 @@
+"""
+Agenda Pre-generation
+Keeps agendas for the most common teach skills in the agenda cache
+"""
+
+from app.config import settings
+from app.database import db
+from app.services.ai_assistant import ai_assistant
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Session lengths accepted by AgendaGenerateRequest
+SESSION_DURATIONS = [30, 45, 60]
+
+
+async def pregenerate_popular_agendas():
+    """Generate missing agendas for the top teach skills at every session length"""
+    skills = await db.get_popular_skills("TEACH", limit=settings.agenda_pregenerate_top_skills)
+    await ai_assistant.pregenerate_agendas(skills, SESSION_DURATIONS)
+    logger.info(f"Agenda cache warmed for {len(skills)} popular skills")
+
+
+async def run_agenda_pregeneration():
+    """Refresh popular agendas every agenda_pregenerate_interval_seconds until cancelled"""
+    while True:
+        try:
+            await pregenerate_popular_agendas()
+        except Exception as e:
+            logger.error(f"Error pre-generating agendas: {e}")
+        await asyncio.sleep(settings.agenda_pregenerate_interval_seconds)
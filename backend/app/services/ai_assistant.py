@@ -3,40 +3,141 @@ AI Assistant Service
 Provides GPT-4 powered assistance with moderation and safety
 """
 
-from openai import OpenAI
+from app.cache import SingleFlight, TTLCache, content_hash
 from app.config import settings
-from typing import List, Dict, Any, Optional
+from app.metrics import metrics
+from app.services.embeddings import embeddings_service
+from app.services.llm import llm_client
+from app.services.semantic_cache import SemanticCache
+from typing import AsyncIterator, List, Dict, Any, Optional
+import asyncio
+import json
 import logging
+import re
+import time
 
 logger = logging.getLogger(__name__)
 
+CODE_DISCLAIMER = "⚠️ Example only — test in your environment before use."
+
+REFUSAL_MESSAGE = "I'm sorry, but I can't respond to that request. Please ask about technical topics, learning strategies, or session planning."
+
+ERROR_MESSAGE = "I'm having trouble processing your request right now. Please try again or rephrase your question."
+
+CHAT_SYSTEM_PROMPT = """You are a helpful technical assistant for TradeCraft, a skill exchange platform.
+
+Your role:
+- Answer concise technical questions
+- Explain concepts clearly
+- Provide code snippets (max 20 lines)
+- Help with debugging hints
+- Suggest learning strategies
+- Assist with session planning
+
+Constraints:
+- Keep responses under 300 words
+- For code: max 20 lines, always include disclaimer
+- No medical, legal, or financial advice
+- No sensitive or harmful content
+- Focus on technical skills and learning
+
+Code disclaimer template:
+"⚠️ Example only — test in your environment before use."
+"""
+
+# Context keys that don't make an answer user-specific. The page hint
+# ("context") partitions the semantic cache; identity keys are left out of
+# the prompt for cacheable requests so a cached answer never names its asker.
+SEMANTIC_CACHE_PARTITION_KEYS = ("context",)
+SEMANTIC_CACHE_IDENTITY_KEYS = ("user_id", "user_name")
+
+# Context key carrying the rolling summary of a server-held conversation
+SUMMARY_CONTEXT_KEY = "conversation_summary"
+
+LEVEL_DESCRIPTIONS = ["beginner", "elementary", "intermediate", "advanced", "expert"]
+
+
+def normalize_skill_name(name: str) -> str:
+    """Case- and whitespace-insensitive skill name, used as a cache key"""
+    return " ".join(name.lower().split())
+
+
+def _discard_task(task: asyncio.Task):
+    """Cancel a task whose result is no longer wanted, without leaving its error unretrieved"""
+    if not task.done():
+        task.cancel()
+    task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+
+async def _cancel_task(task: asyncio.Task):
+    """Cancel a task and wait until it has finished unwinding"""
+    _discard_task(task)
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+
 
 class AIAssistantService:
     """Service for AI-powered assistance and explanations"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.llm = llm_client
         self.max_code_lines = settings.max_code_lines
         self.max_explanation_length = settings.max_explanation_length
+        self.moderation_cache = TTLCache(
+            "moderation",
+            max_entries=settings.moderation_cache_max_entries,
+            ttl_seconds=settings.moderation_cache_ttl_seconds
+        )
+        self.agenda_cache = TTLCache(
+            "agenda",
+            max_entries=settings.agenda_cache_max_entries,
+            ttl_seconds=settings.agenda_cache_ttl_seconds
+        )
+        # Identical explanation/agenda prompts in flight share one upstream call
+        self.inflight = SingleFlight("llm", max_waiters=settings.llm_coalesce_max_waiters)
+        self.semantic_cache = SemanticCache(
+            max_entries=settings.semantic_cache_max_entries,
+            ttl_seconds=settings.semantic_cache_ttl_seconds,
+            threshold=settings.semantic_cache_threshold
+        ) if settings.semantic_cache_enabled else None
+    
+    async def _coalesced_completion(self, operation: str, **request) -> Any:
+        """
+        Chat completion text shared with any identical request already in flight
+        
+        Requests are identical when model, messages and every parameter match.
+        
+        Args:
+            operation: Short name for metrics, e.g. "explanation"
+            request: Arguments for the completion (model, messages, max_tokens, ...)
+        """
+        key = content_hash(json.dumps(request, sort_keys=True))
+        return await self.inflight.run(key, lambda: self.llm.chat_completion(operation=operation, **request))
     
     async def moderate_content(self, text: str) -> Dict[str, Any]:
         """
         Moderate content using OpenAI moderation API
         
+        Verdicts are cached by content hash, so repeated or regenerated
+        prompts skip the API call. Failures are not cached.
+        
         Args:
             text: Content to moderate
         
         Returns:
             Moderation result with flagged status
         """
+        key = content_hash("moderation", text)
+        cached = self.moderation_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            response = self.client.moderations.create(input=text)
-            result = response.results[0]
-            
-            return {
-                "flagged": result.flagged,
-                "categories": result.categories.model_dump() if result.flagged else {}
-            }
+            verdict = await self.llm.moderate(text)
+            self.moderation_cache.set(key, verdict)
+            return verdict
         except Exception as e:
             logger.error(f"Error moderating content: {e}")
             # Fail safe: flag as potentially unsafe
@@ -50,7 +151,8 @@ class AIAssistantService:
         skill1_learn: str,
         skill2_teach: str,
         skill2_learn: str,
-        scores: Dict[str, float]
+        scores: Dict[str, float],
+        fallback: bool = True
     ) -> str:
         """
         Generate human-readable explanation for why a match works
@@ -63,6 +165,7 @@ class AIAssistantService:
             skill2_teach: What user2 teaches
             skill2_learn: What user2 wants to learn
             scores: Match score breakdown
+            fallback: Return the template text on errors (otherwise raise)
         
         Returns:
             Natural language explanation (2-3 sentences)
@@ -90,7 +193,8 @@ Focus on:
 
 Keep it under {self.max_explanation_length} characters. Be specific and encouraging."""
 
-            response = self.client.chat.completions.create(
+            response = await self._coalesced_completion(
+                "explanation",
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant that explains skill matches clearly and concisely."},
@@ -100,7 +204,7 @@ Keep it under {self.max_explanation_length} characters. Be specific and encourag
                 temperature=0.7
             )
             
-            explanation = response.choices[0].message.content.strip()
+            explanation = response.strip()
             
             # Truncate if too long
             if len(explanation) > self.max_explanation_length:
@@ -110,8 +214,97 @@ Keep it under {self.max_explanation_length} characters. Be specific and encourag
         
         except Exception as e:
             logger.error(f"Error generating match explanation: {e}")
+            if not fallback:
+                raise
             # Fallback explanation
-            return f"{user2_name} teaches {skill2_teach} which matches what you want to learn. You teach {skill1_teach} which they want to learn. This creates a balanced skill exchange."
+            return self.template_explanation(user2_name, skill1_teach, skill2_teach)
+    
+    def template_explanation(self, user2_name: str, skill1_teach: str, skill2_teach: str) -> str:
+        """Explanation used when the model is unavailable or returns nothing usable"""
+        return f"{user2_name} teaches {skill2_teach} which matches what you want to learn. You teach {skill1_teach} which they want to learn. This creates a balanced skill exchange."
+    
+    def _parse_explanations(self, content: str) -> Dict[int, str]:
+        """Explanations by match number from a JSON array reply; malformed items are skipped"""
+        # Tolerate code fences or prose around the array
+        found = re.search(r"\[.*\]", content, re.DOTALL)
+        if not found:
+            return {}
+        try:
+            items = json.loads(found.group(0))
+        except ValueError:
+            return {}
+        
+        explanations = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            number, text = item.get("match"), item.get("explanation")
+            if isinstance(number, int) and isinstance(text, str) and text.strip():
+                explanations[number] = text.strip()
+        return explanations
+    
+    async def generate_match_explanations(self, matches: List[Dict[str, Any]]) -> List[str]:
+        """
+        Generate explanations for several matches in a single completion
+        
+        The model is asked for a JSON array of {"match": <number>,
+        "explanation": <text>}. Any match missing from the reply, or with a
+        malformed entry, gets the template explanation, as does every match
+        if the call fails.
+        
+        Args:
+            matches: Dicts with the generate_match_explanation arguments
+                (user1_name, user2_name, skill1_teach, skill1_learn,
+                skill2_teach, skill2_learn, scores)
+        
+        Returns:
+            One explanation per match, in input order
+        """
+        if not matches:
+            return []
+        if len(matches) == 1:
+            return [await self.generate_match_explanation(**matches[0])]
+        
+        descriptions = []
+        for number, match in enumerate(matches, start=1):
+            scores = match["scores"]
+            descriptions.append(f"""Match {number}:
+User 1 ({match['user1_name']}): teaches {match['skill1_teach']}, wants to learn {match['skill1_learn']}
+User 2 ({match['user2_name']}): teaches {match['skill2_teach']}, wants to learn {match['skill2_learn']}
+Scores: semantic {scores.get('semantic_score', 0):.2f}, reciprocity {scores.get('reciprocity_score', 0):.2f}, availability {scores.get('availability_score', 0):.2f}""")
+        
+        prompt = f"""For each of these skill exchange matches, write a concise, friendly explanation (2-3 sentences) of why the two users are a good match: how their skills complement each other, why the levels are compatible and any schedule alignment. Be specific and encouraging, and keep each under {self.max_explanation_length} characters.
+
+{chr(10).join(descriptions)}
+
+Reply with only a JSON array, one object per match: [{{"match": 1, "explanation": "..."}}, ...]"""
+        
+        explanations = {}
+        try:
+            response = await self._coalesced_completion(
+                "explanation_batch",
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant that explains skill matches clearly and concisely. You reply with valid JSON only."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=150 * len(matches),
+                temperature=0.7
+            )
+            explanations = self._parse_explanations(response)
+        except Exception as e:
+            logger.error(f"Error generating batched match explanations: {e}")
+        
+        results = []
+        for number, match in enumerate(matches, start=1):
+            explanation = explanations.get(number)
+            if explanation is None:
+                metrics.increment("assistant.explanations.fallbacks")
+                explanation = self.template_explanation(match["user2_name"], match["skill1_teach"], match["skill2_teach"])
+            elif len(explanation) > self.max_explanation_length:
+                explanation = explanation[:self.max_explanation_length - 3] + "..."
+            results.append(explanation)
+        return results
     
     async def generate_session_agenda(
         self,
@@ -124,6 +317,10 @@ Keep it under {self.max_explanation_length} characters. Be specific and encourag
         """
         Generate structured session agenda
         
+        The agenda only depends on the skill, level and duration (names are
+        left out of the prompt), so generated agendas are cached by
+        (normalized skill name, level, duration). The fallback is not cached.
+        
         Args:
             teacher_name: Name of teacher
             learner_name: Name of learner
@@ -134,13 +331,16 @@ Keep it under {self.max_explanation_length} characters. Be specific and encourag
         Returns:
             Structured agenda as markdown
         """
+        key = (normalize_skill_name(skill_name), skill_level, duration_minutes)
+        cached = self.agenda_cache.get(key)
+        if cached is not None:
+            return cached
+        
         try:
-            level_desc = ["beginner", "elementary", "intermediate", "advanced", "expert"][skill_level - 1]
+            level_desc = LEVEL_DESCRIPTIONS[skill_level - 1]
             
-            prompt = f"""Create a structured learning session agenda for:
+            prompt = f"""Create a structured learning session agenda for a one-on-one session:
 
-Teacher: {teacher_name}
-Learner: {learner_name}
 Skill: {skill_name}
 Learner's Level: {level_desc} ({skill_level}/5)
 Duration: {duration_minutes} minutes
@@ -153,7 +353,8 @@ Format the agenda as a numbered list with time allocations. Include:
 
 Make it practical and actionable. Total time must equal {duration_minutes} minutes."""
 
-            response = self.client.chat.completions.create(
+            response = await self._coalesced_completion(
+                "agenda",
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": "You are an expert at designing effective learning sessions."},
@@ -163,7 +364,8 @@ Make it practical and actionable. Total time must equal {duration_minutes} minut
                 temperature=0.7
             )
             
-            agenda = response.choices[0].message.content.strip()
+            agenda = response.strip()
+            self.agenda_cache.set(key, agenda)
             return agenda
         
         except Exception as e:
@@ -176,6 +378,158 @@ Make it practical and actionable. Total time must equal {duration_minutes} minut
 3. Hands-on Practice ({duration_minutes // 3} min)
 4. Q&A & Next Steps (5 min)"""
     
+    async def pregenerate_agendas(self, skills: List[Dict[str, Any]], durations: List[int]):
+        """
+        Fill the agenda cache for skills ahead of time
+        
+        Agendas already cached are skipped. Generation runs a few at a time
+        (agenda_pregenerate_concurrency) so it never takes all of GPT-4's
+        slots from interactive requests.
+        
+        Args:
+            skills: Dicts with "name" and "level"
+            durations: Session lengths to generate for each skill
+        """
+        semaphore = asyncio.Semaphore(settings.agenda_pregenerate_concurrency)
+        
+        async def generate(name: str, level: int, duration: int):
+            async with semaphore:
+                await self.generate_session_agenda("Teacher", "Learner", name, level, duration)
+        
+        pending = [
+            (skill["name"], skill["level"], duration)
+            for skill in skills
+            for duration in durations
+            if (normalize_skill_name(skill["name"]), skill["level"], duration) not in self.agenda_cache
+        ]
+        await asyncio.gather(*(generate(*args) for args in pending))
+        metrics.increment("assistant.agenda.pregenerate_requests", len(pending))
+    
+    def build_chat_messages(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, str]]:
+        """Prepend the assistant system prompt (with optional context and conversation summary) to the conversation"""
+        system_prompt = CHAT_SYSTEM_PROMPT
+        context = dict(context or {})
+        summary = context.pop(SUMMARY_CONTEXT_KEY, None)
+        if context:
+            system_prompt += f"\n\nContext: {context}"
+        if summary:
+            system_prompt += f"\n\nSummary of the earlier conversation: {summary}"
+        return [{"role": "system", "content": system_prompt}, *messages]
+    
+    async def summarize_conversation(
+        self,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, str]]
+    ) -> Optional[str]:
+        """
+        Fold conversation turns into a rolling summary
+        
+        Args:
+            previous_summary: Summary of the turns before these, if any
+            messages: Turns to add to the summary, oldest first
+        
+        Returns:
+            Updated summary, or None if summarization failed
+        """
+        try:
+            transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+            prompt = f"""Update the summary of a conversation between a user and a technical assistant.
+
+Current summary: {previous_summary or "(none)"}
+
+New turns:
+{transcript}
+
+Write the updated summary in under 150 words. Keep the topics, the user's goals and level, and any decisions or code discussed."""
+
+            response = await self.llm.chat_completion(
+                model=settings.conversation_summary_model,
+                operation="summary",
+                messages=[
+                    {"role": "system", "content": "You summarize conversations concisely and faithfully."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=250,
+                temperature=0.3
+            )
+            return response.strip()
+        
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {e}")
+            return None
+    
+    def code_disclaimer(self, text: str) -> Optional[str]:
+        """Disclaimer to append to a response containing code, or None if not needed"""
+        if "```" in text or "def " in text or "function " in text:
+            if "⚠️" not in text:
+                return f"\n\n{CODE_DISCLAIMER}"
+        return None
+    
+    def _semantic_cache_partition(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """
+        Semantic cache partition for a request, or None if it must bypass the cache
+        
+        Only the opening questions of a conversation are cached (later turns
+        depend on the history), and only when the context holds nothing but
+        the user's identity and the page hint.
+        """
+        if self.semantic_cache is None:
+            return None
+        
+        user_turns = sum(1 for message in messages if message["role"] == "user")
+        allowed_keys = SEMANTIC_CACHE_PARTITION_KEYS + SEMANTIC_CACHE_IDENTITY_KEYS
+        if user_turns > settings.semantic_cache_max_user_turns or any(key not in allowed_keys for key in context or {}):
+            metrics.increment("cache.semantic.bypass")
+            return None
+        
+        return content_hash(*((context or {}).get(key) for key in SEMANTIC_CACHE_PARTITION_KEYS))
+    
+    async def _check_semantic_cache(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Look up the last user message in the semantic cache
+        
+        Returns:
+            {"answer": cached answer or None, "context": context to prompt with,
+            "partition"/"embedding": where to store a fresh answer (None if not cacheable)}
+        """
+        lookup = {"answer": None, "context": context, "partition": None, "embedding": None}
+        partition = self._semantic_cache_partition(messages, context)
+        if partition is None:
+            return lookup
+        
+        try:
+            embedding = await asyncio.to_thread(embeddings_service.generate_embedding, messages[-1]["content"])
+        except Exception as e:
+            logger.warning(f"Semantic cache bypassed, embedding failed: {e}")
+            metrics.increment("cache.semantic.bypass")
+            return lookup
+        
+        entry = self.semantic_cache.lookup(embedding, partition)
+        shared_context = {key: context[key] for key in SEMANTIC_CACHE_PARTITION_KEYS if key in (context or {})}
+        return {
+            "answer": entry["answer"] if entry else None,
+            "context": shared_context or None,
+            "partition": partition,
+            "embedding": embedding
+        }
+    
+    def _store_semantic_answer(self, lookup: Dict[str, Any], question: str, answer: str):
+        """Cache a freshly generated answer (without disclaimer) if the request was cacheable"""
+        if lookup["embedding"] is not None and answer:
+            self.semantic_cache.store(lookup["embedding"], lookup["partition"], question, answer)
+    
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
@@ -184,6 +538,9 @@ Make it practical and actionable. Total time must equal {duration_minutes} minut
         """
         Generate AI assistant response
         
+        With the semantic cache enabled, a question close enough to an earlier
+        one is answered from the cache (after moderation) without calling the model.
+        
         Args:
             messages: Conversation history
             context: Optional context (user info, current match, etc.)
@@ -192,61 +549,130 @@ Make it practical and actionable. Total time must equal {duration_minutes} minut
             Assistant response with safety disclaimers
         """
         try:
-            # Moderate user input
+            # Moderate user input while the cache lookup and completion are
+            # already running; the completion is cancelled if the input gets flagged
             last_message = messages[-1]["content"]
-            moderation = await self.moderate_content(last_message)
+            moderation_task = asyncio.create_task(self.moderate_content(last_message))
+            completion_task = None
             
-            if moderation["flagged"]:
-                return "I'm sorry, but I can't respond to that request. Please ask about technical topics, learning strategies, or session planning."
+            try:
+                lookup = await self._check_semantic_cache(messages, context)
+                if lookup["answer"] is None:
+                    completion_task = asyncio.create_task(self.llm.chat_completion(
+                        model="gpt-4",
+                        operation="chat",
+                        messages=self.build_chat_messages(messages, lookup["context"]),
+                        max_tokens=500,
+                        temperature=0.7
+                    ))
+                
+                moderation = await moderation_task
+                if moderation["flagged"]:
+                    return REFUSAL_MESSAGE
+                
+                if lookup["answer"] is not None:
+                    assistant_response = lookup["answer"]
+                else:
+                    response = await completion_task
+                    assistant_response = response.strip()
+                    self._store_semantic_answer(lookup, last_message, assistant_response)
+            finally:
+                _discard_task(moderation_task)
+                if completion_task is not None:
+                    _discard_task(completion_task)
             
-            # Build system prompt
-            system_prompt = """You are a helpful technical assistant for TradeCraft, a skill exchange platform.
-
-Your role:
-- Answer concise technical questions
-- Explain concepts clearly
-- Provide code snippets (max 20 lines)
-- Help with debugging hints
-- Suggest learning strategies
-- Assist with session planning
-
-Constraints:
-- Keep responses under 300 words
-- For code: max 20 lines, always include disclaimer
-- No medical, legal, or financial advice
-- No sensitive or harmful content
-- Focus on technical skills and learning
-
-Code disclaimer template:
-"⚠️ Example only — test in your environment before use."
-"""
+            # Add disclaimer if code is present
+            return assistant_response + (self.code_disclaimer(assistant_response) or "")
+        
+        except Exception as e:
+            logger.error(f"Error in chat completion: {e}")
+            return ERROR_MESSAGE
+    
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, str]]:
+        """
+        Stream AI assistant response as events
+        
+        Yields {"type": "token", "content": ...} for each text delta as it
+        arrives, then {"type": "trailer", "content": ...} with the code
+        disclaimer if the finished text needs one. A refused or failed request
+        yields a single {"type": "error", ...} event instead of tokens (or
+        after the tokens already sent). Time to first token, measured from
+        the start of the call, is recorded as "assistant.chat.ttft". A semantic
+        cache hit is sent as a single token event.
+        
+        Args:
+            messages: Conversation history
+            context: Optional context (user info, current match, etc.)
+        """
+        started_at = time.perf_counter()
+        stream = None
+        first_delta_task = None
+        try:
+            # Moderation runs while the cache lookup and completion start; no
+            # token is sent until the input has been cleared
+            last_message = messages[-1]["content"]
+            moderation_task = asyncio.create_task(self.moderate_content(last_message))
             
-            # Add context if available
-            if context:
-                system_prompt += f"\n\nContext: {context}"
+            try:
+                lookup = await self._check_semantic_cache(messages, context)
+                if lookup["answer"] is None:
+                    stream = self.llm.stream_chat_completion(
+                        model="gpt-4",
+                        operation="chat_stream",
+                        messages=self.build_chat_messages(messages, lookup["context"]),
+                        max_tokens=500,
+                        temperature=0.7
+                    )
+                    first_delta_task = asyncio.create_task(anext(stream, None))
+                
+                moderation = await moderation_task
+            finally:
+                _discard_task(moderation_task)
             
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    *messages
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
+            if moderation["flagged"]:
+                yield {"type": "error", "content": REFUSAL_MESSAGE}
+                return
             
-            assistant_response = response.choices[0].message.content.strip()
+            if lookup["answer"] is not None:
+                metrics.observe("assistant.chat.ttft", (time.perf_counter() - started_at) * 1000)
+                yield {"type": "token", "content": lookup["answer"]}
+                disclaimer = self.code_disclaimer(lookup["answer"])
+                if disclaimer:
+                    yield {"type": "trailer", "content": disclaimer}
+                return
             
-            # Add disclaimer if code is present
-            if "```" in assistant_response or "def " in assistant_response or "function " in assistant_response:
-                if "⚠️" not in assistant_response:
-                    assistant_response += "\n\n⚠️ Example only — test in your environment before use."
+            parts = []
+            delta = await first_delta_task
+            while delta is not None:
+                if not parts:
+                    metrics.observe("assistant.chat.ttft", (time.perf_counter() - started_at) * 1000)
+                parts.append(delta)
+                yield {"type": "token", "content": delta}
+                delta = await anext(stream, None)
+            
+            # The disclaimer depends on the whole answer, so it follows the stream
+            answer = "".join(parts)
+            self._store_semantic_answer(lookup, last_message, answer.strip())
+            disclaimer = self.code_disclaimer(answer)
+            if disclaimer:
+                yield {"type": "trailer", "content": disclaimer}
             
-            return assistant_response
+            metrics.observe("assistant.chat.stream_total", (time.perf_counter() - started_at) * 1000)
         
         except Exception as e:
-            logger.error(f"Error in chat completion: {e}")
-            return "I'm having trouble processing your request right now. Please try again or rephrase your question."
+            logger.error(f"Error in streaming chat completion: {e}")
+            yield {"type": "error", "content": ERROR_MESSAGE}
+        
+        finally:
+            # Stop the completion when flagged, failed or abandoned by the client
+            if first_delta_task is not None:
+                await _cancel_task(first_delta_task)
+            if stream is not None:
+                await stream.aclose()
 
 
 # Global AI assistant service instance
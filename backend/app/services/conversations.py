@@ -0,0 +1,150 @@
+"""
+Conversation Store
+Server-held assistant conversations, so clients send only the new message
+"""
+
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import metrics
+from app.services.ai_assistant import ai_assistant
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Rough token estimate for English text; close enough for budgeting prompts
+CHARS_PER_TOKEN = 4
+
+# Hard cap on stored turns in case summarization keeps failing
+MAX_STORED_TURNS = 100
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class Conversation:
+    """One user's conversation: a summary of older turns plus the recent ones verbatim"""
+
+    __slots__ = ("id", "user_id", "summary", "turns", "summarizing")
+
+    def __init__(self, conversation_id: str, user_id: str):
+        self.id = conversation_id
+        self.user_id = user_id
+        self.summary: Optional[str] = None
+        # (role, content) pairs, oldest first
+        self.turns: List[Tuple[str, str]] = []
+        self.summarizing = False
+
+    def unsummarized_tokens(self) -> int:
+        return sum(estimate_tokens(content) for _, content in self.turns)
+
+
+class ConversationStore:
+    """
+    In-process store of assistant conversations
+
+    Conversations expire after a period of inactivity. Once the verbatim
+    turns grow past a threshold, the older ones are folded into a rolling
+    summary in the background, and prompts are built from the summary plus
+    as many recent turns as fit the token budget.
+    """
+
+    def __init__(self):
+        self.conversations = TTLCache(
+            "conversations",
+            max_entries=settings.conversation_max_entries,
+            ttl_seconds=settings.conversation_ttl_seconds
+        )
+        # Keep references to background summaries so they aren't garbage collected
+        self.tasks: Set[asyncio.Task] = set()
+
+    def create(self, user_id: str) -> Conversation:
+        """Start a new conversation for a user"""
+        conversation = Conversation(str(uuid.uuid4()), user_id)
+        self.conversations.set(conversation.id, conversation)
+        return conversation
+
+    def get(self, conversation_id: str, user_id: str) -> Optional[Conversation]:
+        """A user's conversation, or None if unknown, expired or owned by someone else"""
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None or conversation.user_id != user_id:
+            return None
+        return conversation
+
+    def build_prompt(self, conversation: Conversation, message: str) -> List[Dict[str, str]]:
+        """
+        Messages to send for a new user message, within the prompt token budget
+
+        The summary (passed separately as context) is counted first, then the
+        most recent turns are added newest-first until the budget runs out.
+        The new message is always included.
+
+        Args:
+            conversation: Conversation the message belongs to
+            message: New user message
+
+        Returns:
+            Recent turns plus the new message, oldest first
+        """
+        budget = settings.conversation_prompt_token_budget - estimate_tokens(message)
+        if conversation.summary:
+            budget -= estimate_tokens(conversation.summary)
+
+        recent = []
+        for role, content in reversed(conversation.turns):
+            tokens = estimate_tokens(content)
+            if tokens > budget:
+                break
+            budget -= tokens
+            recent.append({"role": role, "content": content})
+
+        recent.reverse()
+        return [*recent, {"role": "user", "content": message}]
+
+    def record_turn(self, conversation: Conversation, message: str, answer: str):
+        """Append a completed exchange and compact older turns if the history has grown"""
+        conversation.turns.append(("user", message))
+        conversation.turns.append(("assistant", answer))
+        if not conversation.summarizing and len(conversation.turns) > MAX_STORED_TURNS:
+            del conversation.turns[:len(conversation.turns) - MAX_STORED_TURNS]
+
+        # Writing back refreshes the inactivity TTL
+        self.conversations.set(conversation.id, conversation)
+
+        if (
+            not conversation.summarizing
+            and conversation.unsummarized_tokens() > settings.conversation_summarize_after_tokens
+        ):
+            conversation.summarizing = True
+            task = asyncio.create_task(self._summarize(conversation))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _summarize(self, conversation: Conversation):
+        """Fold all but the most recent turns into the conversation summary"""
+        try:
+            older = conversation.turns[:-settings.conversation_keep_recent_turns or None]
+            if not older:
+                return
+
+            summary = await ai_assistant.summarize_conversation(
+                conversation.summary,
+                [{"role": role, "content": content} for role, content in older]
+            )
+            if summary is None:
+                return
+
+            # Turns recorded while summarizing come after the summarized ones
+            conversation.summary = summary
+            del conversation.turns[:len(older)]
+            metrics.increment("assistant.conversation.summaries")
+        finally:
+            conversation.summarizing = False
+
+
+# Global conversation store instance
+conversation_store = ConversationStore()
@@ -4,7 +4,7 @@ Generates vector embeddings using all-MiniLM-L6-v2 model
 """
 
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import numpy as np
 import logging
 
@@ -15,14 +15,27 @@ class EmbeddingsService:
     """Service for generating embeddings from text"""
     
     def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        """Initialize the embedding model"""
-        try:
-            self.model = SentenceTransformer(model_name)
-            self.dimension = 384  # all-MiniLM-L6-v2 produces 384-dimensional embeddings
-            logger.info(f"Loaded embedding model: {model_name}")
-        except Exception as e:
-            logger.error(f"Error loading embedding model: {e}")
-            raise
+        """Initialize the service; the model itself is loaded on first use"""
+        self.model_name = model_name
+        self.dimension = 384  # all-MiniLM-L6-v2 produces 384-dimensional embeddings
+        self._model = None
+    
+    @property
+    def model(self) -> SentenceTransformer:
+        """
+        Embedding model, loaded lazily
+        
+        Keeps imports of the matching code (cosine_similarity only) free of
+        the model download, e.g. for offline benchmarks.
+        """
+        if self._model is None:
+            try:
+                self._model = SentenceTransformer(self.model_name)
+                logger.info(f"Loaded embedding model: {self.model_name}")
+            except Exception as e:
+                logger.error(f"Error loading embedding model: {e}")
+                raise
+        return self._model
     
     def canonicalize_skill(self, skill: Dict[str, Any]) -> str:
         """
@@ -84,6 +97,30 @@ class EmbeddingsService:
             logger.error(f"Error generating embedding: {e}")
             raise
     
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embedding vectors for many texts in one batched model call
+        
+        Args:
+            texts: Input texts to embed
+        
+        Returns:
+            List of normalized embedding vectors, in input order
+        """
+        if not texts:
+            return []
+        
+        try:
+            embeddings = self.model.encode(texts, convert_to_numpy=True)
+            
+            # Normalize each row to unit length (for cosine similarity)
+            embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+            
+            return embeddings.tolist()
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {e}")
+            raise
+    
     def generate_skill_embedding(self, skill: Dict[str, Any]) -> tuple[str, List[float]]:
         """
         Generate embedding for a skill object
@@ -98,6 +135,20 @@ class EmbeddingsService:
         embedding = self.generate_embedding(canonical_text)
         return canonical_text, embedding
     
+    def generate_skill_embeddings(self, skills: List[Dict[str, Any]]) -> List[tuple[str, List[float]]]:
+        """
+        Generate embeddings for several skill objects in one batch
+        
+        Args:
+            skills: Skill dictionaries
+        
+        Returns:
+            List of (canonical_text, embedding_vector) tuples, in input order
+        """
+        canonical_texts = [self.canonicalize_skill(skill) for skill in skills]
+        embeddings = self.generate_embeddings(canonical_texts)
+        return list(zip(canonical_texts, embeddings))
+    
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """
         Calculate cosine similarity between two vectors
@@ -0,0 +1,130 @@
+"""
+Fake LLM Provider
+Deterministic local stand-in for OpenAI, for offline load testing and benchmarks
+"""
+
+from app.cache import content_hash
+from app.config import settings
+from app.services.llm_providers import LLMProvider, TransientLLMError
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import json
+import math
+import random
+import re
+
+# Moderation flags any text containing this marker
+FLAG_MARKER = "[flag]"
+
+VOCABULARY = (
+    "practice", "session", "concept", "example", "function", "pattern", "skill",
+    "learn", "exercise", "review", "project", "debug", "explain", "build",
+    "step", "together", "level", "teach", "complement", "schedule", "goal",
+    "code", "test", "refactor", "question", "feedback", "focus", "progress"
+)
+
+# "Match N:" lines of a batched explanation prompt
+MATCH_LINE = re.compile(r"^Match (\d+):", re.MULTILINE)
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Simulated chat and moderation endpoints
+
+    Reply text is derived from a hash of the request, so the same prompt
+    always gets the same answer. Prompts for a batched JSON reply get a
+    valid JSON array. Time to first token is drawn from the configured
+    latency distribution (fixed, uniform or lognormal around the median),
+    then each token takes token_interval_ms. A fraction error_rate of
+    requests fail with TransientLLMError once their latency has passed, as
+    a timeout or rate limit would. Latencies and failures come from one
+    seeded random sequence, so a run is reproducible for the same request
+    order. Calls per endpoint are counted in `calls`.
+    """
+
+    def __init__(
+        self,
+        latency_distribution: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        latency_spread: Optional[float] = None,
+        token_interval_ms: Optional[float] = None,
+        moderation_latency_ms: Optional[float] = None,
+        error_rate: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        def pick(value, default):
+            return default if value is None else value
+
+        self.latency_distribution = pick(latency_distribution, settings.fake_llm_latency_distribution)
+        self.latency_ms = pick(latency_ms, settings.fake_llm_latency_ms)
+        self.latency_spread = pick(latency_spread, settings.fake_llm_latency_spread)
+        self.token_interval_ms = pick(token_interval_ms, settings.fake_llm_token_interval_ms)
+        self.moderation_latency_ms = pick(moderation_latency_ms, settings.fake_llm_moderation_latency_ms)
+        self.error_rate = pick(error_rate, settings.fake_llm_error_rate)
+        self.random = random.Random(pick(seed, settings.fake_llm_seed))
+        self.calls: Counter = Counter()
+
+        if self.latency_distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown fake LLM latency distribution: {self.latency_distribution}")
+
+    def _latency(self, median_ms: float) -> float:
+        """Sampled latency in seconds"""
+        if self.latency_distribution == "uniform":
+            ms = self.random.uniform(median_ms * (1 - self.latency_spread), median_ms * (1 + self.latency_spread))
+        elif self.latency_distribution == "lognormal":
+            ms = median_ms * math.exp(self.random.gauss(0, self.latency_spread))
+        else:
+            ms = median_ms
+        return max(ms, 0) / 1000
+
+    def _fails(self) -> bool:
+        return self.random.random() < self.error_rate
+
+    def _reply_tokens(self, messages: List[Dict[str, str]], max_tokens: Optional[int]) -> List[str]:
+        """Deterministic reply for a conversation, split into tokens"""
+        rng = random.Random(content_hash(json.dumps(messages, sort_keys=True)))
+        prompt = messages[-1]["content"]
+
+        numbers = MATCH_LINE.findall(prompt)
+        if numbers and "JSON" in prompt:
+            reply = json.dumps([
+                {"match": int(number), "explanation": " ".join(rng.choice(VOCABULARY) for _ in range(25)).capitalize() + "."}
+                for number in numbers
+            ])
+            return [reply[i:i + 4] for i in range(0, len(reply), 4)]
+
+        limit = max_tokens or 300
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(min(20, limit), min(120, limit)))]
+        return [f"{word} " for word in words]
+
+    async def chat_completion(self, model: str, messages: List[Dict[str, str]], **kwargs) -> str:
+        self.calls["chat"] += 1
+        latency, fails = self._latency(self.latency_ms), self._fails()
+        tokens = self._reply_tokens(messages, kwargs.get("max_tokens"))
+
+        await asyncio.sleep(latency + len(tokens) * self.token_interval_ms / 1000)
+        if fails:
+            raise TransientLLMError(f"Simulated {model} chat failure")
+        return "".join(tokens).strip()
+
+    async def stream_chat_completion(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        self.calls["chat_stream"] += 1
+        latency, fails = self._latency(self.latency_ms), self._fails()
+
+        await asyncio.sleep(latency)
+        if fails:
+            raise TransientLLMError(f"Simulated {model} stream failure")
+        for token in self._reply_tokens(messages, kwargs.get("max_tokens")):
+            yield token
+            await asyncio.sleep(self.token_interval_ms / 1000)
+
+    async def moderate(self, text: str) -> Dict[str, Any]:
+        self.calls["moderation"] += 1
+        latency, fails = self._latency(self.moderation_latency_ms), self._fails()
+
+        await asyncio.sleep(latency)
+        if fails:
+            raise TransientLLMError("Simulated moderation failure")
+        flagged = FLAG_MARKER in text.lower()
+        return {"flagged": flagged, "categories": {"simulated": True} if flagged else {}}
@@ -0,0 +1,165 @@
+"""
+Job Queue
+In-process async background jobs, persisted in the jobs table
+"""
+
+from app.config import settings
+from app.database import db
+from app.metrics import metrics
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    Background job queue served by a fixed number of worker tasks
+
+    enqueue() records the job in the jobs table and hands it to the
+    workers. A worker claims a job (PENDING -> RUNNING, guarded by
+    updated_at) before running its handler, so a job recovered by several
+    processes at startup still runs once. Failures are retried with jittered
+    exponential backoff until max_attempts, then the job is marked FAILED
+    with the error. On start, PENDING jobs and RUNNING jobs abandoned by a
+    crashed process (untouched for job_stale_seconds) are picked up again.
+
+    Metrics: "jobs.<kind>" latency, and "jobs.<kind>.enqueued" / ".retries"
+    / ".failed" counters.
+    """
+
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+        self.workers: List[asyncio.Task] = []
+        # Retries waiting out their backoff
+        self.timers: Set[asyncio.Task] = set()
+
+    def handler(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        """Register the coroutine that runs jobs of a kind"""
+        def register(func: JobHandler) -> JobHandler:
+            self.handlers[kind] = func
+            return func
+        return register
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        max_attempts: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Persist a job and queue it for the workers
+
+        Args:
+            kind: Registered handler name
+            payload: JSON-serializable handler input
+            max_attempts: Attempts before the job is marked FAILED (default job_max_attempts)
+
+        Returns:
+            The job row, or None if it could not be recorded
+        """
+        job = await db.create_job({
+            "kind": kind,
+            "payload": payload,
+            "max_attempts": max_attempts or settings.job_max_attempts
+        })
+        if not job:
+            logger.error(f"Failed to enqueue {kind} job")
+            return None
+
+        metrics.increment(f"jobs.{kind}.enqueued")
+        self.queue.put_nowait(job)
+        return job
+
+    async def start(self, workers: Optional[int] = None):
+        """Start the workers and requeue unfinished jobs from earlier runs"""
+        for _ in range(workers or settings.job_workers):
+            self.workers.append(asyncio.create_task(self._work()))
+
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.job_stale_seconds)
+        jobs = await db.get_runnable_jobs(stale_before.isoformat(), limit=settings.job_recovery_limit)
+        for job in jobs:
+            self.queue.put_nowait(job)
+        if jobs:
+            logger.info(f"Recovered {len(jobs)} unfinished jobs")
+
+    async def stop(self):
+        """Stop the workers; unfinished jobs stay in the table for the next start"""
+        tasks = [*self.workers, *self.timers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers.clear()
+
+    async def join(self):
+        """Wait until every queued job (including pending retries) has been processed"""
+        while True:
+            await self.queue.join()
+            if not self.timers:
+                return
+            await asyncio.gather(*self.timers, return_exceptions=True)
+
+    async def _work(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(f"Error running job {job.get('id')}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]):
+        kind = job["kind"]
+        job = await db.claim_job(job)
+        if not job:
+            return
+
+        handler = self.handlers.get(kind)
+        if handler is None:
+            await db.update_job(job["id"], {"status": "FAILED", "last_error": f"No handler for {kind}"})
+            return
+
+        started_at = time.perf_counter()
+        try:
+            await handler(job["payload"])
+        except Exception as e:
+            await self._fail(job, e)
+            return
+
+        metrics.observe(f"jobs.{kind}", (time.perf_counter() - started_at) * 1000)
+        await db.update_job(job["id"], {"status": "DONE", "last_error": None})
+
+    async def _fail(self, job: Dict[str, Any], error: Exception):
+        """Schedule a retry, or mark the job FAILED once its attempts are used up"""
+        kind = job["kind"]
+        if job["attempts"] >= job["max_attempts"]:
+            metrics.increment(f"jobs.{kind}.failed")
+            logger.error(f"Job {job['id']} ({kind}) failed after {job['attempts']} attempts: {error}")
+            await db.update_job(job["id"], {"status": "FAILED", "last_error": str(error)})
+            return
+
+        metrics.increment(f"jobs.{kind}.retries")
+        job = await db.update_job(job["id"], {"status": "PENDING", "last_error": str(error)})
+        if not job:
+            return
+
+        delay = random.uniform(0, settings.job_retry_base_delay * 2 ** (job["attempts"] - 1))
+        timer = asyncio.create_task(self._requeue_after(job, delay))
+        self.timers.add(timer)
+        timer.add_done_callback(self.timers.discard)
+
+    async def _requeue_after(self, job: Dict[str, Any], delay: float):
+        await asyncio.sleep(delay)
+        self.queue.put_nowait(job)
+
+
+# Global job queue instance
+job_queue = JobQueue()
@@ -0,0 +1,181 @@
+"""
+LLM Client
+Shared async LLM client with per-model concurrency limits and retries
+"""
+
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+from app.config import settings
+from app.metrics import metrics
+from app.services.llm_providers import LLMProvider, OpenAIProvider, TransientLLMError
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Failures worth retrying: the request may well succeed a moment later
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError, TransientLLMError)
+
+
+def create_provider() -> LLMProvider:
+    """Create the LLM provider selected by settings.llm_provider"""
+    if settings.llm_provider == "fake":
+        from app.services.fake_llm import FakeLLMProvider
+        return FakeLLMProvider()
+    return OpenAIProvider()
+
+
+class LLMClient:
+    """
+    Async LLM client shared by every AI feature
+
+    Requests go to the configured provider (OpenAI, or the local fake for
+    load tests). Each model has its own semaphore so a burst of slow GPT-4
+    calls queues up instead of opening unbounded requests, and time spent
+    waiting for a slot is recorded as "llm.queue_wait.<model>".
+    """
+
+    def __init__(self, provider: Optional[LLMProvider] = None):
+        self.provider = provider or create_provider()
+        self.model_limits = settings.openai_model_concurrency_map
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, model: str) -> asyncio.Semaphore:
+        """Concurrency gate for a model, created on first use"""
+        semaphore = self.semaphores.get(model)
+        if semaphore is None:
+            limit = self.model_limits.get(model, settings.openai_max_concurrency)
+            semaphore = self.semaphores[model] = asyncio.Semaphore(limit)
+        return semaphore
+
+    @asynccontextmanager
+    async def _slot(self, model: str):
+        """Hold one of the model's concurrency slots, recording how long it took to get it"""
+        queued_at = time.perf_counter()
+        async with self._semaphore(model):
+            metrics.observe(f"llm.queue_wait.{model}", (time.perf_counter() - queued_at) * 1000)
+            yield
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt"""
+        ceiling = min(settings.openai_retry_max_delay, settings.openai_retry_base_delay * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    async def call(self, model: str, operation: str, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run an OpenAI request under the model's semaphore, retrying transient errors
+
+        Args:
+            model: Model the request targets (selects the semaphore)
+            operation: Short name for metrics, e.g. "chat" or "explanation"
+            request: Zero-argument coroutine factory issuing the request
+
+        Returns:
+            The provider's response
+
+        Raises:
+            The last error once retries are exhausted, or any non-retryable error
+        """
+        attempt = 0
+        while True:
+            async with self._slot(model):
+                started_at = time.perf_counter()
+                try:
+                    response = await request()
+                    metrics.observe(f"llm.{operation}.{model}", (time.perf_counter() - started_at) * 1000)
+                    return response
+                except RETRYABLE_ERRORS as e:
+                    metrics.increment(f"llm.errors.{model}")
+                    if attempt >= settings.openai_max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.warning(f"LLM {operation} on {model} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                except Exception:
+                    metrics.increment(f"llm.errors.{model}")
+                    raise
+
+            # Back off outside the semaphore so waiting retries don't hold a slot
+            metrics.increment(f"llm.retries.{model}")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4",
+        operation: str = "chat",
+        **kwargs
+    ) -> str:
+        """Create a chat completion and return its text"""
+        return await self.call(
+            model,
+            operation,
+            lambda: self.provider.chat_completion(model, messages, **kwargs)
+        )
+
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = "gpt-4",
+        operation: str = "chat",
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion as text deltas
+
+        The model's slot is held until the stream ends. Transient errors are
+        retried only before the first token; once text has been yielded a
+        failure is raised to the caller. Time to first token is recorded as
+        "llm.ttft.<model>".
+        """
+        attempt = 0
+        while True:
+            async with self._slot(model):
+                started_at = time.perf_counter()
+                first_token_at = None
+                try:
+                    async with aclosing(self.provider.stream_chat_completion(model, messages, **kwargs)) as deltas:
+                        async for delta in deltas:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                metrics.observe(f"llm.ttft.{model}", (first_token_at - started_at) * 1000)
+                            yield delta
+                    metrics.observe(f"llm.{operation}.{model}", (time.perf_counter() - started_at) * 1000)
+                    return
+                except RETRYABLE_ERRORS as e:
+                    metrics.increment(f"llm.errors.{model}")
+                    if first_token_at is not None or attempt >= settings.openai_max_retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.warning(f"LLM {operation} stream on {model} failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                except Exception:
+                    metrics.increment(f"llm.errors.{model}")
+                    raise
+
+            metrics.increment(f"llm.retries.{model}")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def moderate(self, text: str) -> Dict[str, Any]:
+        """Moderate a piece of text, returning {"flagged", "categories"}"""
+        return await self.call(
+            "moderation",
+            "moderation",
+            lambda: self.provider.moderate(text)
+        )
+
+    async def aclose(self):
+        """Close the provider's connections"""
+        await self.provider.aclose()
+
+
+# Global LLM client instance
+llm_client = LLMClient()
@@ -0,0 +1,84 @@
+"""
+LLM Providers
+Interface for chat and moderation backends, and the OpenAI implementation
+"""
+
+from abc import ABC, abstractmethod
+from openai import AsyncOpenAI
+from app.config import settings
+from typing import Any, AsyncIterator, Dict, List
+import httpx
+
+
+class TransientLLMError(Exception):
+    """A provider failure that may succeed on retry (timeouts, rate limits, 5xx)"""
+
+
+class LLMProvider(ABC):
+    """
+    Backend that LLMClient sends requests to
+
+    Providers deal in plain values: completions return their text, streams
+    yield text deltas and moderation returns {"flagged", "categories"}.
+    Concurrency limits, retries and metrics are handled by LLMClient.
+    """
+
+    @abstractmethod
+    async def chat_completion(self, model: str, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Complete a chat and return the assistant's text"""
+
+    @abstractmethod
+    def stream_chat_completion(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Async generator of the assistant's text deltas"""
+
+    @abstractmethod
+    async def moderate(self, text: str) -> Dict[str, Any]:
+        """Moderation verdict as {"flagged": bool, "categories": dict}"""
+
+    async def aclose(self):
+        """Release connections"""
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI API over one pooled HTTP/2 connection"""
+
+    def __init__(self):
+        self.http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(
+                settings.openai_timeout_seconds,
+                connect=settings.openai_connect_timeout_seconds
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.openai_max_connections,
+                max_keepalive_connections=settings.openai_max_connections
+            )
+        )
+        # Retries are handled by LLMClient (with jitter and metrics), not by the SDK
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=self.http_client,
+            max_retries=0
+        )
+
+    async def chat_completion(self, model: str, messages: List[Dict[str, str]], **kwargs) -> str:
+        response = await self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+        return response.choices[0].message.content or ""
+
+    async def stream_chat_completion(self, model: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(model=model, messages=messages, stream=True, **kwargs)
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+    async def moderate(self, text: str) -> Dict[str, Any]:
+        response = await self.client.moderations.create(input=text)
+        result = response.results[0]
+        return {
+            "flagged": result.flagged,
+            "categories": result.categories.model_dump() if result.flagged else {}
+        }
+
+    async def aclose(self):
+        await self.http_client.aclose()
@@ -0,0 +1,29 @@
+"""
+Match Jobs
+Background work for matches, run by the job queue
+"""
+
+from app.database import db
+from app.services.ai_assistant import ai_assistant
+from app.services.job_queue import job_queue
+from typing import Any, Dict
+
+EXPLANATION_JOB = "match_explanation"
+
+
+@job_queue.handler(EXPLANATION_JOB)
+async def upgrade_match_explanation(payload: Dict[str, Any]):
+    """
+    Replace a match's template explanation with a generated one
+
+    Payload: {"match_id", "explanation": generate_match_explanation arguments}.
+    Errors propagate so the queue retries instead of storing the template again.
+    """
+    explanation = await ai_assistant.generate_match_explanation(**payload["explanation"], fallback=False)
+    if not await db.update_match(payload["match_id"], {"explanation": explanation}):
+        raise RuntimeError(f"Failed to store explanation for match {payload['match_id']}")
+
+
+async def enqueue_explanation_upgrade(match_id: str, explanation_input: Dict[str, Any]):
+    """Queue the LLM explanation for a match that was stored with the template text"""
+    await job_queue.enqueue(EXPLANATION_JOB, {"match_id": match_id, "explanation": explanation_input})
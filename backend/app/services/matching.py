@@ -3,15 +3,25 @@ Matching Service
 Implements hybrid matching algorithm with semantic similarity, reciprocity, and availability
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from app.cache import TTLCache
 from app.services.embeddings import embeddings_service
-from app.database import db
+from app.database import db, SKILL_COLUMNS_WITH_EMBEDDING
 from app.config import settings
+from app.metrics import metrics
+import asyncio
 import logging
 import json
+import math
 
 logger = logging.getLogger(__name__)
 
+# Pairings scoring at or below this are never suggested
+MIN_MATCH_SCORE = 0.3
+
+# Columns of a computed match score, as stored on matches
+SCORE_KEYS = ("semantic_score", "reciprocity_score", "availability_score", "preference_score", "total_score")
+
 
 class MatchingService:
     """Service for finding and scoring skill matches"""
@@ -23,26 +33,80 @@ class MatchingService:
             "availability": settings.weight_availability,
             "preference": settings.weight_preference
         }
+        # Memoized calculate_match_score results, keyed by record versions
+        self.score_memo = TTLCache(
+            "score_memo",
+            max_entries=settings.score_memo_max_entries,
+            ttl_seconds=settings.score_memo_ttl_seconds
+        )
+    
+    def initial_fanout(self, limit: int, learn_skill_count: int) -> int:
+        """Candidates to fetch per learn skill at first: a budget of about limit * match_fanout_factor shared by the skills"""
+        per_skill = math.ceil(limit * settings.match_fanout_factor / max(learn_skill_count, 1))
+        return max(settings.match_fanout_min, min(per_skill, settings.match_fanout_max))
+    
+    def _may_improve(
+        self,
+        matches: List[Dict[str, Any]],
+        batch_start: int,
+        limit: int,
+        tail_similarity: float
+    ) -> bool:
+        """
+        Whether more candidates for a learn skill may enter the top matches
+        
+        Always true while fewer than `limit` users matched. After that, the
+        search is widened only if unseen candidates can still beat the
+        limit-th best user, and its last batch (matches[batch_start:]) still
+        reached the top `limit`. The first check is an upper bound: unseen
+        candidates are at most as similar as the last one returned
+        (candidates come in order of similarity), and the other side of the
+        semantic score and every other component are at most 1. The second
+        is a heuristic stop for searches whose new candidates no longer rank.
+        """
+        best_by_user: Dict[str, float] = {}
+        for match in matches:
+            best_by_user[match["user2_id"]] = max(best_by_user.get(match["user2_id"], 0.0), match["total_score"])
+        if len(best_by_user) < limit:
+            return True
+        
+        kth_score = sorted(best_by_user.values(), reverse=True)[limit - 1]
+        batch_best = max((match["total_score"] for match in matches[batch_start:]), default=0.0)
+        # Semantic scores are clamped at 0, so a negative tail similarity bounds nothing below it
+        bound = self.weights["semantic"] * (max(tail_similarity, 0.0) + 1) / 2 + 1 - self.weights["semantic"]
+        return bound > kth_score and batch_best >= kth_score
     
     async def find_matches(
         self, 
         user_id: str, 
-        limit: int = 10
+        limit: int = 10,
+        fanout: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Find top matches for a user
         
+        Candidates come from one reciprocal search over user centroids
+        (match_candidate_generation "centroid"), or from one vector search
+        per learn skill with adaptive fan-out ("skill", or whenever fanout is
+        given).
+        
         Args:
             user_id: User ID to find matches for
             limit: Maximum number of matches to return
+            fanout: Fixed candidates per learn skill, using per-skill search without
+                adaptive widening (benchmarks use a large value as the exhaustive baseline)
         
         Returns:
             List of match dictionaries with scores and explanations
         """
         try:
             # Get user's teach and learn skills
-            teach_skills = await db.get_user_skills(user_id, mode="TEACH")
-            learn_skills = await db.get_user_skills(user_id, mode="LEARN")
+            teach_skills = await db.get_user_skills(
+                user_id, mode="TEACH", columns=SKILL_COLUMNS_WITH_EMBEDDING
+            )
+            learn_skills = await db.get_user_skills(
+                user_id, mode="LEARN", columns=SKILL_COLUMNS_WITH_EMBEDDING
+            )
             
             if not teach_skills or not learn_skills:
                 logger.info(f"User {user_id} has no skills to match")
@@ -53,58 +117,10 @@ class MatchingService:
             if not user:
                 return []
             
-            matches = []
-            
-            # For each skill the user wants to learn
-            for learn_skill in learn_skills:
-                if not learn_skill.get("embedding"):
-                    continue
-                
-                # Find users who teach similar skills
-                similar_teach_skills = await db.find_similar_skills(
-                    embedding=learn_skill["embedding"],
-                    mode="TEACH",
-                    limit=20,
-                    exclude_user_id=user_id
-                )
-                
-                # For each potential teacher
-                for teach_skill in similar_teach_skills:
-                    teacher_id = teach_skill["user_id"]
-                    
-                    # Get what the teacher wants to learn
-                    teacher_learn_skills = await db.get_user_skills(teacher_id, mode="LEARN")
-                    
-                    # Check if we can teach what they want to learn
-                    for teacher_learn in teacher_learn_skills:
-                        if not teacher_learn.get("embedding"):
-                            continue
-                        
-                        # Find our teach skills that match what they want
-                        for our_teach in teach_skills:
-                            if not our_teach.get("embedding"):
-                                continue
-                            
-                            # Calculate match score
-                            match_score = await self.calculate_match_score(
-                                user1=user,
-                                user2_id=teacher_id,
-                                skill1_teach=our_teach,
-                                skill1_learn=learn_skill,
-                                skill2_teach=teach_skill,
-                                skill2_learn=teacher_learn
-                            )
-                            
-                            if match_score["total_score"] > 0.3:  # Minimum threshold
-                                matches.append({
-                                    "user1_id": user_id,
-                                    "user2_id": teacher_id,
-                                    "skill1_id": our_teach["id"],
-                                    "skill2_id": teach_skill["id"],
-                                    "learn_skill_id": learn_skill["id"],
-                                    "teacher_learn_skill_id": teacher_learn["id"],
-                                    **match_score
-                                })
+            if fanout is None and settings.match_candidate_generation == "centroid":
+                matches = await self._centroid_candidate_matches(user, teach_skills, learn_skills, limit)
+            else:
+                matches = await self._skill_candidate_matches(user, teach_skills, learn_skills, limit, fanout)
             
             # Sort by total score and remove duplicates
             matches.sort(key=lambda x: x["total_score"], reverse=True)
@@ -124,21 +140,320 @@ class MatchingService:
             logger.error(f"Error finding matches for user {user_id}: {e}")
             return []
     
-    async def calculate_match_score(
+    def _candidate_filters(
+        self,
+        user: Dict[str, Any],
+        teach_skills: List[Dict[str, Any]]
+    ) -> Tuple[Optional[str], Optional[List[Dict[str, Any]]]]:
+        """Language and availability slots candidates must share, per the match_* settings"""
+        language = user.get("preferred_language") if settings.match_same_language_only else None
+        our_slots = [slot for skill in teach_skills for slot in (skill.get("availability") or [])]
+        availability = our_slots if settings.match_require_availability_overlap and our_slots else None
+        return language, availability
+    
+    def _score_candidate(
+        self,
+        user: Dict[str, Any],
+        teacher: Optional[Dict[str, Any]],
+        teach_skills: List[Dict[str, Any]],
+        learn_skill: Dict[str, Any],
+        teach_skill: Dict[str, Any],
+        teacher_learn_skills: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Score a teacher's skill for one of our learn skills against every way we can teach them back"""
+        matches = []
+        
+        # Check if we can teach what they want to learn
+        for teacher_learn in teacher_learn_skills:
+            if not teacher_learn.get("embedding"):
+                continue
+            
+            # Find our teach skills that match what they want
+            for our_teach in teach_skills:
+                if not our_teach.get("embedding"):
+                    continue
+                
+                # Calculate match score
+                match_score = self.calculate_match_score(
+                    user1=user,
+                    user2=teacher,
+                    skill1_teach=our_teach,
+                    skill1_learn=learn_skill,
+                    skill2_teach=teach_skill,
+                    skill2_learn=teacher_learn
+                )
+                matches.append({
+                    "user1_id": user["id"],
+                    "user2_id": teach_skill["user_id"],
+                    "skill1_id": our_teach["id"],
+                    "skill2_id": teach_skill["id"],
+                    "learn_skill_id": learn_skill["id"],
+                    "teacher_learn_skill_id": teacher_learn["id"],
+                    **match_score
+                })
+        
+        return matches
+    
+    async def _centroid_candidate_matches(
+        self,
+        user: Dict[str, Any],
+        teach_skills: List[Dict[str, Any]],
+        learn_skills: List[Dict[str, Any]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Matches among a shortlist of users from one reciprocal centroid search
+        
+        The shortlist holds about limit * match_shortlist_factor users whose
+        teach centroid is near our learn centroid and whose learn centroid is
+        near our teach centroid, using the precomputed centroids in
+        user_vectors. They are loaded with their skills in one read and only
+        their skills are scored.
+        """
+        vectors = await db.get_user_vectors(user["id"])
+        if not vectors:
+            return []
+        
+        language, availability = self._candidate_filters(user, teach_skills)
+        shortlist = await db.find_reciprocal_users(
+            vectors["teach_centroid"],
+            vectors["learn_centroid"],
+            limit=limit * settings.match_shortlist_factor,
+            exclude_user_id=user["id"],
+            language=language
+        )
+        if not shortlist:
+            return []
+        
+        our_slots = {(slot.get("day"), slot.get("time")) for slot in availability or []}
+        matches = []
+        for teacher in await db.get_users_with_skills([row["user_id"] for row in shortlist]):
+            skills = teacher.pop("skills")
+            teacher_learn_skills = [skill for skill in skills if skill["mode"] == "LEARN"]
+            
+            for learn_skill in learn_skills:
+                if not learn_skill.get("embedding"):
+                    continue
+                
+                # Same filters the per-skill vector search applies
+                for teach_skill in skills:
+                    if (
+                        teach_skill["mode"] != "TEACH"
+                        or not teach_skill.get("embedding")
+                        or teach_skill["level"] < learn_skill["level"] + settings.match_min_teach_level_gap
+                        or (our_slots and teach_skill.get("availability") and not our_slots & {
+                            (slot.get("day"), slot.get("time")) for slot in teach_skill["availability"]
+                        })
+                    ):
+                        continue
+                    
+                    metrics.increment("matching.candidates")
+                    matches.extend(
+                        match for match in self._score_candidate(
+                            user, teacher, teach_skills, learn_skill, teach_skill, teacher_learn_skills
+                        )
+                        if match["total_score"] > MIN_MATCH_SCORE
+                    )
+        
+        return matches
+    
+    async def _skill_candidate_matches(
+        self,
+        user: Dict[str, Any],
+        teach_skills: List[Dict[str, Any]],
+        learn_skills: List[Dict[str, Any]],
+        limit: int,
+        fanout: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Matches from one vector search per learn skill
+        
+        Each learn skill starts from a share of the candidate budget
+        (initial_fanout), and searches are widened while their next
+        candidates could still make the top `limit` (see _may_improve).
+        Each round runs its searches concurrently and loads the new teachers
+        with their skills in one read.
+        """
+        matches = []
+        # Teacher profiles and LEARN skills fetched once per call, whatever the number of skill combinations
+        teachers: Dict[str, Dict[str, Any]] = {}
+        learn_skills_by_teacher: Dict[str, List[Dict[str, Any]]] = {}
+        language, availability = self._candidate_filters(user, teach_skills)
+        
+        searchable = [skill for skill in learn_skills if skill.get("embedding")]
+        pools = {skill["id"]: fanout or self.initial_fanout(limit, len(searchable)) for skill in searchable}
+        seen: Dict[str, set] = {skill["id"]: set() for skill in searchable}
+        
+        # Search for each skill the user wants to learn, then widen the searches that may still improve the top matches
+        pending = searchable
+        while pending:
+            # Find users who teach similar skills at a useful level and want to learn something back
+            results = await asyncio.gather(*(
+                db.find_similar_skills(
+                    embedding=learn_skill["embedding"],
+                    mode="TEACH",
+                    limit=pools[learn_skill["id"]],
+                    exclude_user_id=user["id"],
+                    min_level=learn_skill["level"] + settings.match_min_teach_level_gap,
+                    require_learn_skill=True,
+                    language=language,
+                    availability=availability
+                )
+                for learn_skill in pending
+            ))
+            
+            fresh_by_skill = {}
+            for learn_skill, candidates in zip(pending, results):
+                fresh = [skill for skill in candidates if skill["id"] not in seen[learn_skill["id"]]]
+                seen[learn_skill["id"]].update(skill["id"] for skill in fresh)
+                metrics.increment("matching.candidates", len(fresh))
+                fresh_by_skill[learn_skill["id"]] = fresh
+            
+            # Load the teachers new to this call, with what they want to learn, in one read
+            new_skills = [
+                skill for fresh in fresh_by_skill.values() for skill in fresh
+                if skill["user_id"] not in teachers
+            ]
+            if new_skills:
+                loaded = await db.get_users_with_skills(
+                    list(dict.fromkeys(skill["user_id"] for skill in new_skills)),
+                    skill_ids=[skill["id"] for skill in new_skills]
+                )
+                for teacher in loaded:
+                    skills = teacher.pop("skills")
+                    teachers[teacher["id"]] = teacher
+                    learn_skills_by_teacher[teacher["id"]] = [skill for skill in skills if skill["mode"] == "LEARN"]
+            
+            widen = []
+            for learn_skill, candidates in zip(pending, results):
+                batch_start = len(matches)
+                for teach_skill in fresh_by_skill[learn_skill["id"]]:
+                    teacher_id = teach_skill["user_id"]
+                    if teacher_id not in teachers:
+                        continue
+                    
+                    for match in self._score_candidate(
+                        user, teachers[teacher_id], teach_skills, learn_skill,
+                        teach_skill, learn_skills_by_teacher[teacher_id]
+                    ):
+                        if match["total_score"] > MIN_MATCH_SCORE:
+                            matches.append(match)
+                
+                if (
+                    fanout is None
+                    and len(candidates) >= pools[learn_skill["id"]]
+                    and pools[learn_skill["id"]] < settings.match_fanout_max
+                    and self._may_improve(matches, batch_start, limit, candidates[-1]["similarity"])
+                ):
+                    widen.append(learn_skill)
+            
+            for learn_skill in widen:
+                pools[learn_skill["id"]] = min(pools[learn_skill["id"]] * 2, settings.match_fanout_max)
+            metrics.increment("matching.fanout.widened", len(widen))
+            pending = widen
+        
+        return matches
+    
+    def score_pair(
         self,
         user1: Dict[str, Any],
-        user2_id: str,
+        user2: Dict[str, Any],
+        skill1_teach: Dict[str, Any],
+        skill2_teach: Dict[str, Any],
+        user1_learn_skills: List[Dict[str, Any]],
+        user2_learn_skills: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Score a pair of TEACH skills with the best pairing of the users' LEARN skills
+        
+        Pairings discover already scored are served from the score memo, whose
+        keys carry record versions, so an edited user or skill is rescored.
+        
+        Args:
+            user1, user2: User profiles
+            skill1_teach, skill2_teach: What each user teaches (with embeddings)
+            user1_learn_skills, user2_learn_skills: What each user wants to learn (with embeddings)
+        
+        Returns:
+            Component scores, total_score, learn_skill_id (user1's) and
+            teacher_learn_skill_id (user2's), or None if there is nothing to
+            compare (a side has no embedded LEARN skill)
+        """
+        if not skill1_teach.get("embedding") or not skill2_teach.get("embedding"):
+            return None
+        
+        best = None
+        for skill1_learn in user1_learn_skills:
+            if not skill1_learn.get("embedding"):
+                continue
+            for skill2_learn in user2_learn_skills:
+                if not skill2_learn.get("embedding"):
+                    continue
+                score = self.calculate_match_score(user1, user2, skill1_teach, skill1_learn, skill2_teach, skill2_learn)
+                if best is None or score["total_score"] > best[0]["total_score"]:
+                    best = (score, skill1_learn["id"], skill2_learn["id"])
+        
+        if best is None:
+            return None
+        score, learn_skill_id, teacher_learn_skill_id = best
+        return {**score, "learn_skill_id": learn_skill_id, "teacher_learn_skill_id": teacher_learn_skill_id}
+    
+    def score_memo_key(
+        self,
+        user1: Optional[Dict[str, Any]],
+        user2: Optional[Dict[str, Any]],
+        skill1_teach: Dict[str, Any],
+        skill1_learn: Dict[str, Any],
+        skill2_teach: Dict[str, Any],
+        skill2_learn: Dict[str, Any]
+    ) -> frozenset:
+        """
+        Memo key for a score: each side's user and skills with their updated_at versions
+        
+        The score is symmetric, so the key is a set of the two sides and A
+        discovering B fills the entry B discovering A will look up. Any edit to
+        a skill or to a user's preferences changes updated_at, and so the key.
+        """
+        def side(user, teach, learn):
+            return (
+                (user["id"], user.get("updated_at")) if user else None,
+                (teach["id"], teach.get("updated_at")),
+                (learn["id"], learn.get("updated_at"))
+            )
+        return frozenset([side(user1, skill1_teach, skill1_learn), side(user2, skill2_teach, skill2_learn)])
+    
+    def calculate_match_score(
+        self,
+        user1: Optional[Dict[str, Any]],
+        user2: Optional[Dict[str, Any]],
         skill1_teach: Dict[str, Any],
         skill1_learn: Dict[str, Any],
         skill2_teach: Dict[str, Any],
         skill2_learn: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Calculate comprehensive match score
+        Calculate comprehensive match score, memoized per record versions
         
         Returns:
             Dictionary with component scores and total score
         """
+        key = self.score_memo_key(user1, user2, skill1_teach, skill1_learn, skill2_teach, skill2_learn)
+        score = self.score_memo.get(key)
+        if score is None:
+            score = self._compute_match_score(user1, user2, skill1_teach, skill1_learn, skill2_teach, skill2_learn)
+            self.score_memo.set(key, score)
+        return dict(score)
+    
+    def _compute_match_score(
+        self,
+        user1: Optional[Dict[str, Any]],
+        user2: Optional[Dict[str, Any]],
+        skill1_teach: Dict[str, Any],
+        skill1_learn: Dict[str, Any],
+        skill2_teach: Dict[str, Any],
+        skill2_learn: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Component and total scores of a pairing, from the records alone"""
         # 1. Semantic Similarity Score
         # User1 learns from User2's teach skill
         semantic_score_1 = embeddings_service.cosine_similarity(
@@ -170,7 +485,6 @@ class MatchingService:
         )
         
         # 4. Preference Score
-        user2 = await db.get_user_by_id(user2_id)
         preference_score = self.calculate_preference_score(user1, user2)
         
         # 5. Total weighted score
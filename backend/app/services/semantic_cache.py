@@ -0,0 +1,126 @@
+"""
+Semantic Cache
+Reuses assistant answers for questions that embed close to earlier ones
+"""
+
+from app.metrics import metrics
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+import time
+import uuid
+
+
+class SemanticCache:
+    """
+    Small in-memory vector index of previous questions and their answers
+
+    A lookup returns the most similar stored question's answer when the
+    cosine similarity reaches the threshold. Entries expire after a TTL and
+    the least recently used ones are evicted beyond max_entries. Entries are
+    grouped by partition (e.g. the page the assistant is used from) and only
+    match within their partition.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        threshold: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self.clock = clock
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Stacked embeddings of all entries, rebuilt lazily after writes
+        self._index_ids: List[str] = []
+        self._index_matrix: Optional[np.ndarray] = None
+        self._index_stale = True
+
+    def _evict_expired(self):
+        """Drop entries past their TTL"""
+        now = self.clock()
+        expired = [entry_id for entry_id, entry in self.entries.items() if entry["expires_at"] <= now]
+        for entry_id in expired:
+            del self.entries[entry_id]
+        if expired:
+            metrics.increment("cache.semantic.expired", len(expired))
+            self._index_stale = True
+
+    def _index(self):
+        """Embedding matrix and matching entry IDs"""
+        if self._index_stale:
+            self._index_ids = list(self.entries)
+            self._index_matrix = (
+                np.stack([self.entries[entry_id]["embedding"] for entry_id in self._index_ids])
+                if self._index_ids else None
+            )
+            self._index_stale = False
+        return self._index_ids, self._index_matrix
+
+    def lookup(self, embedding: List[float], partition: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a question embedding
+
+        Args:
+            embedding: Normalized question embedding
+            partition: Only entries stored under the same partition can match
+
+        Returns:
+            The matching entry (with its "similarity") or None
+        """
+        self._evict_expired()
+        entry_ids, matrix = self._index()
+        if matrix is None:
+            metrics.increment("cache.semantic.misses")
+            return None
+
+        similarities = matrix @ np.asarray(embedding, dtype=np.float32)
+        for position in np.argsort(-similarities):
+            if similarities[position] < self.threshold:
+                break
+            entry = self.entries[entry_ids[position]]
+            if entry["partition"] != partition:
+                continue
+
+            entry["hits"] += 1
+            self.entries.move_to_end(entry_ids[position])
+            metrics.increment("cache.semantic.hits")
+            return {**entry, "similarity": float(similarities[position])}
+
+        metrics.increment("cache.semantic.misses")
+        return None
+
+    def store(self, embedding: List[float], partition: str, question: str, answer: str):
+        """Add a question/answer pair, evicting least recently used entries when full"""
+        self.entries[str(uuid.uuid4())] = {
+            "embedding": np.asarray(embedding, dtype=np.float32),
+            "partition": partition,
+            "question": question,
+            "answer": answer,
+            "hits": 0,
+            "expires_at": self.clock() + self.ttl_seconds
+        }
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            metrics.increment("cache.semantic.evictions")
+        self._index_stale = True
+
+    def clear(self):
+        """Drop all entries"""
+        self.entries.clear()
+        self._index_stale = True
+
+    def snapshot(self, top: int = 10) -> Dict[str, Any]:
+        """Size, limits and the most reused entries (hit counts only, no content)"""
+        by_hits = sorted(self.entries.items(), key=lambda item: item[1]["hits"], reverse=True)[:top]
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "threshold": self.threshold,
+            "top_entries": [{"id": entry_id, "hits": entry["hits"]} for entry_id, entry in by_hits]
+        }
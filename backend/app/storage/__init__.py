@@ -0,0 +1,4 @@
+# Storage __init__.py
+from app.storage.base import StorageEngine
+
+__all__ = ['StorageEngine']
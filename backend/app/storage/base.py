@@ -0,0 +1,296 @@
+"""
+Storage Engine Interface
+Abstract data-access API shared by the Supabase and in-memory backends
+"""
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+
+# ==================== COLUMN PROJECTIONS ====================
+# Read methods select explicit columns instead of "*". Skill embeddings are
+# 384 floats serialized as JSON text (several KB per row), so only the
+# matching path asks for SKILL_COLUMNS_WITH_EMBEDDING.
+
+USER_COLUMNS = "id, email, name, bio, preferred_language, avatar_url, created_at, updated_at"
+
+SKILL_COLUMNS = "id, user_id, name, mode, level, availability, canonical_text, created_at, updated_at"
+SKILL_COLUMNS_WITH_EMBEDDING = f"{SKILL_COLUMNS}, embedding"
+
+MATCH_BASE_COLUMNS = (
+    "id, user1_id, user2_id, skill1_id, skill2_id, semantic_score, reciprocity_score, "
+    "availability_score, preference_score, total_score, explanation, status, created_at, updated_at"
+)
+MATCH_COLUMNS = (
+    f"{MATCH_BASE_COLUMNS}, "
+    f"user1:users!matches_user1_id_fkey({USER_COLUMNS}), user2:users!matches_user2_id_fkey({USER_COLUMNS}), "
+    f"skill1:skills!matches_skill1_id_fkey({SKILL_COLUMNS}), skill2:skills!matches_skill2_id_fkey({SKILL_COLUMNS})"
+)
+# Enough to check that a user takes part in a match, without any joins
+MATCH_PARTICIPANT_COLUMNS = "id, user1_id, user2_id, status"
+# Stored explanations, looked up by participants and skills
+MATCH_EXPLANATION_COLUMNS = "id, user1_id, user2_id, skill1_id, skill2_id, explanation"
+
+MESSAGE_COLUMNS = "id, match_id, sender_id, content, created_at"
+
+# user1_id/user2_id are denormalized from the match, so per-user session reads need no join
+SESSION_COLUMNS = (
+    "id, match_id, user1_id, user2_id, agenda, scheduled_at, duration_minutes, status, "
+    "meeting_link, notes, created_at, updated_at"
+)
+
+
+class StorageEngine(ABC):
+    """
+    Data-access interface used by routes and services
+
+    Implementations follow the same error contract as the Supabase client:
+    failures are logged and reported as None / [] / False, never raised.
+    """
+
+    # ==================== USER OPERATIONS ====================
+
+    @abstractmethod
+    async def get_user_by_id(self, user_id: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get user by ID"""
+
+    @abstractmethod
+    async def get_user_by_email(self, email: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get user by email"""
+
+    @abstractmethod
+    async def get_users_with_skills(
+        self,
+        user_ids: List[str],
+        skill_ids: Optional[List[str]] = None,
+        columns: str = USER_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """
+        Get users in one read, each with a "skills" list (with embeddings) holding
+        only the listed skills plus their LEARN skills (all skills if skill_ids is None)
+        """
+
+    @abstractmethod
+    async def create_user(self, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new user"""
+
+    @abstractmethod
+    async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update user profile"""
+
+    @abstractmethod
+    async def bulk_upsert_users(
+        self,
+        users_data: List[Dict[str, Any]],
+        on_conflict: str = "email"
+    ) -> List[Dict[str, Any]]:
+        """Insert or update many users in a single request"""
+
+    # ==================== SKILL OPERATIONS ====================
+
+    @abstractmethod
+    async def get_user_skills(
+        self,
+        user_id: str,
+        mode: Optional[str] = None,
+        columns: str = SKILL_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """Get all skills for a user, optionally filtered by mode (TEACH/LEARN)"""
+
+    @abstractmethod
+    async def create_skill(self, skill_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new skill with embedding"""
+
+    @abstractmethod
+    async def bulk_upsert_skills(
+        self,
+        skills_data: List[Dict[str, Any]],
+        on_conflict: str = "user_id,name,mode",
+        bypass_rls: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Insert or update many skills in a single request"""
+
+    @abstractmethod
+    async def update_skill(self, skill_id: str, skill_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update skill"""
+
+    @abstractmethod
+    async def delete_skill(self, skill_id: str, user_id: str) -> bool:
+        """Delete skill (with ownership check)"""
+
+    @abstractmethod
+    async def find_similar_skills(
+        self,
+        embedding: List[float],
+        mode: str,
+        limit: int = 10,
+        exclude_user_id: Optional[str] = None,
+        min_level: Optional[int] = None,
+        require_learn_skill: bool = False,
+        language: Optional[str] = None,
+        availability: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find similar skills using vector similarity, filtered inside the search
+
+        Only skills passing every given filter are returned, and the search
+        widens until `limit` of them are found (or candidates run out):
+        owner is not exclude_user_id, level >= min_level, owner has a LEARN
+        skill, owner's preferred language, and at least one slot shared with
+        availability (skills with no availability always pass).
+        """
+
+    @abstractmethod
+    async def get_user_vectors(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Precomputed TEACH / LEARN skill centroids of a user
+
+        Returns {user_id, teach_centroid, learn_centroid} as float lists, or
+        None unless the user has embedded skills of both modes.
+        """
+
+    @abstractmethod
+    async def find_reciprocal_users(
+        self,
+        teach_centroid: List[float],
+        learn_centroid: List[float],
+        limit: int = 50,
+        exclude_user_id: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Users whose skills complement a pair of centroids, best first
+
+        Two nearest-neighbour searches over per-user skill centroids (teach
+        centroid near learn_centroid, learn centroid near teach_centroid),
+        ranked by the mean of both cosine similarities. Rows are
+        {user_id, teach_similarity, learn_similarity, similarity}.
+        """
+
+    @abstractmethod
+    async def get_popular_skills(self, mode: str = "TEACH", limit: int = 20) -> List[Dict[str, Any]]:
+        """Most common (normalized name, level) pairs for a mode, as {name, level, skill_count}"""
+
+    # ==================== MATCH OPERATIONS ====================
+
+    @abstractmethod
+    async def get_match(self, match_id: str, user_id: str, columns: str = MATCH_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get one match, only if the user takes part in it"""
+
+    @abstractmethod
+    async def get_user_matches(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        columns: str = MATCH_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """Get all matches for a user"""
+
+    @abstractmethod
+    async def create_match(self, match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new match"""
+
+    @abstractmethod
+    async def update_match(self, match_id: str, match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update match status"""
+
+    # ==================== SESSION OPERATIONS ====================
+
+    @abstractmethod
+    async def get_match_sessions(self, match_id: str) -> List[Dict[str, Any]]:
+        """Get all sessions for a match"""
+
+    @abstractmethod
+    async def create_session(self, session_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new session"""
+
+    @abstractmethod
+    async def update_session(self, session_id: str, session_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update session"""
+
+    @abstractmethod
+    async def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get all sessions for a user across all their matches"""
+
+    @abstractmethod
+    async def get_upcoming_sessions(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get a user's scheduled sessions that have not started yet, earliest first"""
+
+    @abstractmethod
+    async def get_sessions_in_range(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get a user's sessions scheduled in [start, end), earliest first"""
+
+    # ==================== MESSAGE OPERATIONS ====================
+
+    @abstractmethod
+    async def get_match_messages(
+        self,
+        match_id: str,
+        limit: int = 50,
+        before: Optional[Tuple[str, str]] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a page of messages for a match, newest first"""
+
+    @abstractmethod
+    async def create_message(self, message_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new message"""
+
+    @abstractmethod
+    async def get_user_inbox(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get every conversation for a user with last message and unread count"""
+
+    # ==================== READ MARKER OPERATIONS ====================
+
+    @abstractmethod
+    async def get_read_markers(self, match_id: str) -> Dict[str, str]:
+        """Get each participant's last_read_at marker for a match, keyed by user ID"""
+
+    @abstractmethod
+    async def advance_read_marker(self, match_id: str, user_id: str, read_at: str) -> bool:
+        """Move a user's read marker for a match forward to read_at"""
+
+    @abstractmethod
+    async def count_unread_messages(
+        self,
+        match_id: str,
+        user_id: str,
+        last_read_at: Optional[str] = None
+    ) -> int:
+        """Count messages from the other participant newer than the user's read marker"""
+
+    # ==================== JOB OPERATIONS ====================
+
+    @abstractmethod
+    async def create_job(self, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Record a new background job"""
+
+    @abstractmethod
+    async def claim_job(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Mark a job RUNNING and count the attempt, unless it changed since it was read
+
+        Returns the claimed job, or None if another worker got there first.
+        """
+
+    @abstractmethod
+    async def update_job(self, job_id: str, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a job's status or error"""
+
+    @abstractmethod
+    async def get_runnable_jobs(self, stale_before: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """Get PENDING jobs plus RUNNING ones not touched since stale_before, oldest first"""
+
+
+def dedupe_rows(rows: List[Dict[str, Any]], on_conflict: str) -> List[Dict[str, Any]]:
+    """Collapse rows sharing the same conflict key, keeping the last occurrence"""
+    key_columns = [column.strip() for column in on_conflict.split(",")]
+    unique_rows = {tuple(row.get(column) for column in key_columns): row for row in rows}
+    return list(unique_rows.values())
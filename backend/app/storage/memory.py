@@ -0,0 +1,788 @@
+"""
+In-Memory Storage Engine
+Dependency-free backend for offline benchmarking, load testing and tests
+"""
+
+from app.metrics import instrument_methods
+from app.storage.base import (
+    StorageEngine,
+    dedupe_rows,
+    USER_COLUMNS,
+    SKILL_COLUMNS,
+    SKILL_COLUMNS_WITH_EMBEDDING,
+    MATCH_COLUMNS,
+)
+from app.utils import parse_timestamp
+from collections import Counter
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Optional, Dict, Any, List, Tuple
+import numpy as np
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Embedded relations understood by the projection parser: alias -> (table, foreign key column)
+RELATIONS = {
+    "matches": {
+        "user1": ("users", "user1_id"),
+        "user2": ("users", "user2_id"),
+        "skill1": ("skills", "skill1_id"),
+        "skill2": ("skills", "skill2_id"),
+    },
+    "sessions": {"match": ("matches", "match_id")},
+    "messages": {"sender": ("users", "sender_id")},
+}
+
+# Column defaults applied on insert, mirroring database/schema.sql
+DEFAULTS = {
+    "users": {"bio": None, "preferred_language": "English", "avatar_url": None},
+    "skills": {"availability": [], "embedding": None, "canonical_text": None},
+    "matches": {"status": "PENDING"},
+    "sessions": {"status": "SCHEDULED", "meeting_link": None, "notes": None},
+    "messages": {},
+    "jobs": {"payload": {}, "status": "PENDING", "attempts": 0, "max_attempts": 3, "last_error": None},
+}
+
+TIMESTAMPED_TABLES = {"users", "skills", "matches", "sessions", "jobs"}
+
+
+def _now() -> str:
+    """Current time in the fixed-precision ISO format PostgREST returns"""
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _to_storage(value: Any) -> Any:
+    """Convert Pydantic-dumped values (enums, datetimes) to their JSON form"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        if value and isinstance(value[0], (int, float)):
+            return list(value)  # embeddings: nothing to convert
+        return [_to_storage(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_storage(item) for key, item in value.items()}
+    return value
+
+
+def _split_columns(columns: str) -> List[str]:
+    """Split a PostgREST select string on top-level commas"""
+    parts, depth, current = [], 0, []
+    for char in columns:
+        if char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current.append(char)
+    if current:
+        parts.append("".join(current).strip())
+    return [part for part in parts if part]
+
+
+@instrument_methods("db")
+class InMemoryDatabase(StorageEngine):
+    """
+    Process-local storage engine with NumPy brute-force vector search
+
+    Rows are plain dicts shaped like PostgREST responses, so routes and
+    services behave the same as against Supabase. Selected with
+    STORAGE_BACKEND=memory; nothing is persisted.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {
+            "users": {}, "skills": {}, "matches": {}, "sessions": {}, "messages": {}, "jobs": {}
+        }
+        # Secondary indexes (what the Postgres B-tree indexes give us)
+        self.users_by_email: Dict[str, str] = {}
+        self.skills_by_user: Dict[str, set] = {}
+        self.matches_by_user: Dict[str, set] = {}
+        self.sessions_by_match: Dict[str, set] = {}
+        self.sessions_by_user: Dict[str, set] = {}
+        self.messages_by_match: Dict[str, List[str]] = {}
+        self.read_markers: Dict[str, Dict[str, str]] = {}
+
+        # Vector index per skill mode, rebuilt lazily after skill writes
+        self.skills_version = 0
+        self.vector_indexes: Dict[str, Tuple[int, List[str], np.ndarray, np.ndarray]] = {}
+        # Per-user TEACH / LEARN centroids (the user_vectors table), rebuilt the same way
+        self.centroid_index: Optional[Tuple[int, List[str], np.ndarray, np.ndarray]] = None
+
+    # ==================== INTERNAL HELPERS ====================
+
+    def _project(self, table: str, row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+        """Apply a PostgREST-style select string (including embedded relations) to a row"""
+        projected = {}
+        for part in _split_columns(columns):
+            if "(" not in part:
+                if part == "*":
+                    projected.update(row)
+                else:
+                    projected[part] = row.get(part)
+                continue
+
+            head, inner = part.split("(", 1)
+            alias = head.split(":")[0] if ":" in head else head.split("!")[0]
+            related_table, foreign_key = RELATIONS[table][alias.strip()]
+            related = self.tables[related_table].get(row.get(foreign_key))
+            projected[alias.strip()] = (
+                self._project(related_table, related, inner[:-1]) if related else None
+            )
+        return projected
+
+    def _insert(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a row with defaults, generated ID and timestamps"""
+        now = _now()
+        row = {**DEFAULTS[table], **_to_storage(data)}
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", now)
+        if table in TIMESTAMPED_TABLES:
+            row.setdefault("updated_at", now)
+
+        if row["id"] in self.tables[table]:
+            raise ValueError(f"duplicate key value violates {table}_pkey")
+        self.tables[table][row["id"]] = row
+        return row
+
+    def _update(self, table: str, row_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a row in place and bump updated_at"""
+        row = self.tables[table].get(row_id)
+        if row is None:
+            return None
+        row.update(_to_storage(data))
+        if table in TIMESTAMPED_TABLES:
+            row["updated_at"] = _now()
+        return row
+
+    def _require(self, table: str, row_id: Optional[str]):
+        """Foreign key check"""
+        if row_id not in self.tables[table]:
+            raise ValueError(f"foreign key violation: {table}.id={row_id} does not exist")
+
+    def _find_skill(self, user_id: str, name: str, mode: str) -> Optional[Dict[str, Any]]:
+        for skill_id in self.skills_by_user.get(user_id, ()):
+            skill = self.tables["skills"][skill_id]
+            if skill["name"] == name and skill["mode"] == mode:
+                return skill
+        return None
+
+    def _find_match(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        for match_id in self.matches_by_user.get(data.get("user1_id"), ()):
+            match = self.tables["matches"][match_id]
+            if all(match[key] == data.get(key) for key in ("user1_id", "user2_id", "skill1_id", "skill2_id")):
+                return match
+        return None
+
+    def _insert_user(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if data.get("email") in self.users_by_email:
+            raise ValueError("duplicate key value violates users_email_key")
+        user = self._insert("users", data)
+        self.users_by_email[user["email"]] = user["id"]
+        return user
+
+    def _insert_skill(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        self._require("users", data.get("user_id"))
+        if self._find_skill(data["user_id"], data.get("name"), _to_storage(data.get("mode"))):
+            raise ValueError("duplicate key value violates unique_user_skill")
+        skill = self._insert("skills", data)
+        self.skills_by_user.setdefault(skill["user_id"], set()).add(skill["id"])
+        self.skills_version += 1
+        return skill
+
+    def _insert_match(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        for table, key in (("users", "user1_id"), ("users", "user2_id"), ("skills", "skill1_id"), ("skills", "skill2_id")):
+            self._require(table, data.get(key))
+        if self._find_match(data):
+            raise ValueError("duplicate key value violates unique_match")
+        match = self._insert("matches", data)
+        self.matches_by_user.setdefault(match["user1_id"], set()).add(match["id"])
+        self.matches_by_user.setdefault(match["user2_id"], set()).add(match["id"])
+        return match
+
+    def _delete_match(self, match_id: str):
+        """Delete a match and everything that cascades from it"""
+        match = self.tables["matches"].pop(match_id, None)
+        if match is None:
+            return
+        for user_key in ("user1_id", "user2_id"):
+            self.matches_by_user.get(match[user_key], set()).discard(match_id)
+        for session_id in self.sessions_by_match.pop(match_id, set()):
+            session = self.tables["sessions"].pop(session_id, None)
+            for user_key in ("user1_id", "user2_id"):
+                self.sessions_by_user.get(session[user_key], set()).discard(session_id)
+        for message_id in self.messages_by_match.pop(match_id, []):
+            self.tables["messages"].pop(message_id, None)
+        self.read_markers.pop(match_id, None)
+
+    def _vector_index(self, mode: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Normalized embedding matrix for all skills of a mode, cached until the next skill write"""
+        cached = self.vector_indexes.get(mode)
+        if cached and cached[0] == self.skills_version:
+            return cached[1], cached[2], cached[3]
+
+        skill_ids = [
+            skill_id for skill_id, skill in self.tables["skills"].items()
+            if skill["mode"] == mode and skill.get("embedding") is not None
+        ]
+        if skill_ids:
+            matrix = np.asarray([self.tables["skills"][skill_id]["embedding"] for skill_id in skill_ids], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        owners = np.asarray([self.tables["skills"][skill_id]["user_id"] for skill_id in skill_ids], dtype=object)
+
+        self.vector_indexes[mode] = (self.skills_version, skill_ids, matrix, owners)
+        return skill_ids, matrix, owners
+
+    def _centroid_index(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Users with both centroids and their normalized TEACH / LEARN centroid matrices, cached until the next skill write"""
+        if self.centroid_index and self.centroid_index[0] == self.skills_version:
+            return self.centroid_index[1], self.centroid_index[2], self.centroid_index[3]
+
+        sums = {}
+        for mode in ("TEACH", "LEARN"):
+            skill_ids, matrix, owners = self._vector_index(mode)
+            if not skill_ids:
+                sums[mode] = {}
+                continue
+            users, positions = np.unique(owners, return_inverse=True)
+            totals = np.zeros((len(users), matrix.shape[1]), dtype=np.float32)
+            np.add.at(totals, positions, matrix)
+            sums[mode] = dict(zip(users, totals))
+
+        user_ids = [user_id for user_id in sums["TEACH"] if user_id in sums["LEARN"]]
+
+        def stack(mode: str) -> np.ndarray:
+            if not user_ids:
+                return np.zeros((0, 0), dtype=np.float32)
+            matrix = np.asarray([sums[mode][user_id] for user_id in user_ids], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            return matrix / np.where(norms == 0, 1, norms)
+
+        self.centroid_index = (self.skills_version, user_ids, stack("TEACH"), stack("LEARN"))
+        return self.centroid_index[1], self.centroid_index[2], self.centroid_index[3]
+
+    # ==================== USER OPERATIONS ====================
+
+    async def get_user_by_id(self, user_id: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get user by ID"""
+        user = self.tables["users"].get(user_id)
+        return self._project("users", user, columns) if user else None
+
+    async def get_user_by_email(self, email: str, columns: str = USER_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get user by email"""
+        user_id = self.users_by_email.get(email)
+        return await self.get_user_by_id(user_id, columns) if user_id else None
+
+    async def get_users_with_skills(
+        self,
+        user_ids: List[str],
+        skill_ids: Optional[List[str]] = None,
+        columns: str = USER_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """
+        Get users in one read, each with a "skills" list (with embeddings) holding
+        only the listed skills plus their LEARN skills (all skills if skill_ids is None)
+        """
+        wanted = set(skill_ids) if skill_ids is not None else None
+        users = []
+        for user_id in dict.fromkeys(user_ids):
+            user = self.tables["users"].get(user_id)
+            if not user:
+                continue
+            skills = [
+                self.tables["skills"][skill_id] for skill_id in self.skills_by_user.get(user_id, ())
+                if wanted is None or skill_id in wanted or self.tables["skills"][skill_id]["mode"] == "LEARN"
+            ]
+            users.append({
+                **self._project("users", user, columns),
+                "skills": [self._project("skills", skill, SKILL_COLUMNS_WITH_EMBEDDING) for skill in skills]
+            })
+        return users
+
+    async def create_user(self, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new user"""
+        try:
+            return dict(self._insert_user(user_data))
+        except Exception as e:
+            logger.error(f"Error creating user: {e}")
+            return None
+
+    async def update_user(self, user_id: str, user_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update user profile"""
+        previous_email = self.tables["users"].get(user_id, {}).get("email")
+        user = self._update("users", user_id, user_data)
+        if not user:
+            return None
+        if user["email"] != previous_email:
+            self.users_by_email.pop(previous_email, None)
+            self.users_by_email[user["email"]] = user_id
+        return dict(user)
+
+    async def bulk_upsert_users(
+        self,
+        users_data: List[Dict[str, Any]],
+        on_conflict: str = "email"
+    ) -> List[Dict[str, Any]]:
+        """Insert or update many users, keyed on email"""
+        try:
+            users = []
+            for data in dedupe_rows(users_data, on_conflict):
+                existing_id = self.users_by_email.get(data.get("email"))
+                if existing_id:
+                    users.append(dict(self._update("users", existing_id, data)))
+                else:
+                    users.append(dict(self._insert_user(data)))
+            return users
+        except Exception as e:
+            logger.error(f"Error bulk upserting {len(users_data)} users: {e}")
+            return []
+
+    # ==================== SKILL OPERATIONS ====================
+
+    async def get_user_skills(
+        self,
+        user_id: str,
+        mode: Optional[str] = None,
+        columns: str = SKILL_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """Get all skills for a user, optionally filtered by mode (TEACH/LEARN)"""
+        skills = [self.tables["skills"][skill_id] for skill_id in self.skills_by_user.get(user_id, ())]
+        if mode:
+            skills = [skill for skill in skills if skill["mode"] == mode]
+        skills.sort(key=lambda skill: skill["created_at"])
+        return [self._project("skills", skill, columns) for skill in skills]
+
+    async def create_skill(self, skill_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new skill with embedding"""
+        try:
+            return dict(self._insert_skill(skill_data))
+        except Exception as e:
+            logger.error(f"Error creating skill: {e}")
+            return None
+
+    async def bulk_upsert_skills(
+        self,
+        skills_data: List[Dict[str, Any]],
+        on_conflict: str = "user_id,name,mode",
+        bypass_rls: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Insert or update many skills, keyed on (user_id, name, mode)"""
+        try:
+            skills = []
+            for data in dedupe_rows(skills_data, on_conflict):
+                existing = self._find_skill(data.get("user_id"), data.get("name"), _to_storage(data.get("mode")))
+                if existing:
+                    skill = self._update("skills", existing["id"], data)
+                    self.skills_version += 1
+                else:
+                    skill = self._insert_skill(data)
+                skills.append(self._project("skills", skill, SKILL_COLUMNS))
+            return skills
+        except Exception as e:
+            logger.error(f"Error bulk upserting {len(skills_data)} skills: {e}")
+            return []
+
+    async def update_skill(self, skill_id: str, skill_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update skill"""
+        skill = self._update("skills", skill_id, skill_data)
+        if not skill:
+            return None
+        self.skills_version += 1
+        return dict(skill)
+
+    async def delete_skill(self, skill_id: str, user_id: str) -> bool:
+        """Delete skill (with ownership check)"""
+        skill = self.tables["skills"].get(skill_id)
+        if not skill or skill["user_id"] != user_id:
+            return False
+
+        del self.tables["skills"][skill_id]
+        self.skills_by_user.get(user_id, set()).discard(skill_id)
+        self.skills_version += 1
+
+        # ON DELETE CASCADE from matches.skill1_id / skill2_id
+        for match_id in list(self.matches_by_user.get(user_id, ())):
+            match = self.tables["matches"][match_id]
+            if skill_id in (match["skill1_id"], match["skill2_id"]):
+                self._delete_match(match_id)
+        return True
+
+    async def find_similar_skills(
+        self,
+        embedding: List[float],
+        mode: str,
+        limit: int = 10,
+        exclude_user_id: Optional[str] = None,
+        min_level: Optional[int] = None,
+        require_learn_skill: bool = False,
+        language: Optional[str] = None,
+        availability: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Find similar skills by exact (brute-force) cosine similarity, filtered before ranking"""
+        try:
+            skill_ids, matrix, owners = self._vector_index(mode)
+            if not skill_ids or limit <= 0:
+                return []
+
+            query = np.asarray(embedding, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1)
+            similarities = matrix @ query
+            if exclude_user_id:
+                similarities = np.where(owners == exclude_user_id, -np.inf, similarities)
+
+            slots = {(slot.get("day"), slot.get("time")) for slot in availability} if availability is not None else None
+
+            def passes(skill: Dict[str, Any]) -> bool:
+                if min_level is not None and skill["level"] < min_level:
+                    return False
+                if require_learn_skill and not any(
+                    self.tables["skills"][skill_id]["mode"] == "LEARN"
+                    and self.tables["skills"][skill_id].get("embedding") is not None
+                    for skill_id in self.skills_by_user.get(skill["user_id"], ())
+                ):
+                    return False
+                if language is not None and self.tables["users"].get(skill["user_id"], {}).get("preferred_language") != language:
+                    return False
+                if slots is not None and skill.get("availability") and not slots & {
+                    (slot.get("day"), slot.get("time")) for slot in skill["availability"]
+                }:
+                    return False
+                return True
+
+            # Rank a candidate pool, widening it while too few candidates pass the filters
+            pool = limit
+            while True:
+                k = min(pool, len(skill_ids))
+                top = np.argpartition(-similarities, k - 1)[:k]
+                top = top[np.argsort(-similarities[top], kind="stable")]
+                results = [
+                    {**self.tables["skills"][skill_ids[index]], "similarity": float(similarities[index])}
+                    for index in top
+                    if np.isfinite(similarities[index]) and passes(self.tables["skills"][skill_ids[index]])
+                ][:limit]
+                if len(results) >= limit or k == len(skill_ids):
+                    return results
+                pool *= 4
+        except Exception as e:
+            logger.error(f"Error finding similar skills: {e}")
+            return []
+
+    async def get_user_vectors(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Precomputed TEACH / LEARN skill centroids of a user"""
+        user_ids, teach_matrix, learn_matrix = self._centroid_index()
+        if user_id not in user_ids:
+            return None
+        index = user_ids.index(user_id)
+        return {
+            "user_id": user_id,
+            "teach_centroid": teach_matrix[index].tolist(),
+            "learn_centroid": learn_matrix[index].tolist()
+        }
+
+    async def find_reciprocal_users(
+        self,
+        teach_centroid: List[float],
+        learn_centroid: List[float],
+        limit: int = 50,
+        exclude_user_id: Optional[str] = None,
+        language: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Users whose skills complement a pair of centroids, by exact (brute-force) search"""
+        try:
+            user_ids, teach_matrix, learn_matrix = self._centroid_index()
+            if not user_ids or limit <= 0:
+                return []
+
+            def normalized(vector: List[float]) -> np.ndarray:
+                vector = np.asarray(vector, dtype=np.float32)
+                return vector / (np.linalg.norm(vector) or 1)
+
+            teach_similarities = teach_matrix @ normalized(learn_centroid)
+            learn_similarities = learn_matrix @ normalized(teach_centroid)
+            similarities = (teach_similarities + learn_similarities) / 2
+            if exclude_user_id in user_ids:
+                similarities[user_ids.index(exclude_user_id)] = -np.inf
+            if language is not None:
+                for index, user_id in enumerate(user_ids):
+                    if self.tables["users"][user_id].get("preferred_language") != language:
+                        similarities[index] = -np.inf
+
+            k = min(limit, len(user_ids))
+            top = np.argpartition(-similarities, k - 1)[:k]
+            top = top[np.argsort(-similarities[top], kind="stable")]
+            return [
+                {
+                    "user_id": user_ids[index],
+                    "teach_similarity": float(teach_similarities[index]),
+                    "learn_similarity": float(learn_similarities[index]),
+                    "similarity": float(similarities[index])
+                }
+                for index in top if np.isfinite(similarities[index])
+            ]
+        except Exception as e:
+            logger.error(f"Error finding reciprocal users: {e}")
+            return []
+
+    async def get_popular_skills(self, mode: str = "TEACH", limit: int = 20) -> List[Dict[str, Any]]:
+        """Most common (normalized name, level) pairs for a mode"""
+        counts = Counter(
+            (skill["name"].strip().lower(), skill["level"])
+            for skill in self.tables["skills"].values() if skill["mode"] == mode
+        )
+        return [
+            {"name": name, "level": level, "skill_count": count}
+            for (name, level), count in counts.most_common(limit)
+        ]
+
+    # ==================== MATCH OPERATIONS ====================
+
+    async def get_match(self, match_id: str, user_id: str, columns: str = MATCH_COLUMNS) -> Optional[Dict[str, Any]]:
+        """Get one match, only if the user takes part in it"""
+        match = self.tables["matches"].get(match_id)
+        if not match or user_id not in (match["user1_id"], match["user2_id"]):
+            return None
+        return self._project("matches", match, columns)
+
+    async def get_user_matches(
+        self,
+        user_id: str,
+        status: Optional[str] = None,
+        columns: str = MATCH_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """Get all matches for a user, best score first"""
+        matches = [self.tables["matches"][match_id] for match_id in self.matches_by_user.get(user_id, ())]
+        if status:
+            matches = [match for match in matches if match["status"] == status]
+        matches.sort(key=lambda match: match["total_score"], reverse=True)
+        return [self._project("matches", match, columns) for match in matches]
+
+    async def create_match(self, match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new match"""
+        try:
+            return dict(self._insert_match(match_data))
+        except Exception as e:
+            logger.error(f"Error creating match: {e}")
+            return None
+
+    async def update_match(self, match_id: str, match_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update match status"""
+        match = self._update("matches", match_id, match_data)
+        return dict(match) if match else None
+
+    # ==================== SESSION OPERATIONS ====================
+
+    async def get_match_sessions(self, match_id: str) -> List[Dict[str, Any]]:
+        """Get all sessions for a match"""
+        sessions = [self.tables["sessions"][session_id] for session_id in self.sessions_by_match.get(match_id, ())]
+        sessions.sort(key=lambda session: session["scheduled_at"])
+        return [dict(session) for session in sessions]
+
+    async def create_session(self, session_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new session"""
+        try:
+            self._require("matches", session_data.get("match_id"))
+            match = self.tables["matches"][session_data["match_id"]]
+            # Participants are copied from the match, as the set_session_participants trigger does
+            session = self._insert("sessions", {
+                **session_data,
+                "user1_id": match["user1_id"],
+                "user2_id": match["user2_id"]
+            })
+            self.sessions_by_match.setdefault(session["match_id"], set()).add(session["id"])
+            for user_key in ("user1_id", "user2_id"):
+                self.sessions_by_user.setdefault(session[user_key], set()).add(session["id"])
+            return dict(session)
+        except Exception as e:
+            logger.error(f"Error creating session: {e}")
+            return None
+
+    async def update_session(self, session_id: str, session_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update session"""
+        session = self._update("sessions", session_id, session_data)
+        return dict(session) if session else None
+
+    def _user_sessions(self, user_id: str) -> List[Tuple[datetime, Dict[str, Any]]]:
+        """A user's sessions paired with their parsed start time, earliest first"""
+        sessions = []
+        for session_id in self.sessions_by_user.get(user_id, ()):
+            session = self.tables["sessions"][session_id]
+            scheduled_at = parse_timestamp(session["scheduled_at"])
+            if scheduled_at.tzinfo is None:
+                scheduled_at = scheduled_at.replace(tzinfo=timezone.utc)
+            sessions.append((scheduled_at, session))
+        sessions.sort(key=lambda item: item[0])
+        return sessions
+
+    async def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get all sessions for a user across all their matches"""
+        return [dict(session) for _, session in self._user_sessions(user_id)]
+
+    async def get_upcoming_sessions(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get a user's scheduled sessions that have not started yet, earliest first"""
+        now = datetime.now(timezone.utc)
+        upcoming = [
+            dict(session) for scheduled_at, session in self._user_sessions(user_id)
+            if scheduled_at >= now and session["status"] == "SCHEDULED"
+        ]
+        return upcoming[:limit]
+
+    async def get_sessions_in_range(
+        self,
+        user_id: str,
+        start: datetime,
+        end: datetime,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get a user's sessions scheduled in [start, end), earliest first"""
+        start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+        end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+        in_range = [
+            dict(session) for scheduled_at, session in self._user_sessions(user_id)
+            if start <= scheduled_at < end
+        ]
+        return in_range[:limit]
+
+    # ==================== MESSAGE OPERATIONS ====================
+
+    async def get_match_messages(
+        self,
+        match_id: str,
+        limit: int = 50,
+        before: Optional[Tuple[str, str]] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get a page of messages for a match, newest first"""
+        def position(message: Dict[str, Any]) -> Tuple[datetime, str]:
+            return parse_timestamp(message["created_at"]), message["id"]
+
+        messages = [self.tables["messages"][message_id] for message_id in self.messages_by_match.get(match_id, [])]
+        if before:
+            cursor = (parse_timestamp(before[0]), before[1])
+            messages = [message for message in messages if position(message) < cursor]
+        if after:
+            cursor = (parse_timestamp(after[0]), after[1])
+            messages = [message for message in messages if position(message) > cursor]
+
+        messages.sort(key=position, reverse=True)
+        # An `after` page starts right at the cursor, i.e. the oldest newer messages
+        page = messages[-limit:] if after and not before else messages[:limit]
+        return [
+            self._project("messages", message, "*, sender:users!messages_sender_id_fkey(id, name, avatar_url)")
+            for message in page
+        ]
+
+    async def create_message(self, message_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create new message"""
+        try:
+            self._require("matches", message_data.get("match_id"))
+            self._require("users", message_data.get("sender_id"))
+            message = self._insert("messages", message_data)
+            self.messages_by_match.setdefault(message["match_id"], []).append(message["id"])
+            return dict(message)
+        except Exception as e:
+            logger.error(f"Error creating message: {e}")
+            return None
+
+    async def get_user_inbox(self, user_id: str) -> List[Dict[str, Any]]:
+        """Get every conversation for a user with last message and unread count"""
+        inbox = []
+        for match_id in self.matches_by_user.get(user_id, ()):
+            match = self.tables["matches"][match_id]
+            other_id = match["user2_id"] if match["user1_id"] == user_id else match["user1_id"]
+            other = self.tables["users"].get(other_id, {})
+            messages = [self.tables["messages"][message_id] for message_id in self.messages_by_match.get(match_id, [])]
+            last = max(messages, key=lambda message: (parse_timestamp(message["created_at"]), message["id"]), default=None)
+
+            inbox.append({
+                "match_id": match_id,
+                "match_status": match["status"],
+                "other_user_id": other_id,
+                "other_user_name": other.get("name"),
+                "other_user_avatar_url": other.get("avatar_url"),
+                "last_message_id": last["id"] if last else None,
+                "last_message_preview": last["content"][:200] if last else None,
+                "last_message_sender_id": last["sender_id"] if last else None,
+                "last_message_at": last["created_at"] if last else None,
+                "unread_count": self._count_unread(
+                    match_id, user_id, self.read_markers.get(match_id, {}).get(user_id)
+                )
+            })
+
+        inbox.sort(
+            key=lambda entry: parse_timestamp(
+                entry["last_message_at"] or self.tables["matches"][entry["match_id"]]["created_at"]
+            ),
+            reverse=True
+        )
+        return inbox
+
+    # ==================== READ MARKER OPERATIONS ====================
+
+    async def get_read_markers(self, match_id: str) -> Dict[str, str]:
+        """Get each participant's last_read_at marker for a match, keyed by user ID"""
+        return dict(self.read_markers.get(match_id, {}))
+
+    async def advance_read_marker(self, match_id: str, user_id: str, read_at: str) -> bool:
+        """Move a user's read marker for a match forward to read_at (never backwards)"""
+        markers = self.read_markers.setdefault(match_id, {})
+        current = markers.get(user_id)
+        if current is None or parse_timestamp(read_at) > parse_timestamp(current):
+            markers[user_id] = read_at
+        return True
+
+    async def count_unread_messages(
+        self,
+        match_id: str,
+        user_id: str,
+        last_read_at: Optional[str] = None
+    ) -> int:
+        """Count messages from the other participant newer than the user's read marker"""
+        return self._count_unread(match_id, user_id, last_read_at)
+
+    def _count_unread(self, match_id: str, user_id: str, last_read_at: Optional[str]) -> int:
+        read_at = parse_timestamp(last_read_at) if last_read_at else None
+        return sum(
+            1 for message_id in self.messages_by_match.get(match_id, [])
+            if self.tables["messages"][message_id]["sender_id"] != user_id
+            and (read_at is None or parse_timestamp(self.tables["messages"][message_id]["created_at"]) > read_at)
+        )
+
+    # ==================== JOB OPERATIONS ====================
+
+    async def create_job(self, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Record a new background job"""
+        try:
+            return dict(self._insert("jobs", job_data))
+        except Exception as e:
+            logger.error(f"Error creating job: {e}")
+            return None
+
+    async def claim_job(self, job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Mark a job RUNNING and count the attempt, unless it changed since it was read"""
+        row = self.tables["jobs"].get(job["id"])
+        if not row or row["status"] != job["status"] or row["updated_at"] != job["updated_at"]:
+            return None
+        return dict(self._update("jobs", job["id"], {"status": "RUNNING", "attempts": job["attempts"] + 1}))
+
+    async def update_job(self, job_id: str, job_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a job's status or error"""
+        job = self._update("jobs", job_id, job_data)
+        return dict(job) if job else None
+
+    async def get_runnable_jobs(self, stale_before: str, limit: int = 500) -> List[Dict[str, Any]]:
+        """Get PENDING jobs plus RUNNING ones not touched since stale_before, oldest first"""
+        stale = parse_timestamp(stale_before)
+        jobs = [
+            job for job in self.tables["jobs"].values()
+            if job["status"] == "PENDING"
+            or (job["status"] == "RUNNING" and parse_timestamp(job["updated_at"]) < stale)
+        ]
+        jobs.sort(key=lambda job: job["created_at"])
+        return [dict(job) for job in jobs[:limit]]
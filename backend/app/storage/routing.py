@@ -0,0 +1,134 @@
+"""
+Read Replica Routing
+Decides per call whether a read may go to the replica or must use the primary
+"""
+
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# ID of the user the current request acts for (set by auth.get_current_user).
+# Used to give that user read-your-writes consistency after their own writes.
+current_request_user: ContextVar[Optional[str]] = ContextVar("current_request_user", default=None)
+
+
+class ReplicaRouter:
+    """
+    Routing policy for a primary/replica pair
+
+    A read goes to the replica only if its method is routed there, the
+    replica is healthy, its last measured lag is within bounds, and the
+    requesting user has not written within the stickiness window.
+
+    Routing decisions only read in-memory state; the lag is measured by
+    monitor_lag(), which runs as a background task.
+    """
+
+    def __init__(
+        self,
+        routed_methods: Iterable[str],
+        sticky_seconds: float = 5.0,
+        max_lag_seconds: float = 10.0,
+        lag_check_interval: float = 5.0,
+        retry_after_seconds: float = 30.0,
+        lag_probe: Optional[Callable[[], float]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.routed_methods = set(routed_methods)
+        self.sticky_seconds = sticky_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_interval = lag_check_interval
+        self.retry_after_seconds = retry_after_seconds
+        self.lag_probe = lag_probe
+        self.clock = clock
+
+        self.last_write_at: Dict[str, float] = {}
+        self.unavailable_until = 0.0
+        self.last_lag: Optional[float] = None
+
+    def record_write(self, user_id: Optional[str] = None):
+        """Pin the writing user's reads to the primary for the stickiness window"""
+        user_id = user_id or current_request_user.get()
+        if not user_id:
+            return
+
+        now = self.clock()
+        self.last_write_at[user_id] = now
+
+        # Drop expired entries now and then so the map stays small
+        if len(self.last_write_at) > 10000:
+            cutoff = now - self.sticky_seconds
+            self.last_write_at = {uid: at for uid, at in self.last_write_at.items() if at >= cutoff}
+
+    def is_sticky(self, user_id: Optional[str] = None) -> bool:
+        """Whether the user wrote recently enough that the replica may not have it yet"""
+        user_id = user_id or current_request_user.get()
+        if not user_id or user_id not in self.last_write_at:
+            return False
+        return self.clock() - self.last_write_at[user_id] < self.sticky_seconds
+
+    def mark_unavailable(self, reason: Any = None):
+        """Send all reads to the primary until the retry window passes"""
+        self.unavailable_until = self.clock() + self.retry_after_seconds
+        logger.warning(f"Read replica unavailable, using primary for {self.retry_after_seconds}s: {reason}")
+
+    async def refresh_lag(self):
+        """Measure the replication lag once (the blocking probe runs in a worker thread)"""
+        try:
+            self.last_lag = float(await asyncio.to_thread(self.lag_probe))
+        except Exception as e:
+            self.mark_unavailable(e)
+
+    async def monitor_lag(self):
+        """Refresh the replication lag every lag_check_interval seconds until cancelled"""
+        while True:
+            await self.refresh_lag()
+            await asyncio.sleep(self.lag_check_interval)
+
+    def replica_healthy(self) -> bool:
+        """Replica is reachable and its last measured replication lag is acceptable"""
+        if self.clock() < self.unavailable_until:
+            return False
+
+        if self.last_lag is not None and self.last_lag > self.max_lag_seconds:
+            return False
+        return True
+
+    def use_replica(self, method: str, user_id: Optional[str] = None) -> bool:
+        """Whether this read should be served by the replica"""
+        return (
+            method in self.routed_methods
+            and not self.is_sticky(user_id)
+            and self.replica_healthy()
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current routing state for diagnostics"""
+        return {
+            "routed_methods": sorted(self.routed_methods),
+            "replica_available": self.clock() >= self.unavailable_until,
+            "last_lag_seconds": self.last_lag,
+            "sticky_users": sum(1 for at in self.last_write_at.values() if self.clock() - at < self.sticky_seconds)
+        }
+
+
+def write_operation(func: Callable) -> Callable:
+    """
+    Mark a Database method as a write
+
+    The requesting user's subsequent reads stay on the primary for the
+    stickiness window. Requires the instance to have a `router` attribute
+    (None when no replica is configured).
+    """
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if self.router:
+            self.router.record_write()
+        return await func(self, *args, **kwargs)
+
+    return wrapper
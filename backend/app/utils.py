@@ -4,8 +4,12 @@ Calendar export, sanitization, and other helpers
 """
 
 from icalendar import Calendar, Event
+from dateutil.parser import isoparse
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+import base64
+import hashlib
+import json
 import re
 import html
 
@@ -131,3 +135,73 @@ def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
         return text
     
     return text[:max_length - len(suffix)] + suffix
+
+
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """
+    Encode a (created_at, id) keyset position as an opaque, URL-safe cursor
+    
+    Args:
+        created_at: ISO timestamp of the row
+        row_id: UUID of the row (tie-breaker for equal timestamps)
+    
+    Returns:
+        Cursor string safe to pass as a query parameter
+    """
+    raw = f"{created_at}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor: Opaque cursor string
+    
+    Returns:
+        Tuple of (created_at, id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        # Validate both halves before they are interpolated into a filter
+        parse_timestamp(created_at)
+        if not re.fullmatch(r"[0-9a-fA-F-]{36}", row_id):
+            raise ValueError("invalid row id")
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    return created_at, row_id
+
+
+def parse_timestamp(value: str) -> datetime:
+    """
+    Parse an ISO timestamp as returned by PostgREST
+    
+    Args:
+        value: ISO 8601 timestamp
+    
+    Returns:
+        Timezone-aware datetime
+    """
+    # dateutil copes with the variable-precision fractional seconds PostgREST emits
+    return isoparse(value)
+
+
+def compute_etag(value: Any) -> str:
+    """
+    Compute a strong ETag for a JSON-serializable value
+    
+    Args:
+        value: Data as it will be returned to the client
+    
+    Returns:
+        Quoted ETag string
+    """
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]}"'
@@ -0,0 +1,171 @@
+"""
+Offline matching benchmark
+Loads synthetic users into the in-memory storage engine and profiles find_matches
+
+With --recall, every query is also run with an exhaustive candidate search
+and the recall of the returned top-K (matched users) is reported, to tune
+the candidate fan-out against latency.
+
+Usage:
+    python benchmark_matching.py --users 100000 --queries 50
+    python benchmark_matching.py --users 20000 --recall
+    python benchmark_matching.py --users 20000 --recall --fanout 10
+    python benchmark_matching.py --users 20000 --recall --candidates skill
+"""
+
+import os
+
+# Select the in-memory backend before the app modules read their settings
+os.environ["STORAGE_BACKEND"] = "memory"
+for key in ("OPENAI_API_KEY", "OPENROUTER_API_KEY", "SECRET_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.database import db
+from app.metrics import metrics
+from app.services.matching import matching_service
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+TIMES = ["morning", "afternoon", "evening"]
+LANGUAGES = ["English", "English", "English", "Spanish", "French", "German"]
+
+
+def make_topics(count: int, dimension: int, rng: np.random.Generator) -> np.ndarray:
+    """Random unit vectors acting as skill 'topics'"""
+    topics = rng.normal(size=(count, dimension)).astype(np.float32)
+    return topics / np.linalg.norm(topics, axis=1, keepdims=True)
+
+
+def skill_embedding(topic: np.ndarray, rng: np.random.Generator, noise: float = 0.15) -> list:
+    """A skill embedding scattered around its topic vector"""
+    vector = topic + noise * rng.normal(size=topic.shape).astype(np.float32) / np.sqrt(topic.shape[0])
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+async def load_synthetic_users(
+    user_count: int,
+    topic_count: int = 500,
+    dimension: int = 384,
+    seed: int = 7
+) -> list:
+    """Populate the in-memory engine with users and TEACH/LEARN skills; returns user IDs"""
+    rng = np.random.default_rng(seed)
+    py_rng = random.Random(seed)
+    topics = make_topics(topic_count, dimension, rng)
+    # Popularity follows a rough power law so some skills are common and some rare
+    popularity = 1 / np.arange(1, topic_count + 1) ** 0.8
+    popularity /= popularity.sum()
+
+    users = await db.bulk_upsert_users([
+        {
+            "email": f"user{index}@bench.local",
+            "name": f"User {index}",
+            "preferred_language": py_rng.choice(LANGUAGES)
+        }
+        for index in range(user_count)
+    ])
+
+    skills = []
+    for user in users:
+        teach_topics = rng.choice(topic_count, size=py_rng.randint(1, 4), replace=False, p=popularity)
+        learn_topics = rng.choice(topic_count, size=py_rng.randint(1, 3), replace=False, p=popularity)
+        availability = [
+            {"day": py_rng.choice(DAYS), "time": py_rng.choice(TIMES)}
+            for _ in range(py_rng.randint(0, 4))
+        ]
+        for mode, chosen in (("TEACH", teach_topics), ("LEARN", learn_topics)):
+            for topic in chosen:
+                skills.append({
+                    "user_id": user["id"],
+                    "name": f"Topic {topic}",
+                    "mode": mode,
+                    "level": py_rng.randint(3, 5) if mode == "TEACH" else py_rng.randint(1, 3),
+                    "availability": availability,
+                    "embedding": skill_embedding(topics[topic], rng)
+                })
+
+    await db.bulk_upsert_skills(skills)
+    return [user["id"] for user in users]
+
+
+async def run(args):
+    settings.match_candidate_generation = args.candidates
+    start = time.perf_counter()
+    user_ids = await load_synthetic_users(args.users, topic_count=args.topics, seed=args.seed)
+    print(f"Loaded {len(user_ids)} users in {time.perf_counter() - start:.1f}s")
+
+    metrics.reset()
+    sample = random.Random(args.seed).sample(user_ids, min(args.queries, len(user_ids)))
+    # Enough candidates per learn skill to see every TEACH skill
+    exhaustive_fanout = sum(1 for skill in db.tables["skills"].values() if skill["mode"] == "TEACH")
+    latencies = []
+    recalls = []
+    for user_id in sample:
+        # Cold score memo, so neither run benefits from the other's scoring
+        matching_service.score_memo.clear()
+        start = time.perf_counter()
+        matches = await matching_service.find_matches(user_id, limit=args.limit, fanout=args.fanout)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        if args.recall:
+            candidates = metrics.counters.get("matching.candidates", 0)
+            matching_service.score_memo.clear()
+            exact = await matching_service.find_matches(user_id, limit=args.limit, fanout=exhaustive_fanout)
+            # Don't count the baseline's candidates
+            metrics.counters["matching.candidates"] = candidates
+            if exact:
+                found = {match["user2_id"] for match in matches}
+                recalls.append(sum(match["user2_id"] in found for match in exact) / len(exact))
+
+    latencies.sort()
+    if args.fanout:
+        strategy = f"per-skill search, fixed fan-out {args.fanout}"
+    elif args.candidates == "skill":
+        strategy = "per-skill search, adaptive fan-out"
+    else:
+        strategy = f"centroid shortlist of {args.limit * settings.match_shortlist_factor}"
+    print(f"find_matches over {len(sample)} users (limit={args.limit}, {strategy}):")
+    print(f"  mean {statistics.mean(latencies):.1f}ms  "
+          f"p50 {latencies[len(latencies) // 2]:.1f}ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.1f}ms  "
+          f"max {latencies[-1]:.1f}ms")
+    print(f"  candidates scored per query {metrics.counters.get('matching.candidates', 0) / len(sample):.1f}  "
+          f"widenings {metrics.counters.get('matching.fanout.widened', 0)}")
+    if args.recall:
+        if recalls:
+            print(f"  recall@{args.limit} vs exhaustive: mean {statistics.mean(recalls):.3f}  "
+                  f"min {min(recalls):.3f}  perfect {sum(r == 1 for r in recalls)}/{len(recalls)}")
+        else:
+            print("  recall: no query had matches")
+
+    print("Storage calls:")
+    for name, stats in metrics.snapshot(prefix="db.")["operations"].items():
+        print(f"  {name:<32} calls {stats['count']:>7}  avg {stats['avg_ms']:>8.3f}ms  rows {stats['avg_rows']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile find_matches against synthetic users")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--candidates", choices=["centroid", "skill"], default=settings.match_candidate_generation,
+                        help="Candidate generation strategy")
+    parser.add_argument("--fanout", type=int, default=None,
+                        help="Fixed candidates per learn skill (default: adaptive)")
+    parser.add_argument("--recall", action="store_true",
+                        help="Also run an exhaustive search per query and report recall of the top-K")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
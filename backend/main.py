@@ -8,7 +8,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from app.config import settings
-from app.routes import users, skills, matches, sessions, messages, assistant
+from app.database import db
+from app.services.llm import llm_client
+from app.services.agenda_pregeneration import run_agenda_pregeneration
+from app.services.job_queue import job_queue
+from app.routes import users, skills, matches, sessions, messages, assistant, metrics, dashboard
+import asyncio
 import logging
 import time
 
@@ -37,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Before-Cursor", "X-After-Cursor", "ETag", "X-Conversation-Id"],
 )
 
 
@@ -104,6 +110,8 @@ app.include_router(matches.router)
 app.include_router(sessions.router)
 app.include_router(messages.router)
 app.include_router(assistant.router)
+app.include_router(metrics.router)
+app.include_router(dashboard.router)
 
 
 # Health check endpoint
@@ -138,12 +146,29 @@ async def startup_event():
     logger.info(f"Environment: {settings.app_env}")
     logger.info(f"CORS Origins: {settings.cors_origins_list}")
     logger.info("API Documentation: /docs")
+    
+    await job_queue.start()
+    
+    # Measure replica lag in the background so read routing never waits on it
+    router = getattr(db, "router", None)
+    if router and router.lag_probe:
+        app.state.replica_lag_monitor = asyncio.create_task(router.monitor_lag())
+    
+    if settings.agenda_pregenerate_top_skills > 0:
+        app.state.agenda_pregeneration = asyncio.create_task(run_agenda_pregeneration())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     logger.info("Shutting down TradeCraft API...")
+    
+    for task_name in ("agenda_pregeneration", "replica_lag_monitor"):
+        task = getattr(app.state, task_name, None)
+        if task:
+            task.cancel()
+    await job_queue.stop()
+    await llm_client.aclose()
 
 
 # ==================== MAIN ====================
@@ -91,62 +91,50 @@ SAMPLE_USERS = [
 async def seed_users():
     print("🌱 Starting database seed...")
     
+    # 1. Upsert all users in one request (keyed on email, so re-running is safe)
+    # Note: In a real scenario, we'd need them in auth.users too for them to login.
+    # But for matching candidates, public.users is sufficient if we assume they are "offline".
+    users = await db.bulk_upsert_users([
+        {
+            "email": user_data["email"],
+            "name": user_data["name"],
+            "bio": user_data["bio"],
+            "avatar_url": user_data["avatar_url"]
+        }
+        for user_data in SAMPLE_USERS
+    ])
+    
+    if not users:
+        print("  Failed to create users")
+        return
+    
+    user_ids = {user["email"]: user["id"] for user in users}
+    print(f"  Upserted {len(users)} users")
+    
+    # 2. Collect every skill for every user
+    all_skills = []
     for user_data in SAMPLE_USERS:
-        print(f"Processing {user_data['name']}...")
+        user_id = user_ids.get(user_data["email"])
+        if not user_id:
+            print(f"  Missing user {user_data['name']}, skipping their skills")
+            continue
         
-        # 1. Create User (Bypassing Auth specific logic, just inserting into public.users)
-        # Note: In a real scenario, we'd need them in auth.users too for them to login.
-        # But for matching candidates, public.users is sufficient if we assume they are "offline".
-        # We generate a deterministic UUID based on email for repeatability if needed, but here we let DB handle it or random.
-        
-        # Check if exists
-        existing = await db.service_client.table("users").select("id").eq("email", user_data["email"]).execute()
-        if existing.data:
-            print(f"  User {user_data['name']} already exists. Skipping creation.")
-            user_id = existing.data[0]['id']
-        else:
-            # Create user
-            res = await db.service_client.table("users").insert({
-                "email": user_data["email"],
-                "name": user_data["name"],
-                "bio": user_data["bio"],
-                "avatar_url": user_data["avatar_url"]
-            }).execute()
-            
-            if not res.data:
-                print(f"  Failed to create user {user_data['name']}")
-                continue
-            
-            user_id = res.data[0]['id']
-            print(f"  Created user ID: {user_id}")
-
-        # 2. Add Skills
-        all_skills = [
-            {"name": name, "level": level, "mode": "TEACH"} for name, level in user_data["teach"]
+        all_skills += [
+            {"user_id": user_id, "name": name, "level": level, "mode": "TEACH"}
+            for name, level in user_data["teach"]
         ] + [
-            {"name": name, "level": level, "mode": "LEARN"} for name, level in user_data["learn"]
+            {"user_id": user_id, "name": name, "level": level, "mode": "LEARN"}
+            for name, level in user_data["learn"]
         ]
-        
-        for skill in all_skills:
-            # Check for existing skill
-            skill_exists = await db.service_client.table("skills").select("id").eq("user_id", user_id).eq("name", skill["name"]).eq("mode", skill["mode"]).execute()
-            if skill_exists.data:
-                continue
-
-            # Generate embedding
-            embedding = embeddings_service.generate_embedding(skill["name"])
-            
-            # Insert skill
-            await db.service_client.table("skills").insert({
-                "user_id": user_id,
-                "name": skill["name"],
-                "level": skill["level"],
-                "mode": skill["mode"],
-                "embedding": embedding,
-                "canonical_text": skill["name"]
-            }).execute()
-            
-        print(f"  Added {len(all_skills)} skills for {user_data['name']}")
+    
+    # 3. Embed all skill names in one batch and upsert them in one request
+    embeddings = embeddings_service.generate_embeddings([skill["name"] for skill in all_skills])
+    for skill, embedding in zip(all_skills, embeddings):
+        skill["embedding"] = embedding
+        skill["canonical_text"] = skill["name"]
+    
+    skills = await db.bulk_upsert_skills(all_skills, bypass_rls=True)
+    print(f"  Upserted {len(skills)} skills for {len(user_ids)} users")
 
     print("✅ Seeding complete! You can now find these matches in the dashboard.")
 
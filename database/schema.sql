@@ -48,7 +48,9 @@ CREATE TABLE skills (
     -- Constraints
     CONSTRAINT skill_level_range CHECK (level >= 1 AND level <= 5),
     CONSTRAINT skill_name_length CHECK (LENGTH(name) >= 2 AND LENGTH(name) <= 255),
-    CONSTRAINT availability_is_array CHECK (jsonb_typeof(availability) = 'array')
+    CONSTRAINT availability_is_array CHECK (jsonb_typeof(availability) = 'array'),
+    -- Conflict key for bulk upserts (onboarding, seeding)
+    CONSTRAINT unique_user_skill UNIQUE (user_id, name, mode)
 );
 
 -- Indexes for performance
@@ -56,8 +58,28 @@ CREATE INDEX idx_skills_user_id ON skills(user_id);
 CREATE INDEX idx_skills_mode ON skills(mode);
 CREATE INDEX idx_skills_name ON skills(name);
 
--- Vector similarity index (HNSW for fast approximate nearest neighbor search)
-CREATE INDEX idx_skills_embedding ON skills USING hnsw (embedding vector_cosine_ops);
+-- Vector similarity indexes (HNSW for fast approximate nearest neighbor search),
+-- one per mode: searches always ask for one mode, and on a shared index the
+-- mode filter would discard about half of the rows each scan returns
+CREATE INDEX idx_skills_embedding_teach ON skills USING hnsw (embedding vector_cosine_ops) WHERE mode = 'TEACH';
+CREATE INDEX idx_skills_embedding_learn ON skills USING hnsw (embedding vector_cosine_ops) WHERE mode = 'LEARN';
+
+-- =====================================================
+-- USER VECTORS TABLE
+-- =====================================================
+-- Per-user centroids of skill embeddings: what the user teaches and what they
+-- want to learn. Maintained by a trigger on skills; discover searches them to
+-- shortlist reciprocal partners before scoring individual skills. Kept out of
+-- users so that refreshing them doesn't touch users.updated_at.
+CREATE TABLE user_vectors (
+    user_id UUID PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    teach_centroid vector(384),
+    learn_centroid vector(384),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_user_vectors_teach ON user_vectors USING hnsw (teach_centroid vector_cosine_ops);
+CREATE INDEX idx_user_vectors_learn ON user_vectors USING hnsw (learn_centroid vector_cosine_ops);
 
 -- =====================================================
 -- MATCHES TABLE
@@ -114,6 +136,9 @@ CREATE TYPE session_status AS ENUM ('SCHEDULED', 'COMPLETED', 'CANCELLED');
 CREATE TABLE sessions (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
     match_id UUID NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    -- Participants copied from the match on insert (see set_session_participants)
+    user1_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    user2_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     agenda TEXT NOT NULL,
     scheduled_at TIMESTAMP WITH TIME ZONE NOT NULL,
     duration_minutes INTEGER NOT NULL,
@@ -134,6 +159,9 @@ CREATE TABLE sessions (
 CREATE INDEX idx_sessions_match_id ON sessions(match_id);
 CREATE INDEX idx_sessions_scheduled_at ON sessions(scheduled_at);
 CREATE INDEX idx_sessions_status ON sessions(status);
+-- Per-participant timelines: "my sessions between X and Y" is a range scan on each
+CREATE INDEX idx_sessions_user1_scheduled ON sessions(user1_id, scheduled_at);
+CREATE INDEX idx_sessions_user2_scheduled ON sessions(user2_id, scheduled_at);
 
 -- =====================================================
 -- MESSAGES TABLE
@@ -143,7 +171,6 @@ CREATE TABLE messages (
     match_id UUID NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
     sender_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     content TEXT NOT NULL,
-    is_read BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     
     -- Constraints
@@ -151,10 +178,50 @@ CREATE TABLE messages (
 );
 
 -- Indexes
-CREATE INDEX idx_messages_match_id ON messages(match_id);
+-- Composite keyset index: serves "WHERE match_id = ? ORDER BY created_at DESC, id DESC"
+-- and (created_at, id) cursor ranges without a sort, whatever the thread length
+CREATE INDEX idx_messages_match_created ON messages(match_id, created_at DESC, id DESC);
 CREATE INDEX idx_messages_sender_id ON messages(sender_id);
 CREATE INDEX idx_messages_created_at ON messages(created_at DESC);
 
+-- =====================================================
+-- MESSAGE READ MARKERS
+-- =====================================================
+-- One row per (user, match): everything in the match created at or before
+-- last_read_at counts as read by that user. Replaces per-message is_read flags,
+-- so reading a thread is a single-row upsert instead of a bulk UPDATE.
+CREATE TABLE message_reads (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    match_id UUID NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    last_read_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    
+    PRIMARY KEY (user_id, match_id)
+);
+
+CREATE INDEX idx_message_reads_match_id ON message_reads(match_id);
+
+-- =====================================================
+-- JOBS TABLE
+-- =====================================================
+-- Background work run by the backend's in-process job queue (e.g. upgrading
+-- a match's template explanation). Persisted so jobs survive restarts.
+CREATE TYPE job_status AS ENUM ('PENDING', 'RUNNING', 'DONE', 'FAILED');
+
+CREATE TABLE jobs (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    kind VARCHAR(100) NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    status job_status NOT NULL DEFAULT 'PENDING',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Only unfinished jobs are ever scanned (startup recovery)
+CREATE INDEX idx_jobs_unfinished ON jobs(status, created_at) WHERE status IN ('PENDING', 'RUNNING');
+
 -- =====================================================
 -- UPDATED_AT TRIGGER FUNCTION
 -- =====================================================
@@ -179,6 +246,78 @@ CREATE TRIGGER update_matches_updated_at BEFORE UPDATE ON matches
 CREATE TRIGGER update_sessions_updated_at BEFORE UPDATE ON sessions
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_jobs_updated_at BEFORE UPDATE ON jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- Keep sessions.user1_id/user2_id equal to the match participants
+CREATE OR REPLACE FUNCTION set_session_participants()
+RETURNS TRIGGER AS $$
+BEGIN
+    SELECT m.user1_id, m.user2_id INTO NEW.user1_id, NEW.user2_id
+    FROM matches m
+    WHERE m.id = NEW.match_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER set_sessions_participants BEFORE INSERT OR UPDATE OF match_id, user1_id, user2_id ON sessions
+    FOR EACH ROW EXECUTE FUNCTION set_session_participants();
+
+-- Recompute the centroids of the users whose skills changed, once per user per
+-- statement, so a bulk upsert of N skills doesn't average them N times.
+-- Transition tables can't be combined with several events or a column list,
+-- so each event has its own trigger and updates that leave user_id, mode and
+-- embedding alone are skipped here. SECURITY DEFINER because user_vectors is
+-- only writable by the service role.
+CREATE OR REPLACE FUNCTION refresh_user_vectors()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_user_ids UUID[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT user_id) INTO changed_user_ids FROM new_skills;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT user_id) INTO changed_user_ids FROM old_skills;
+    ELSE
+        SELECT array_agg(DISTINCT changed.user_id) INTO changed_user_ids
+        FROM old_skills o
+        JOIN new_skills n ON n.id = o.id
+        CROSS JOIN LATERAL (VALUES (o.user_id), (n.user_id)) AS changed(user_id)
+        WHERE (o.user_id, o.mode, o.embedding) IS DISTINCT FROM (n.user_id, n.mode, n.embedding);
+    END IF;
+
+    IF changed_user_ids IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO user_vectors (user_id, teach_centroid, learn_centroid, updated_at)
+    SELECT
+        u.id,
+        (SELECT AVG(s.embedding) FROM skills s WHERE s.user_id = u.id AND s.mode = 'TEACH' AND s.embedding IS NOT NULL),
+        (SELECT AVG(s.embedding) FROM skills s WHERE s.user_id = u.id AND s.mode = 'LEARN' AND s.embedding IS NOT NULL),
+        NOW()
+    FROM users u
+    WHERE u.id = ANY(changed_user_ids)
+    ON CONFLICT (user_id) DO UPDATE
+        SET teach_centroid = EXCLUDED.teach_centroid,
+            learn_centroid = EXCLUDED.learn_centroid,
+            updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER refresh_user_vectors_on_skills_insert AFTER INSERT ON skills
+    REFERENCING NEW TABLE AS new_skills
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_user_vectors();
+
+CREATE TRIGGER refresh_user_vectors_on_skills_update AFTER UPDATE ON skills
+    REFERENCING OLD TABLE AS old_skills NEW TABLE AS new_skills
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_user_vectors();
+
+CREATE TRIGGER refresh_user_vectors_on_skills_delete AFTER DELETE ON skills
+    REFERENCING OLD TABLE AS old_skills
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_user_vectors();
+
 -- =====================================================
 -- ROW LEVEL SECURITY (RLS) POLICIES
 -- =====================================================
@@ -189,6 +328,10 @@ ALTER TABLE skills ENABLE ROW LEVEL SECURITY;
 ALTER TABLE matches ENABLE ROW LEVEL SECURITY;
 ALTER TABLE sessions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE messages ENABLE ROW LEVEL SECURITY;
+ALTER TABLE message_reads ENABLE ROW LEVEL SECURITY;
+-- No policies: jobs and user_vectors are only accessed with the service role
+ALTER TABLE jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_vectors ENABLE ROW LEVEL SECURITY;
 
 -- Users: Can read all, but only update their own profile
 CREATE POLICY "Users can view all profiles" ON users
@@ -225,13 +368,7 @@ CREATE POLICY "Users can update their matches" ON matches
 
 -- Sessions: Users can view/manage sessions for their matches
 CREATE POLICY "Users can view their sessions" ON sessions
-    FOR SELECT USING (
-        EXISTS (
-            SELECT 1 FROM matches 
-            WHERE matches.id = sessions.match_id 
-            AND (matches.user1_id = auth.uid() OR matches.user2_id = auth.uid())
-        )
-    );
+    FOR SELECT USING (auth.uid() = user1_id OR auth.uid() = user2_id);
 
 CREATE POLICY "Users can create sessions for their matches" ON sessions
     FOR INSERT WITH CHECK (
@@ -243,13 +380,7 @@ CREATE POLICY "Users can create sessions for their matches" ON sessions
     );
 
 CREATE POLICY "Users can update their sessions" ON sessions
-    FOR UPDATE USING (
-        EXISTS (
-            SELECT 1 FROM matches 
-            WHERE matches.id = sessions.match_id 
-            AND (matches.user1_id = auth.uid() OR matches.user2_id = auth.uid())
-        )
-    );
+    FOR UPDATE USING (auth.uid() = user1_id OR auth.uid() = user2_id);
 
 -- Messages: Users can view/send messages in their matches
 CREATE POLICY "Users can view messages in their matches" ON messages
@@ -271,36 +402,248 @@ CREATE POLICY "Users can send messages in their matches" ON messages
         )
     );
 
+-- Read markers: participants can see both markers in their matches, but only move their own
+CREATE POLICY "Users can view read markers in their matches" ON message_reads
+    FOR SELECT USING (
+        EXISTS (
+            SELECT 1 FROM matches 
+            WHERE matches.id = message_reads.match_id 
+            AND (matches.user1_id = auth.uid() OR matches.user2_id = auth.uid())
+        )
+    );
+
+CREATE POLICY "Users can insert own read markers" ON message_reads
+    FOR INSERT WITH CHECK (auth.uid() = user_id);
+
+CREATE POLICY "Users can update own read markers" ON message_reads
+    FOR UPDATE USING (auth.uid() = user_id);
+
 -- =====================================================
 -- HELPER FUNCTIONS
 -- =====================================================
 
--- Function to find similar skills using vector similarity
+-- Move a user's read marker forward in a single statement (never backwards)
+CREATE OR REPLACE FUNCTION advance_read_marker(
+    p_user_id UUID,
+    p_match_id UUID,
+    p_read_at TIMESTAMP WITH TIME ZONE
+)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO message_reads (user_id, match_id, last_read_at)
+    VALUES (p_user_id, p_match_id, p_read_at)
+    ON CONFLICT (user_id, match_id) DO UPDATE
+        SET last_read_at = EXCLUDED.last_read_at
+        WHERE message_reads.last_read_at < EXCLUDED.last_read_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Nearest skills of a mode to an embedding, keeping only candidates that pass
+-- the optional filters: owner excluded, minimum level, owner has a LEARN skill,
+-- owner's preferred language, and at least one shared availability slot (skills
+-- without availability always pass). The filters run on the HNSW scan's output,
+-- which holds at most hnsw.ef_search rows, so when too few candidates survive
+-- the pool is doubled and the scan repeated, up to p_max_candidates. The scan
+-- runs as dynamic SQL with the mode inlined, so the planner always picks that
+-- mode's partial index (a cached generic plan could not match its predicate);
+-- a scan returning fewer than pool rows has then really run out of skills.
 CREATE OR REPLACE FUNCTION find_similar_skills(
-    query_embedding vector(384),
-    query_mode skill_mode,
-    limit_count INTEGER DEFAULT 10
+    p_embedding vector(384),
+    p_mode skill_mode,
+    p_limit INTEGER DEFAULT 10,
+    p_exclude_user_id UUID DEFAULT NULL,
+    p_min_level INTEGER DEFAULT NULL,
+    p_require_learn_skill BOOLEAN DEFAULT FALSE,
+    p_language VARCHAR DEFAULT NULL,
+    p_availability JSONB DEFAULT NULL,
+    p_max_candidates INTEGER DEFAULT 1000
 )
 RETURNS TABLE (
-    skill_id UUID,
-    skill_name VARCHAR,
+    id UUID,
     user_id UUID,
-    similarity DECIMAL
+    name VARCHAR,
+    mode skill_mode,
+    level INTEGER,
+    availability JSONB,
+    canonical_text TEXT,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE,
+    embedding vector(384),
+    similarity DOUBLE PRECISION
 ) AS $$
+#variable_conflict use_column
+DECLARE
+    pool INTEGER := LEAST(GREATEST(p_limit * 4, 40), p_max_candidates);
+    scanned UUID[];
+    matched UUID[];
 BEGIN
+    LOOP
+        -- HNSW (pgvector caps ef_search at 1000) returns at most ef_search rows
+        PERFORM set_config('hnsw.ef_search', LEAST(pool, 1000)::TEXT, TRUE);
+
+        EXECUTE format(
+            'SELECT ARRAY(
+                SELECT s.id FROM skills s
+                WHERE s.mode = %L AND s.embedding IS NOT NULL
+                ORDER BY s.embedding <=> $1
+                LIMIT $2
+            )',
+            p_mode
+        ) INTO scanned USING p_embedding, pool;
+
+        SELECT
+            (ARRAY_AGG(c.id ORDER BY c.distance) FILTER (
+                WHERE (p_exclude_user_id IS NULL OR c.user_id != p_exclude_user_id)
+                AND (p_min_level IS NULL OR c.level >= p_min_level)
+                AND (NOT p_require_learn_skill OR EXISTS (
+                    SELECT 1 FROM skills l
+                    WHERE l.user_id = c.user_id AND l.mode = 'LEARN' AND l.embedding IS NOT NULL
+                ))
+                AND (p_language IS NULL OR EXISTS (
+                    SELECT 1 FROM users u WHERE u.id = c.user_id AND u.preferred_language = p_language
+                ))
+                AND (
+                    p_availability IS NULL
+                    OR jsonb_array_length(c.availability) = 0
+                    OR EXISTS (
+                        SELECT 1 FROM jsonb_array_elements(p_availability) slot
+                        WHERE c.availability @> jsonb_build_array(slot)
+                    )
+                )
+            ))[1:p_limit]
+        INTO matched
+        FROM (
+            SELECT s.id, s.user_id, s.level, s.availability, s.embedding <=> p_embedding AS distance
+            FROM skills s
+            WHERE s.id = ANY(scanned)
+        ) c;
+
+        EXIT WHEN COALESCE(array_length(matched, 1), 0) >= p_limit
+            OR COALESCE(array_length(scanned, 1), 0) < pool
+            OR pool >= p_max_candidates;
+        pool := LEAST(pool * 2, p_max_candidates);
+    END LOOP;
+
     RETURN QUERY
-    SELECT 
-        s.id,
-        s.name,
-        s.user_id,
-        1 - (s.embedding <=> query_embedding) AS similarity
+    SELECT
+        s.id, s.user_id, s.name, s.mode, s.level, s.availability, s.canonical_text,
+        s.created_at, s.updated_at, s.embedding,
+        (1 - (s.embedding <=> p_embedding))::DOUBLE PRECISION
     FROM skills s
-    WHERE s.mode = query_mode
-    AND s.embedding IS NOT NULL
-    ORDER BY s.embedding <=> query_embedding
-    LIMIT limit_count;
+    WHERE s.id = ANY(COALESCE(matched, '{}'))
+    ORDER BY s.embedding <=> p_embedding, s.id;
 END;
-$$ LANGUAGE plpgsql;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Inbox: every conversation for a user with its last message and unread count,
+-- most recent first. Each LATERAL subquery is a bounded range scan on
+-- idx_messages_match_created, so the cost is one index probe per match
+-- rather than one API request per thread.
+CREATE OR REPLACE FUNCTION get_user_inbox(
+    p_user_id UUID,
+    preview_length INTEGER DEFAULT 200
+)
+RETURNS TABLE (
+    match_id UUID,
+    match_status match_status,
+    other_user_id UUID,
+    other_user_name VARCHAR,
+    other_user_avatar_url TEXT,
+    last_message_id UUID,
+    last_message_preview TEXT,
+    last_message_sender_id UUID,
+    last_message_at TIMESTAMP WITH TIME ZONE,
+    unread_count BIGINT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT 
+        m.id,
+        m.status,
+        u.id,
+        u.name,
+        u.avatar_url,
+        lm.id,
+        LEFT(lm.content, preview_length),
+        lm.sender_id,
+        lm.created_at,
+        COALESCE(uc.total, 0)
+    FROM matches m
+    JOIN users u
+        ON u.id = CASE WHEN m.user1_id = p_user_id THEN m.user2_id ELSE m.user1_id END
+    LEFT JOIN message_reads r
+        ON r.match_id = m.id AND r.user_id = p_user_id
+    LEFT JOIN LATERAL (
+        SELECT msg.id, msg.content, msg.sender_id, msg.created_at
+        FROM messages msg
+        WHERE msg.match_id = m.id
+        ORDER BY msg.created_at DESC, msg.id DESC
+        LIMIT 1
+    ) lm ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) AS total
+        FROM messages msg
+        WHERE msg.match_id = m.id
+        AND msg.sender_id != p_user_id
+        AND msg.created_at > COALESCE(r.last_read_at, '-infinity'::timestamptz)
+    ) uc ON TRUE
+    WHERE m.user1_id = p_user_id OR m.user2_id = p_user_id
+    ORDER BY COALESCE(lm.created_at, m.created_at) DESC;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Sessions a user takes part in, scheduled in [p_from, p_to), earliest first.
+-- Each branch is an ordered range scan on idx_sessions_user{1,2}_scheduled and
+-- the two are merged, so no join with matches and no sort of the full history.
+CREATE OR REPLACE FUNCTION get_user_sessions_in_range(
+    p_user_id UUID,
+    p_from TIMESTAMP WITH TIME ZONE DEFAULT '-infinity',
+    p_to TIMESTAMP WITH TIME ZONE DEFAULT 'infinity',
+    p_status session_status DEFAULT NULL,
+    p_limit INTEGER DEFAULT 100
+)
+RETURNS SETOF sessions AS $$
+    SELECT * FROM (
+        (
+            SELECT * FROM sessions
+            WHERE user1_id = p_user_id
+            AND scheduled_at >= p_from AND scheduled_at < p_to
+            AND (p_status IS NULL OR status = p_status)
+            ORDER BY scheduled_at
+            LIMIT p_limit
+        )
+        UNION ALL
+        (
+            SELECT * FROM sessions
+            WHERE user2_id = p_user_id
+            AND scheduled_at >= p_from AND scheduled_at < p_to
+            AND (p_status IS NULL OR status = p_status)
+            ORDER BY scheduled_at
+            LIMIT p_limit
+        )
+    ) s
+    ORDER BY scheduled_at
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
+
+-- Most common skills for a mode, grouped by normalized name and level.
+-- Used to pre-generate session agendas for the skills most likely to be requested.
+CREATE OR REPLACE FUNCTION get_popular_skills(
+    p_mode skill_mode DEFAULT 'TEACH',
+    p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE (
+    name TEXT,
+    level INTEGER,
+    skill_count BIGINT
+) AS $$
+    SELECT LOWER(BTRIM(s.name)), s.level, COUNT(*)
+    FROM skills s
+    WHERE s.mode = p_mode
+    GROUP BY 1, 2
+    ORDER BY 3 DESC
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
 
 -- Function to calculate availability overlap
 CREATE OR REPLACE FUNCTION calculate_availability_overlap(
@@ -329,6 +672,73 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Replication lag of a read replica in seconds (0 on the primary).
+-- A replica that has replayed everything it received reports 0 even if the
+-- primary has been idle, so the backend only falls back when it is truly behind.
+CREATE OR REPLACE FUNCTION replication_lag_seconds()
+RETURNS DOUBLE PRECISION AS $$
+BEGIN
+    IF NOT pg_is_in_recovery() THEN
+        RETURN 0;
+    END IF;
+
+    IF pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN
+        RETURN 0;
+    END IF;
+
+    RETURN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Reciprocal two-sided search over user centroids: users whose teach centroid
+-- is near p_learn_centroid, plus users whose learn centroid is near
+-- p_teach_centroid (one HNSW search each), ranked by the mean of both
+-- similarities. Each side fetches twice the limit so the exclusion and
+-- language filters still leave enough users.
+CREATE OR REPLACE FUNCTION find_reciprocal_users(
+    p_teach_centroid vector(384),
+    p_learn_centroid vector(384),
+    p_limit INTEGER DEFAULT 50,
+    p_exclude_user_id UUID DEFAULT NULL,
+    p_language VARCHAR DEFAULT NULL
+)
+RETURNS TABLE (
+    user_id UUID,
+    teach_similarity DOUBLE PRECISION,
+    learn_similarity DOUBLE PRECISION,
+    similarity DOUBLE PRECISION
+) AS $$
+    WITH candidates AS (
+        (
+            SELECT v.user_id FROM user_vectors v
+            WHERE v.teach_centroid IS NOT NULL
+            ORDER BY v.teach_centroid <=> p_learn_centroid
+            LIMIT p_limit * 2
+        )
+        UNION
+        (
+            SELECT v.user_id FROM user_vectors v
+            WHERE v.learn_centroid IS NOT NULL
+            ORDER BY v.learn_centroid <=> p_teach_centroid
+            LIMIT p_limit * 2
+        )
+    )
+    SELECT
+        v.user_id,
+        1 - (v.teach_centroid <=> p_learn_centroid),
+        1 - (v.learn_centroid <=> p_teach_centroid),
+        1 - ((v.teach_centroid <=> p_learn_centroid) + (v.learn_centroid <=> p_teach_centroid)) / 2
+    FROM candidates c
+    JOIN user_vectors v ON v.user_id = c.user_id
+    JOIN users u ON u.id = v.user_id
+    WHERE v.teach_centroid IS NOT NULL
+    AND v.learn_centroid IS NOT NULL
+    AND (p_exclude_user_id IS NULL OR v.user_id != p_exclude_user_id)
+    AND (p_language IS NULL OR u.preferred_language = p_language)
+    ORDER BY 4 DESC
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE SET hnsw.ef_search = 400;
+
 -- =====================================================
 -- COMMENTS FOR DOCUMENTATION
 -- =====================================================
@@ -338,6 +748,9 @@ COMMENT ON TABLE skills IS 'Stores skills users can teach or want to learn, with
 COMMENT ON TABLE matches IS 'Stores skill exchange matches between users with scoring breakdown';
 COMMENT ON TABLE sessions IS 'Stores scheduled learning sessions between matched users';
 COMMENT ON TABLE messages IS 'Stores messages exchanged between matched users';
+COMMENT ON TABLE message_reads IS 'Per-user, per-match read markers used to derive unread state';
+COMMENT ON TABLE jobs IS 'Background jobs of the in-process job queue, with attempts and last error';
+COMMENT ON TABLE user_vectors IS 'Per-user centroids of TEACH and LEARN skill embeddings, maintained by trigger';
 
 COMMENT ON COLUMN skills.embedding IS 'Vector embedding (384-dim) from all-MiniLM-L6-v2 model';
 COMMENT ON COLUMN skills.canonical_text IS 'Canonical text representation used to generate embedding';
@@ -346,3 +759,5 @@ COMMENT ON COLUMN matches.reciprocity_score IS 'Score based on skill level compa
 COMMENT ON COLUMN matches.availability_score IS 'Score based on schedule overlap (0-1)';
 COMMENT ON COLUMN matches.preference_score IS 'Score based on language and other preferences (0-1)';
 COMMENT ON COLUMN matches.total_score IS 'Weighted combination of all scores (0-1)';
+COMMENT ON COLUMN sessions.user1_id IS 'Denormalized from matches.user1_id on insert for per-user session queries';
+COMMENT ON COLUMN sessions.user2_id IS 'Denormalized from matches.user2_id on insert for per-user session queries';
@@ -22,23 +22,18 @@ export default function DashboardPage() {
             try {
                 setLoading(true)
 
-                // 1. Get User
-                const userData = await api.getCurrentUser()
-                if (!userData) {
+                // 1. Get User and Skills (one aggregated request)
+                const dashboard = await api.getDashboard()
+                if (!dashboard.profile) {
                     router.push('/onboarding')
                     return
                 }
-                setUser(userData)
-
-                // 2. Get User Skills (for the summary cards)
-                // We fetch all skills and filter by mode
-                try {
-                    const skills = await api.getSkills()
-                    setTeachSkills(skills.filter((s: any) => s.mode === 'TEACH'))
-                    setLearnSkills(skills.filter((s: any) => s.mode === 'LEARN'))
-                } catch (e) {
-                    console.error("Failed to fetch skills", e)
-                }
+                setUser(dashboard.profile)
+
+                // 2. Split skills for the summary cards
+                const skills = dashboard.skills || []
+                setTeachSkills(skills.filter((s: any) => s.mode === 'TEACH'))
+                setLearnSkills(skills.filter((s: any) => s.mode === 'LEARN'))
 
                 // 3. Discover Matches
                 const matchResults = await api.discoverMatches()
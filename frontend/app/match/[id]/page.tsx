@@ -26,6 +26,15 @@ export default function MatchDetailsPage() {
     const [newMessage, setNewMessage] = useState('')
     const [sending, setSending] = useState(false)
     const messagesEndRef = useRef<HTMLDivElement>(null)
+    const messagesContainerRef = useRef<HTMLDivElement>(null)
+    // Paging cursors: polls fetch only messages after the newest one shown,
+    // scrolling up loads the page before the oldest one shown
+    const afterCursorRef = useRef<string | undefined>(undefined)
+    const [beforeCursor, setBeforeCursor] = useState<string | undefined>()
+    const [loadingOlder, setLoadingOlder] = useState(false)
+    // Scroll height before older messages were prepended, to keep the view in place
+    const prependScrollHeightRef = useRef<number | null>(null)
+    const lastScrollTopRef = useRef(0)
 
     // Session State
     const [generatingAgenda, setGeneratingAgenda] = useState(false)
@@ -43,14 +52,20 @@ export default function MatchDetailsPage() {
             // Initial fetch
             fetchMatchData()
 
-            // Poll every 5 seconds
-            interval = setInterval(fetchMessages, 5000)
+            // Poll every 5 seconds for messages newer than the last one shown
+            interval = setInterval(fetchNewMessages, 5000)
         }
 
         return () => clearInterval(interval)
     }, [matchId])
 
     useEffect(() => {
+        const container = messagesContainerRef.current
+        if (prependScrollHeightRef.current !== null && container) {
+            container.scrollTop += container.scrollHeight - prependScrollHeightRef.current
+            prependScrollHeightRef.current = null
+            return
+        }
         scrollToBottom()
     }, [messages])
 
@@ -79,13 +94,64 @@ export default function MatchDetailsPage() {
 
     const fetchMessages = async () => {
         try {
-            const msgs = await api.getMessages(matchId)
-            setMessages(msgs)
+            const { messages: msgs, beforeCursor, afterCursor } = await api.getMessages(matchId)
+            // API pages newest first; the thread renders oldest at the top
+            setMessages([...msgs].reverse())
+            afterCursorRef.current = afterCursor
+            setBeforeCursor(beforeCursor)
         } catch (error) {
             console.error('Error fetching messages:', error)
         }
     }
 
+    const fetchNewMessages = async () => {
+        if (!afterCursorRef.current) {
+            return fetchMessages()
+        }
+
+        try {
+            const { messages: msgs, afterCursor } = await api.getMessages(matchId, {
+                after: afterCursorRef.current,
+            })
+            if (msgs.length === 0) return
+
+            afterCursorRef.current = afterCursor
+            setMessages((current) => {
+                const shown = new Set(current.map((msg) => msg.id))
+                return [...current, ...[...msgs].reverse().filter((msg: any) => !shown.has(msg.id))]
+            })
+        } catch (error) {
+            console.error('Error fetching new messages:', error)
+        }
+    }
+
+    const fetchOlderMessages = async () => {
+        if (!beforeCursor || loadingOlder) return
+
+        try {
+            setLoadingOlder(true)
+            const { messages: msgs, beforeCursor: olderCursor } = await api.getMessages(matchId, {
+                before: beforeCursor,
+            })
+            prependScrollHeightRef.current = messagesContainerRef.current?.scrollHeight ?? null
+            setMessages((current) => [...[...msgs].reverse(), ...current])
+            setBeforeCursor(olderCursor)
+        } catch (error) {
+            console.error('Error fetching older messages:', error)
+        } finally {
+            setLoadingOlder(false)
+        }
+    }
+
+    const handleMessagesScroll = (e: React.UIEvent<HTMLDivElement>) => {
+        const { scrollTop } = e.currentTarget
+        // Only when the user scrolls up near the top, not while auto-scrolling down
+        if (scrollTop < 80 && scrollTop < lastScrollTopRef.current) {
+            fetchOlderMessages()
+        }
+        lastScrollTopRef.current = scrollTop
+    }
+
     const fetchSessions = async () => {
         try {
             const sessions = await api.getMatchSessions(matchId)
@@ -113,7 +179,7 @@ export default function MatchDetailsPage() {
                 content: newMessage
             })
             setNewMessage('')
-            await fetchMessages()
+            await fetchNewMessages()
         } catch (error) {
             toast.error('Failed to send message')
         } finally {
@@ -207,7 +273,15 @@ export default function MatchDetailsPage() {
                 {/* Chat Area */}
                 <div className="flex-1 flex flex-col bg-white dark:bg-dark-bg relative">
                     {/* Scrollable Messages */}
-                    <div className="flex-1 overflow-y-auto p-4 space-y-4">
+                    <div
+                        ref={messagesContainerRef}
+                        onScroll={handleMessagesScroll}
+                        className="flex-1 overflow-y-auto p-4 space-y-4"
+                    >
+                        {loadingOlder && (
+                            <p className="text-center text-xs text-gray-400">Loading earlier messages...</p>
+                        )}
+
                         {/* System Message - Match Info */}
                         <div className="flex justify-center mb-6">
                             <div className="bg-gray-100 dark:bg-dark-card border border-gray-200 dark:border-dark-border rounded-lg p-3 text-sm text-center max-w-md">
@@ -115,31 +115,16 @@ export default function OnboardingPage() {
             await api.createUser(userData);
             console.log('User created successfully');
 
-            // 2. Add Teaching Skills
-            console.log('Adding teaching skills:', teachSkills);
-            for (const skill of teachSkills) {
-                const skillData = {
-                    name: skill.name,
-                    level: skill.level,
-                    mode: 'TEACH'
-                };
-                console.log('Adding teaching skill:', skillData);
-                await api.createSkill(skillData);
+            // 2. Add Teaching & Learning Skills in one request
+            const skills = [
+                ...teachSkills.map((skill) => ({ name: skill.name, level: skill.level, mode: 'TEACH' })),
+                ...learnSkills.map((skill) => ({ name: skill.name, level: skill.level, mode: 'LEARN' })),
+            ];
+            console.log('Adding skills:', skills);
+            if (skills.length > 0) {
+                await api.createSkillsBulk(skills);
             }
-            console.log('Teaching skills added successfully');
-
-            // 3. Add Learning Skills
-            console.log('Adding learning skills:', learnSkills);
-            for (const skill of learnSkills) {
-                const skillData = {
-                    name: skill.name,
-                    level: skill.level,
-                    mode: 'LEARN'
-                };
-                console.log('Adding learning skill:', skillData);
-                await api.createSkill(skillData);
-            }
-            console.log('Learning skills added successfully');
+            console.log('Skills added successfully');
 
             toast.success('Profile created successfully!')
             router.push('/dashboard')
@@ -10,6 +10,7 @@ export default function TutorPage() {
         { role: 'assistant', content: 'Hello! I am your AI Technical Tutor. I can help you understand concepts, review code, or prepare a learning plan. What are you working on?' }
     ])
     const [input, setInput] = useState('')
+    const [conversationId, setConversationId] = useState<string | null>(null)
     const [loading, setLoading] = useState(false)
     const messagesEndRef = useRef<HTMLDivElement>(null)
 
@@ -24,9 +25,11 @@ export default function TutorPage() {
 
         try {
             const response = await api.chatWithAssistant(
-                [...messages, userMsg].map(m => ({ role: m.role, content: m.content })),
+                userMsg.content,
+                conversationId,
                 { context: "User is in full-screen Tutor Mode" }
             )
+            setConversationId(response.conversation_id)
 
             setMessages(prev => [...prev, { role: 'assistant', content: response.response }])
         } catch (error) {
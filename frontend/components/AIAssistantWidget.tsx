@@ -12,6 +12,7 @@ export default function AIAssistantWidget() {
         { role: 'assistant', content: 'I\'m your AI Assistant. How can I help you find a match today?' }
     ])
     const [input, setInput] = useState('')
+    const [conversationId, setConversationId] = useState<string | null>(null)
     const [loading, setLoading] = useState(false)
     const messagesEndRef = useRef<HTMLDivElement>(null)
 
@@ -34,14 +35,18 @@ export default function AIAssistantWidget() {
 
         try {
             // Prepare context - currently mocked, but could assume user profile data is available
-            const response = await api.chatWithAssistant(
-                [...messages, userMsg].map(m => ({ role: m.role, content: m.content })),
-                { context: "User is checking dashboard matches" }
+            // Show the answer as it streams in, updating a placeholder message
+            setMessages(prev => [...prev, { role: 'assistant', content: '' }])
+            const result = await api.streamChatWithAssistant(
+                userMsg.content,
+                conversationId,
+                { context: "User is checking dashboard matches" },
+                (text) => setMessages(prev => [...prev.slice(0, -1), { role: 'assistant', content: text }])
             )
-
-            setMessages(prev => [...prev, { role: 'assistant', content: response.response }])
+            setConversationId(result.conversationId)
         } catch (error) {
-            setMessages(prev => [...prev, { role: 'assistant', content: "Sorry, I'm having trouble connecting right now." }])
+            // Drop the empty placeholder if the stream never produced text
+            setMessages(prev => [...prev.filter(m => m.content !== ''), { role: 'assistant', content: "Sorry, I'm having trouble connecting right now." }])
         } finally {
             setLoading(false)
         }
@@ -57,6 +57,31 @@ class APIClient {
         return data
     }
 
+    // Dashboard endpoint
+    // Sections come back null when unchanged since the last call; the cached copy is reused
+    private dashboardCache: Record<string, any> = {}
+    private dashboardETags: Record<string, string> = {}
+
+    async getDashboard() {
+        const known = Object.values(this.dashboardETags)
+        const response = await this.client.get('/api/dashboard', {
+            headers: known.length ? { 'If-None-Match': known.join(', ') } : {},
+            validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+        })
+        if (response.status === 304) {
+            return { ...this.dashboardCache }
+        }
+
+        const { etags, unchanged, ...sections } = response.data
+        for (const [name, value] of Object.entries(sections)) {
+            if (!unchanged.includes(name)) {
+                this.dashboardCache[name] = value
+            }
+        }
+        this.dashboardETags = etags
+        return { ...this.dashboardCache }
+    }
+
     // Skill endpoints
     async getSkills(mode?: 'TEACH' | 'LEARN') {
         const { data } = await this.client.get('/api/skills', {
@@ -70,6 +95,11 @@ class APIClient {
         return data
     }
 
+    async createSkillsBulk(skills: any[]) {
+        const { data } = await this.client.post('/api/skills/bulk', { skills })
+        return data
+    }
+
     async updateSkill(skillId: string, skillData: any) {
         const { data } = await this.client.patch(`/api/skills/${skillId}`, skillData)
         return data
@@ -120,6 +150,20 @@ class APIClient {
         return data
     }
 
+    async getUpcomingSessions(limit: number = 20) {
+        const { data } = await this.client.get('/api/sessions/upcoming', {
+            params: { limit },
+        })
+        return data
+    }
+
+    async getSessionsInRange(start: string, end: string) {
+        const { data } = await this.client.get('/api/sessions/range', {
+            params: { start, end },
+        })
+        return data
+    }
+
     async createSession(sessionData: any) {
         const { data } = await this.client.post('/api/sessions', sessionData)
         return data
@@ -133,10 +177,30 @@ class APIClient {
     }
 
     // Message endpoints
-    async getMessages(matchId: string, limit: number = 100) {
-        const { data } = await this.client.get(`/api/messages/match/${matchId}`, {
-            params: { limit },
+    async getInbox() {
+        const { data } = await this.client.get('/api/messages/inbox')
+        return data
+    }
+
+    // Returns messages newest first plus opaque cursors for paging:
+    // pass `before` to scroll back, `after` to fetch only newer messages
+    async getMessages(
+        matchId: string,
+        options: { limit?: number; before?: string; after?: string } = {}
+    ) {
+        const { limit = 50, before, after } = options
+        const response = await this.client.get(`/api/messages/match/${matchId}`, {
+            params: { limit, before, after },
         })
+        return {
+            messages: response.data,
+            beforeCursor: response.headers['x-before-cursor'] as string | undefined,
+            afterCursor: response.headers['x-after-cursor'] as string | undefined,
+        }
+    }
+
+    async getUnreadCount(matchId: string) {
+        const { data } = await this.client.get(`/api/messages/match/${matchId}/unread`)
         return data
     }
 
@@ -146,12 +210,72 @@ class APIClient {
     }
 
     // AI Assistant endpoints
-    async chatWithAssistant(messages: any[], context?: any) {
-        const { data } = await this.client.post('/api/assistant/chat', {
-            messages,
-            context,
+    // History is kept server-side: send only the new message plus the conversationId
+    // from the previous answer. An expired conversation is restarted transparently.
+    async chatWithAssistant(message: string, conversationId?: string | null, context?: any) {
+        try {
+            const { data } = await this.client.post('/api/assistant/chat', {
+                message,
+                conversation_id: conversationId || undefined,
+                context,
+            })
+            return data
+        } catch (error: any) {
+            if (conversationId && error.response?.status === 404) {
+                return this.chatWithAssistant(message, null, context)
+            }
+            throw error
+        }
+    }
+
+    // Streams the answer over Server-Sent Events. onText receives the text so far
+    // after every token; resolves with the final text (including any disclaimer)
+    // and the conversation ID to send with the next message.
+    async streamChatWithAssistant(
+        message: string,
+        conversationId: string | null,
+        context: any,
+        onText: (text: string) => void
+    ): Promise<{ text: string, conversationId: string | null }> {
+        const { data: { session } } = await supabase.auth.getSession()
+        const response = await fetch(`${API_URL}/api/assistant/chat/stream`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                ...(session?.access_token ? { Authorization: `Bearer ${session.access_token}` } : {}),
+            },
+            body: JSON.stringify({ message, conversation_id: conversationId || undefined, context }),
         })
-        return data
+        if (response.status === 404 && conversationId) {
+            return this.streamChatWithAssistant(message, null, context, onText)
+        }
+        if (!response.ok || !response.body) {
+            throw new Error(`Assistant stream failed with status ${response.status}`)
+        }
+
+        const reader = response.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+        let text = ''
+        while (true) {
+            const { done, value } = await reader.read()
+            if (done) break
+            buffer += decoder.decode(value, { stream: true })
+
+            // Events are separated by a blank line; keep any partial event for the next chunk
+            const events = buffer.split('\n\n')
+            buffer = events.pop() || ''
+            for (const raw of events) {
+                const event = raw.match(/^event: (.*)$/m)?.[1]
+                const data = raw.match(/^data: (.*)$/m)?.[1]
+                if (!event || !data || event === 'done') continue
+
+                const { content } = JSON.parse(data)
+                text = event === 'error' ? content : text + content
+                onText(text)
+            }
+        }
+        return { text, conversationId: response.headers.get('X-Conversation-Id') }
     }
 }
 